@@ -3,6 +3,8 @@ Agent Layer - Main Module
 Provides AI agent implementations with Langchain integration
 """
 
+from typing import Dict, Any, Optional, AsyncIterator
+
 from .base import (
     BaseAgent,
     ToolAgent,
@@ -10,12 +12,20 @@ from .base import (
     AgentConfig,
     AgentMessage,
     AgentResponse,
+    AgentStreamEvent,
     ToolCall,
     AgentRegistry,
-    agent_registry
+    agent_registry,
+    DEFAULT_SESSION
 )
+from .memory import SessionMemoryStore
+from .context import TokenCounter, ContextWindowBuilder, get_token_counter
+from .tool_output import ToolOutputPolicy, ToolOutputShaper, tool_output_shaper
+from .response_cache import HashingEmbedder, VectorIndex, ResponseCache
 from .langchain_agent import (
     LangchainAgent,
+    LangchainTool,
+    ParallelAgentExecutor,
     DataAnalysisAgent,
     QueryAssistantAgent,
     data_analysis_agent,
@@ -31,14 +41,36 @@ __all__ = [
     'AgentConfig',
     'AgentMessage',
     'AgentResponse',
+    'AgentStreamEvent',
     'ToolCall',
     
     # Registry
     'AgentRegistry',
     'agent_registry',
     
+    # Session memory
+    'SessionMemoryStore',
+    'DEFAULT_SESSION',
+    
+    # Context window
+    'TokenCounter',
+    'ContextWindowBuilder',
+    'get_token_counter',
+    
+    # Tool output shaping
+    'ToolOutputPolicy',
+    'ToolOutputShaper',
+    'tool_output_shaper',
+    
+    # Response cache
+    'HashingEmbedder',
+    'VectorIndex',
+    'ResponseCache',
+    
     # Langchain implementations
     'LangchainAgent',
+    'LangchainTool',
+    'ParallelAgentExecutor',
     'DataAnalysisAgent',
     'QueryAssistantAgent',
     'data_analysis_agent',
@@ -75,11 +107,27 @@ def get_agent(agent_name: str) -> BaseAgent:
 async def process_message(
     message: str,
     agent_name: str = "query_assistant_agent",
-    context: Optional[Dict[str, Any]] = None
+    context: Optional[Dict[str, Any]] = None,
+    session_id: Optional[str] = None
 ) -> AgentResponse:
     """Process message with specified agent"""
     agent = get_agent(agent_name)
     if not agent:
         raise ValueError(f"Agent not found: {agent_name}")
     
-    return await agent.process_message(message, context)
\ No newline at end of file
+    return await agent.process_message(message, context, session_id)
+
+
+async def process_message_stream(
+    message: str,
+    agent_name: str = "query_assistant_agent",
+    context: Optional[Dict[str, Any]] = None,
+    session_id: Optional[str] = None
+) -> AsyncIterator[AgentStreamEvent]:
+    """Stream message processing events from specified agent"""
+    agent = get_agent(agent_name)
+    if not agent:
+        raise ValueError(f"Agent not found: {agent_name}")
+    
+    async for event in agent.process_message_stream(message, context, session_id):
+        yield event
\ No newline at end of file
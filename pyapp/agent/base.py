@@ -4,8 +4,8 @@ Provides base agent classes for AI-powered functionality
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional, Union, AsyncIterator
-from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Union, AsyncIterator, Callable
+from dataclasses import dataclass, field
 from datetime import datetime
 import json
 import asyncio
@@ -14,6 +14,10 @@ from ..service.base import ServiceResult
 from ..logger import LOG_INFO, LOG_ERROR, LOG_DEBUG
 
 
+# Session used when the caller does not provide one
+DEFAULT_SESSION = "default"
+
+
 @dataclass
 class AgentMessage:
     """Agent message structure"""
@@ -21,6 +25,7 @@ class AgentMessage:
     content: str
     metadata: Optional[Dict[str, Any]] = None
     timestamp: Optional[datetime] = None
+    seq: Optional[int] = None  # increasing position in session memory, set by the memory store
 
 
 @dataclass
@@ -33,6 +38,10 @@ class AgentConfig:
     enable_tools: bool = True
     enable_memory: bool = True
     system_prompt: Optional[str] = None
+    max_iterations: int = 10  # LLM steps per request
+    max_parallel_tools: int = 4  # tool calls of one step run concurrently
+    tool_timeout: Optional[float] = 60.0  # seconds per tool call, None = no limit
+    tool_timeouts: Dict[str, float] = field(default_factory=dict)  # per-tool overrides
 
 
 @dataclass
@@ -52,12 +61,22 @@ class AgentResponse:
     usage_stats: Optional[Dict[str, Any]] = None
 
 
+@dataclass
+class AgentStreamEvent:
+    """Streaming agent event"""
+    event: str  # token, tool_start, tool_end, final
+    data: Dict[str, Any] = field(default_factory=dict)
+    response: Optional[AgentResponse] = None  # set on the final event
+
+
 class BaseAgent(ABC):
     """Base agent class"""
     
     def __init__(self, config: AgentConfig):
+        from .memory import create_session_store
+        
         self.config = config
-        self.memory: List[AgentMessage] = []
+        self.memory = create_session_store(config.agent_name)
         self.tools: Dict[str, Any] = {}
         self._initialized = False
     
@@ -97,24 +116,20 @@ class BaseAgent(ABC):
         """Check if agent is initialized"""
         return self._initialized
     
-    def add_to_memory(self, message: AgentMessage) -> None:
-        """Add message to agent memory"""
-        if not message.timestamp:
-            message.timestamp = datetime.now()
-        self.memory.append(message)
-        
-        # Keep only last N messages to prevent memory bloat
-        max_memory = 50
-        if len(self.memory) > max_memory:
-            self.memory = self.memory[-max_memory:]
+    async def add_to_memory(self, message: AgentMessage, session_id: Optional[str] = None) -> None:
+        """Add message to a session's memory"""
+        await self.memory.append(session_id or DEFAULT_SESSION, message)
     
-    def get_memory_context(self, max_messages: int = 10) -> List[AgentMessage]:
-        """Get recent memory context"""
-        return self.memory[-max_messages:] if self.memory else []
+    async def get_memory_context(self, max_messages: int = 10, session_id: Optional[str] = None) -> List[AgentMessage]:
+        """Get recent memory context of a session"""
+        return await self.memory.get_messages(session_id or DEFAULT_SESSION, max_messages)
     
-    def clear_memory(self) -> None:
-        """Clear agent memory"""
-        self.memory.clear()
+    async def clear_memory(self, session_id: Optional[str] = None) -> None:
+        """Clear one session's memory, or all sessions held in process"""
+        if session_id:
+            await self.memory.clear(session_id)
+        else:
+            self.memory.clear_local()
     
     def register_tool(self, tool_name: str, tool: Any) -> None:
         """Register a tool for the agent"""
@@ -131,7 +146,8 @@ class BaseAgent(ABC):
     async def process_message(
         self,
         message: str,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None
     ) -> AgentResponse:
         """Process a user message and return response"""
         pass
@@ -140,9 +156,10 @@ class BaseAgent(ABC):
     async def process_message_stream(
         self,
         message: str,
-        context: Optional[Dict[str, Any]] = None
-    ) -> AsyncIterator[AgentResponse]:
-        """Process a user message and return streaming response"""
+        context: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[AgentStreamEvent]:
+        """Process a user message, yielding events as they happen and the response last"""
         pass
 
 
@@ -171,19 +188,24 @@ class ToolAgent(BaseAgent):
     async def execute_tool(
         self,
         tool_name: str,
-        parameters: Dict[str, Any]
+        parameters: Dict[str, Any],
+        timeout: Optional[float] = None,
+        tools: Optional[Dict[str, Any]] = None
     ) -> ServiceResult:
-        """Execute a tool with parameters"""
-        if tool_name not in self.tools:
+        """Execute a tool with parameters, looked up in tools (default: the registered tools)"""
+        tools = self.tools if tools is None else tools
+        if tool_name not in tools:
             return ServiceResult(
                 success=False,
                 message=f"Tool not found: {tool_name}"
             )
         
         try:
-            tool = self.tools[tool_name]
-            if hasattr(tool, '__call__'):
-                result = await tool(**parameters)
+            tool = tools[tool_name]
+            # Langchain tools are not awaitable themselves, their coroutine is _arun
+            call = getattr(tool, '_arun', tool)
+            if hasattr(call, '__call__'):
+                result = await asyncio.wait_for(call(**parameters), timeout)
                 return ServiceResult(
                     success=True,
                     data=result,
@@ -194,6 +216,12 @@ class ToolAgent(BaseAgent):
                     success=False,
                     message=f"Tool {tool_name} is not callable"
                 )
+        except asyncio.TimeoutError:
+            LOG_ERROR(f"Tool {tool_name} timed out after {timeout}s")
+            return ServiceResult(
+                success=False,
+                message=f"Tool {tool_name} timed out after {timeout}s"
+            )
         except Exception as e:
             LOG_ERROR(f"Tool execution failed: {e}")
             return ServiceResult(
@@ -201,6 +229,34 @@ class ToolAgent(BaseAgent):
                 message=f"Tool execution failed: {str(e)}"
             )
     
+    async def execute_tools(
+        self,
+        tool_calls: List[ToolCall],
+        on_result: Optional[Callable[[int, ServiceResult], None]] = None,
+        tools: Optional[Dict[str, Any]] = None
+    ) -> List[ServiceResult]:
+        """Execute tool calls concurrently and return their results in call order"""
+        semaphore = asyncio.Semaphore(max(1, self.config.max_parallel_tools))
+        
+        async def run(index: int, tool_call: ToolCall) -> ServiceResult:
+            async with semaphore:
+                result = await self.execute_tool(
+                    tool_call.tool_name,
+                    tool_call.parameters,
+                    timeout=self.get_tool_timeout(tool_call.tool_name),
+                    tools=tools
+                )
+            # Completion order, for progress reporting
+            if on_result:
+                on_result(index, result)
+            return result
+        
+        return list(await asyncio.gather(*(run(index, tool_call) for index, tool_call in enumerate(tool_calls))))
+    
+    def get_tool_timeout(self, tool_name: str) -> Optional[float]:
+        """Timeout for one call of a tool"""
+        return self.config.tool_timeouts.get(tool_name, self.config.tool_timeout)
+    
     def add_tool_call(self, tool_call: ToolCall) -> None:
         """Add tool call to history"""
         self.tool_history.append(tool_call)
@@ -252,22 +308,26 @@ class MemoryAgent(BaseAgent):
         """Retrieve information from long-term memory"""
         return self.long_term_memory.get(key)
     
-    async def summarize_conversation(self) -> str:
-        """Summarize recent conversation"""
-        if len(self.memory) < 3:
-            return ""
-        
+    async def summarize_messages(self, messages: List[AgentMessage], previous_summary: str = "") -> str:
+        """Fold messages into a running summary"""
         # Simple summarization - can be enhanced with LLM
-        recent_messages = self.get_memory_context(max_messages=10)
-        summary_points = []
+        summary_points = [previous_summary] if previous_summary else []
         
-        for msg in recent_messages[-5:]:  # Last 5 messages
+        for msg in messages:
             if msg.role == "user":
                 summary_points.append(f"User asked about: {msg.content[:100]}...")
             elif msg.role == "assistant":
                 summary_points.append(f"Assistant responded: {msg.content[:100]}...")
         
-        summary = " | ".join(summary_points)
+        return " | ".join(summary_points)
+    
+    async def summarize_conversation(self, session_id: Optional[str] = None) -> str:
+        """Summarize recent conversation"""
+        recent_messages = await self.get_memory_context(max_messages=10, session_id=session_id)
+        if len(recent_messages) < 3:
+            return ""
+        
+        summary = await self.summarize_messages(recent_messages[-5:])  # Last 5 messages
         self.conversation_summaries.append(summary)
         
         # Keep only recent summaries
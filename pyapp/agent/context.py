@@ -0,0 +1,184 @@
+"""
+Agent Layer - Context Window
+Token counting and token-budgeted chat history with rolling summaries
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Callable, Awaitable, Tuple
+
+from .base import AgentMessage
+from ..dao.base import TTLCache
+from ..conf import settings
+from ..logger import LOG_ERROR, LOG_DEBUG, LOG_WARNING
+
+
+# CJK characters are roughly one token each; other text about four characters per token
+_CJK = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+
+
+class TokenCounter:
+    """Counts tokens with tiktoken, or estimates them when the encoding is unavailable"""
+    
+    MESSAGE_OVERHEAD = 4  # role and separators per chat message
+    
+    def __init__(self, encoding_name: str = "cl100k_base", cache_size: int = 4096):
+        self._encoding = None
+        try:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding(encoding_name)
+        except Exception as e:
+            LOG_WARNING(f"Tokenizer {encoding_name} unavailable, estimating token counts: {e}")
+        # History is re-counted every turn, mostly the same strings
+        self.count = lru_cache(maxsize=cache_size)(self._count)
+    
+    def _count(self, text: str) -> int:
+        """Number of tokens in text"""
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return self.estimate(text)
+    
+    @staticmethod
+    def estimate(text: str) -> int:
+        """Approximate token count without tokenizing: one per CJK character, one per 4 others"""
+        cjk = len(_CJK.findall(text))
+        return cjk + math.ceil((len(text) - cjk) / 4)
+    
+    def count_message(self, message: AgentMessage) -> int:
+        """Number of tokens a message takes in a chat prompt"""
+        return self.count(message.content or "") + self.MESSAGE_OVERHEAD
+    
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text down to at most max_tokens tokens"""
+        if self.count(text) <= max_tokens:
+            return text
+        if self._encoding is not None:
+            return self._encoding.decode(self._encoding.encode(text, disallowed_special=())[:max_tokens])
+        
+        # Estimated counts: shrink proportionally until it fits
+        while text and self.count(text) > max_tokens:
+            text = text[:int(len(text) * max_tokens / self.count(text)) - 1]
+        return text
+
+
+_token_counter: Optional[TokenCounter] = None
+
+
+def get_token_counter() -> TokenCounter:
+    """Shared token counter"""
+    global _token_counter
+    if _token_counter is None:
+        _token_counter = TokenCounter(settings.context.tokenizer_encoding)
+    return _token_counter
+
+
+@dataclass
+class SessionSummary:
+    """Rolling summary of the messages that no longer fit the context window"""
+    text: str
+    covered_seq: Optional[int]  # seq of the newest summarized message
+
+
+class ContextWindowBuilder:
+    """
+    Assembles chat history within a token budget.
+    
+    Recent messages are kept verbatim. When they no longer fit, the oldest
+    ones are folded into a per-session rolling summary, enough of them that
+    the rest only fills summarize_ratio of the budget, so a summary is
+    produced every few turns rather than every turn. Summaries are cached
+    per session and extended incrementally with the newly folded messages.
+    """
+    
+    def __init__(
+        self,
+        summarize: Callable[[List[AgentMessage], str], Awaitable[str]],
+        token_budget: int = 3000,
+        summary_budget: int = 500,
+        summarize_ratio: float = 0.6,
+        counter: Optional[TokenCounter] = None,
+        max_sessions: int = 10000,
+        session_ttl: float = 3600.0
+    ):
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.summarize_ratio = summarize_ratio
+        self._counter = counter
+        self.summaries = TTLCache(max_size=max_sessions, ttl=session_ttl)
+    
+    @property
+    def counter(self) -> TokenCounter:
+        """Token counter, the shared one unless given"""
+        return self._counter or get_token_counter()
+    
+    async def build(self, session_id: str, history: List[AgentMessage]) -> List[AgentMessage]:
+        """Return the summary (if any) and the newest messages that fit the budget"""
+        summary: Optional[SessionSummary] = self.summaries.get(session_id)
+        pending = [
+            message for message in history
+            if summary is None or summary.covered_seq is None
+            or message.seq is None or message.seq > summary.covered_seq
+        ]
+        
+        summary_tokens = self.counter.count_message(self._summary_message(summary)) if summary else 0
+        if summary_tokens + self._count(pending) > self.token_budget:
+            summary, pending = await self._fold(session_id, summary, pending)
+        elif summary:
+            self.summaries.set(session_id, summary)
+        
+        if summary and summary.text:
+            return [self._summary_message(summary)] + pending
+        return pending
+    
+    async def _fold(
+        self,
+        session_id: str,
+        summary: Optional[SessionSummary],
+        pending: List[AgentMessage]
+    ) -> Tuple[Optional[SessionSummary], List[AgentMessage]]:
+        """Summarize the oldest pending messages until the rest fits the target"""
+        target = int((self.token_budget - self.summary_budget) * self.summarize_ratio)
+        keep, used = 0, 0
+        for message in reversed(pending):
+            used += self.counter.count_message(message)
+            if used > target:
+                break
+            keep += 1
+        
+        fold = pending[:len(pending) - keep]
+        kept = pending[len(pending) - keep:]
+        previous = summary.text if summary else ""
+        try:
+            text = await self.summarize(fold, previous)
+        except Exception as e:
+            # Keep the old summary and drop what did not fit
+            LOG_ERROR(f"Conversation summarization failed: {e}")
+            text = previous
+        
+        summary = SessionSummary(
+            text=self.counter.truncate(text, self.summary_budget),
+            covered_seq=max(
+                (message.seq for message in fold if message.seq is not None),
+                default=summary.covered_seq if summary else None
+            )
+        )
+        self.summaries.set(session_id, summary)
+        LOG_DEBUG(f"Folded {len(fold)} messages of session {session_id} into its summary")
+        return summary, kept
+    
+    def _count(self, messages: List[AgentMessage]) -> int:
+        """Tokens taken by messages"""
+        return sum(self.counter.count_message(message) for message in messages)
+    
+    def _summary_message(self, summary: SessionSummary) -> AgentMessage:
+        """Summary as a system message placed before the kept history"""
+        return AgentMessage(role="system", content=f"Summary of the earlier conversation: {summary.text}")
+    
+    def forget(self, session_id: str) -> None:
+        """Drop a session's summary"""
+        self.summaries.discard_if(lambda key: key == session_id)
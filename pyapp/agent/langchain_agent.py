@@ -4,7 +4,7 @@ Provides Langchain-based agent implementations
 """
 
 import asyncio
-from typing import Dict, List, Any, Optional, Union, AsyncIterator
+from typing import Dict, List, Any, Optional, Union, AsyncIterator, Tuple
 from datetime import datetime
 import json
 
@@ -16,21 +16,28 @@ from langchain_core.messages import (
     BaseMessage,
     ChatMessage
 )
+from langchain_core.agents import AgentAction, AgentFinish
 from langchain_core.tools import BaseTool
-from langchain_core.agents import AgentExecutor
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.outputs import ChatGeneration
 from langchain_core.runnables import RunnablePassthrough
 from langchain_openai import ChatOpenAI
-from langchain.agents import create_openai_tools_agent
+from langchain.agents.format_scratchpad.openai_tools import format_to_openai_tool_messages
+from langchain.agents.output_parsers.openai_tools import OpenAIToolsAgentOutputParser
+from langchain_community.tools.convert_to_openai import format_tool_to_openai_tool
 from langchain_community.callbacks import get_openai_callback
+from langchain_community.callbacks.openai_info import get_openai_token_cost_for_model
 
 from .base import (
-    BaseAgent, ToolAgent, AgentConfig, AgentMessage, AgentResponse, 
-    ToolCall, agent_registry
+    BaseAgent, ToolAgent, MemoryAgent, AgentConfig, AgentMessage, AgentResponse, 
+    AgentStreamEvent, ToolCall, agent_registry, DEFAULT_SESSION
 )
-from ..service import execute_mcp_tool
-from ..logger import LOG_INFO, LOG_ERROR, LOG_DEBUG
+from .context import ContextWindowBuilder, get_token_counter
+from .response_cache import create_response_cache
+from .tool_output import tool_output_shaper
+from ..service import execute_mcp_tool, ToolCatalog
+from ..logger import LOG_INFO, LOG_ERROR, LOG_DEBUG, LOG_WARNING
 from ..conf import settings
 
 
@@ -56,31 +63,187 @@ class LangchainTool(BaseTool):
         return asyncio.run(self._arun(**kwargs))
     
     async def _arun(self, **kwargs) -> str:
-        """Run the tool asynchronously"""
-        try:
-            result = await self._mcp_service.execute_tool(self._tool_name, kwargs)
-            if result.success:
-                return json.dumps(result.data, ensure_ascii=False, indent=2)
+        """Run the tool asynchronously, raising when the tool fails"""
+        result = await self._mcp_service.execute_tool(self._tool_name, kwargs)
+        if not result.success:
+            # The executor reports the failure and hands the LLM an "Error:" observation
+            raise RuntimeError(result.message)
+        return tool_output_shaper.shape(self._tool_name, result.data)
+
+
+class ParallelAgentExecutor:
+    """
+    Agent loop that runs all tool calls of one LLM step concurrently.
+    
+    Replaces AgentExecutor for the OpenAI tools agent: the model may answer
+    with several tool calls at once, which are dispatched together through
+    ToolAgent.execute_tools (bounded concurrency, per-tool timeouts) and fed
+    back in call order, so a step costs its slowest tool, not the sum.
+    astream() yields tokens and tool events as they happen; ainvoke() runs
+    the same loop without token streaming. Streamed completions carry no
+    usage, so astream() estimates the token counts of its LLM calls.
+    """
+    
+    STOPPED_OUTPUT = "Agent stopped due to iteration limit."
+    
+    def __init__(
+        self,
+        llm: ChatOpenAI,
+        tools: List[BaseTool],
+        prompt: ChatPromptTemplate,
+        tool_agent: ToolAgent,
+        max_iterations: int = 10
+    ):
+        # Own name -> tool map, so a catalog reload cannot pull tools from under a running loop
+        self.tools = {tool.name: tool for tool in tools}
+        tool_schemas = [format_tool_to_openai_tool(tool) for tool in tools]
+        self.llm = llm.bind(tools=tool_schemas) if tools else llm
+        self.token_counter = get_token_counter()
+        # The tool schemas are sent with every LLM call
+        self.tool_schema_tokens = self.token_counter.count(json.dumps(tool_schemas, ensure_ascii=False)) if tools else 0
+        self.prompt = prompt
+        self.output_parser = OpenAIToolsAgentOutputParser()
+        self.tool_agent = tool_agent
+        self.max_iterations = max_iterations
+    
+    async def ainvoke(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the agent and return its output and intermediate steps"""
+        async for event in self.astream(inputs, stream_tokens=False):
+            if event.event == "final":
+                return event.data
+    
+    async def astream(
+        self,
+        inputs: Dict[str, Any],
+        stream_tokens: bool = True
+    ) -> AsyncIterator[AgentStreamEvent]:
+        """Run the agent until it answers or the iteration limit is hit"""
+        intermediate_steps: List[Tuple[AgentAction, str]] = []
+        usage = {"prompt_tokens": 0, "completion_tokens": 0}
+        tool_failures = 0
+        
+        for iteration in range(self.max_iterations):
+            messages = await self.prompt.ainvoke({
+                **inputs,
+                "agent_scratchpad": format_to_openai_tool_messages(intermediate_steps)
+            })
+            
+            if stream_tokens:
+                message = None
+                async for chunk in self.llm.astream(messages):
+                    # Chunks add up to the full message, tool call arguments included
+                    message = chunk if message is None else message + chunk
+                    if chunk.content:
+                        yield AgentStreamEvent("token", {"content": chunk.content})
+                usage["prompt_tokens"] += self.tool_schema_tokens + sum(
+                    self._count_tokens(prompt_message) + self.token_counter.MESSAGE_OVERHEAD
+                    for prompt_message in messages.to_messages()
+                )
+                usage["completion_tokens"] += self._count_tokens(message)
             else:
-                return f"Error: {result.message}"
-        except Exception as e:
-            return f"Tool execution failed: {str(e)}"
+                message = await self.llm.ainvoke(messages)
+            
+            output = self.output_parser.parse_result([ChatGeneration(message=message)])
+            if isinstance(output, AgentFinish):
+                yield AgentStreamEvent("final", {
+                    "output": output.return_values.get("output", ""),
+                    "intermediate_steps": intermediate_steps,
+                    "estimated_usage": usage if stream_tokens else None,
+                    "finished": True,
+                    "tool_failures": tool_failures
+                })
+                return
+            
+            actions = output if isinstance(output, list) else [output]
+            LOG_DEBUG(f"Agent step {iteration + 1}: {[action.tool for action in actions]}")
+            tool_calls = self._to_tool_calls(actions)
+            for tool_call in tool_calls:
+                yield AgentStreamEvent("tool_start", {
+                    "call_id": tool_call.call_id,
+                    "tool_name": tool_call.tool_name,
+                    "parameters": tool_call.parameters
+                })
+            
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            finished: asyncio.Queue = asyncio.Queue()
+            task = asyncio.ensure_future(self.tool_agent.execute_tools(
+                tool_calls,
+                on_result=lambda index, result: finished.put_nowait((index, result)),
+                tools=self.tools
+            ))
+            try:
+                for _ in tool_calls:
+                    index, result = await finished.get()
+                    yield AgentStreamEvent("tool_end", {
+                        "call_id": tool_calls[index].call_id,
+                        "tool_name": tool_calls[index].tool_name,
+                        "success": result.success,
+                        "message": None if result.success else result.message,
+                        "elapsed": round(loop.time() - started, 3)
+                    })
+                results = await task
+            finally:
+                # Stops the tools when the consumer goes away mid-step
+                task.cancel()
+            
+            tool_failures += sum(not result.success for result in results)
+            intermediate_steps.extend(zip(actions, (
+                str(result.data) if result.success else f"Error: {result.message}"
+                for result in results
+            )))
+        
+        LOG_WARNING(f"Agent {self.tool_agent.config.agent_name} hit {self.max_iterations} iterations")
+        yield AgentStreamEvent("final", {
+            "output": self.STOPPED_OUTPUT,
+            "intermediate_steps": intermediate_steps,
+            "estimated_usage": usage if stream_tokens else None,
+            "finished": False,
+            "tool_failures": tool_failures
+        })
+    
+    def _count_tokens(self, message: BaseMessage) -> int:
+        """Estimated number of tokens of a message's content and tool calls"""
+        tool_calls = message.additional_kwargs.get("tool_calls")
+        return self.token_counter.count(str(message.content or "")) + (
+            self.token_counter.count(json.dumps(tool_calls, ensure_ascii=False)) if tool_calls else 0
+        )
+    
+    def _to_tool_calls(self, actions: List[AgentAction]) -> List[ToolCall]:
+        """Convert the actions of one step to tool calls"""
+        return [
+            ToolCall(
+                tool_name=action.tool,
+                parameters=action.tool_input if isinstance(action.tool_input, dict) else {"input": action.tool_input},
+                call_id=getattr(action, 'tool_call_id', None)
+            )
+            for action in actions
+        ]
 
 
-class LangchainAgent(ToolAgent):
+class LangchainAgent(ToolAgent, MemoryAgent):
     """Langchain-based agent implementation"""
     
     def __init__(self, config: AgentConfig):
         super().__init__(config)
         self.llm: Optional[ChatOpenAI] = None
-        self.agent_executor: Optional[AgentExecutor] = None
+        self.agent_executor: Optional[ParallelAgentExecutor] = None
         self.prompt_template: Optional[ChatPromptTemplate] = None
+        self.context_builder = ContextWindowBuilder(
+            summarize=self.summarize_messages,
+            token_budget=settings.context.history_token_budget,
+            summary_budget=settings.context.summary_token_budget,
+            summarize_ratio=settings.context.summarize_ratio,
+            max_sessions=settings.memory.max_sessions,
+            session_ttl=settings.memory.session_ttl
+        )
+        self.response_cache = create_response_cache()
+        self.catalog_version = 0  # tool catalog version the executor was built from
     
     async def _on_initialize(self) -> None:
         """Initialize Langchain agent"""
         await self._initialize_llm()
         await self._initialize_prompt()
-        await self._initialize_agent_executor()
         await self._load_tools()
     
     async def _on_shutdown(self) -> None:
@@ -88,6 +251,7 @@ class LangchainAgent(ToolAgent):
         self.llm = None
         self.agent_executor = None
         self.prompt_template = None
+        self.catalog_version = 0
     
     async def _initialize_llm(self) -> None:
         """Initialize LLM"""
@@ -122,79 +286,86 @@ class LangchainAgent(ToolAgent):
             LOG_ERROR(f"Failed to initialize prompt template: {e}")
             raise
     
-    async def _initialize_agent_executor(self) -> None:
-        """Initialize agent executor"""
+    async def _load_tools(self) -> None:
+        """Load MCP tools as Langchain tools"""
+        from ..service import mcp_service
+        
+        # One snapshot of the catalog, one executor
+        self._build_agent_executor(mcp_service.get_catalog())
+    
+    def _build_agent_executor(self, catalog: ToolCatalog) -> None:
+        """Create the agent executor with the tools of a catalog snapshot"""
         try:
             if not self.llm or not self.prompt_template:
                 raise RuntimeError("LLM and prompt template must be initialized first")
             
-            # Tools will be added later
-            tools = []
+            from ..service import mcp_service
+            
+            langchain_tools = [
+                LangchainTool(tool_name=spec.name, description=spec.description, mcp_service=mcp_service)
+                for spec in catalog.tools.values()
+            ]
             
-            # Create agent
-            agent = create_openai_tools_agent(self.llm, tools, self.prompt_template)
+            # Drop tools the catalog no longer has
+            for tool_name in list(self.tools):
+                if tool_name not in catalog.tools:
+                    self.unregister_tool(tool_name)
+            for langchain_tool in langchain_tools:
+                self.register_tool(langchain_tool.name, langchain_tool)
             
-            # Create agent executor
-            self.agent_executor = AgentExecutor(
-                agent=agent,
-                tools=tools,
-                verbose=True,
-                return_intermediate_steps=True,
-                max_iterations=10,
-                early_stopping_method="generate"
+            # Runs already in progress keep the executor, and its tools, they started with
+            self.agent_executor = ParallelAgentExecutor(
+                llm=self.llm,
+                tools=langchain_tools,
+                prompt=self.prompt_template,
+                tool_agent=self,
+                max_iterations=self.config.max_iterations
             )
+            self.catalog_version = catalog.version
             
-            LOG_DEBUG("Agent executor initialized")
+            LOG_INFO(f"Loaded {len(langchain_tools)} tools into agent (catalog v{catalog.version})")
         except Exception as e:
             LOG_ERROR(f"Failed to initialize agent executor: {e}")
             raise
     
-    async def _load_tools(self) -> None:
-        """Load MCP tools as Langchain tools"""
-        try:
-            from ..service import mcp_service
-            
-            # Get available tools from MCP service
-            available_tools = await mcp_service.list_available_tools()
-            
-            langchain_tools = []
-            for tool_name in available_tools:
-                # Get tool info
-                tool_info = await mcp_service.get_tool_info(tool_name)
-                if tool_info:
-                    description = tool_info.get('description', f'MCP tool: {tool_name}')
-                    
-                    # Create Langchain tool wrapper
-                    langchain_tool = LangchainTool(
-                        tool_name=tool_name,
-                        description=description,
-                        mcp_service=mcp_service
-                    )
-                    langchain_tools.append(langchain_tool)
-                    
-                    # Register tool with agent
-                    self.register_tool(tool_name, langchain_tool)
-            
-            # Update agent executor with tools
-            if self.agent_executor and langchain_tools:
-                # Recreate agent with tools
-                agent = create_openai_tools_agent(self.llm, langchain_tools, self.prompt_template)
-                self.agent_executor = AgentExecutor(
-                    agent=agent,
-                    tools=langchain_tools,
-                    verbose=True,
-                    return_intermediate_steps=True,
-                    max_iterations=10,
-                    early_stopping_method="generate"
-                )
-                
-                LOG_INFO(f"Loaded {len(langchain_tools)} tools into agent")
-            
-        except Exception as e:
-            LOG_ERROR(f"Failed to load tools: {e}")
+    def _sync_tools(self) -> None:
+        """Rebuild the executor if the tool catalog was reloaded"""
+        from ..service import mcp_service
+        
+        catalog = mcp_service.get_catalog()
+        if catalog.version != self.catalog_version:
+            self._build_agent_executor(catalog)
     
     def _get_default_system_prompt(self) -> str:
-        """Get default system prompt"""
+        """Get default system prompt, with the table catalog when loaded"""
+        from ..service import schema_catalog
+        
+        prompt = self._get_base_system_prompt()
+        if schema_catalog.is_loaded():
+            tables = self._fit_table_catalog(schema_catalog.describe_tables(), settings.context.catalog_token_budget)
+            # Braces would be read as prompt template variables
+            tables = tables.replace("{", "{{").replace("}", "}}")
+            prompt += "\n\n# 数据表目录（索引名称：中文描述）\n" + tables
+        return prompt
+    
+    def _fit_table_catalog(self, tables: str, max_tokens: int) -> str:
+        """Keep whole table lines up to max_tokens, pointing the LLM at the lookup tool for the rest"""
+        counter = self.context_builder.counter
+        if counter.count(tables) <= max_tokens:
+            return tables
+        
+        lines = tables.split("\n")
+        kept, used = [], 0
+        for line in lines:
+            used += counter.count(line) + 1
+            if used > max_tokens:
+                break
+            kept.append(line)
+        kept.append(f"……（共{len(lines)}张表，其余{len(lines) - len(kept)}张请调用list_security_tables工具查找）")
+        return "\n".join(kept)
+    
+    def _get_base_system_prompt(self) -> str:
+        """Get the static part of the default system prompt"""
         return """你是一个超级助理，回答问题的时候，你可以先查询MCP工具，再根据用户提问，尽可能的使用工具来回答问题。
 
 注意：不要思考过程<no_think></no_think>
@@ -211,18 +382,17 @@ class LangchainAgent(ToolAgent):
 4.再根据字段名称匹配，去表中查询数据
 
 # 数据来源
-以下数据源，数据均来自Elasticsearch，数据表结构在mysql数据库的security_table_define表和security_tablecolumn_define表中。
+以下数据源，数据均来自Elasticsearch，数据表结构已缓存在数据表目录中，不需要查询mysql数据库。
 
 查询方法：
-1.可以查询security_table_define得到索引名称和描述，其中ID就是表ID，TableName就是索引名称，TableCnName就是表名的中文描述
-2.可以根据表ID查询security_tablecolumn_define得到字段名和描述，其中tableid就是表ID，ColName就是列名称，ColCnName就是列的中文描述
-3.security_table_define.id=security_tablecolumn_define.table_id
+1.根据数据表目录确定索引名称，也可以调用list_security_tables工具按关键字查找索引名称和中文描述
+2.调用describe_security_table工具（参数为表ID、索引名称或中文名称）得到字段名、中文描述和字段类型
 
 # 规则：
 1.对于一个人的描述有姓名，身份证，视频身份VID。一般身份证是18位数字或者17位数字加最后一位X，全部汉字的是姓名，其他描述一般都是视频身份VID编号。
 2.查询人物轨迹的时候，仔细分析语句中的参数部分，先获取时间，地点，再按照头部特征，上身穿着和颜色，下身穿着和颜色，鞋子穿着和颜色，性别，年龄段分析指令中的参数。
 3.对于车辆，注意车辆颜色和车牌颜色的区分"""
-    
+
     def _convert_to_langchain_messages(self, messages: List[AgentMessage]) -> List[BaseMessage]:
         """Convert agent messages to Langchain messages"""
         langchain_messages = []
@@ -250,71 +420,167 @@ class LangchainAgent(ToolAgent):
             timestamp=datetime.now()
         )
     
+    async def summarize_messages(self, messages: List[AgentMessage], previous_summary: str = "") -> str:
+        """Fold messages into a running summary with the LLM"""
+        if not self.llm:
+            return await super().summarize_messages(messages, previous_summary)
+        
+        counter = self.context_builder.counter
+        transcript = counter.truncate(
+            "\n".join(f"{msg.role}: {msg.content}" for msg in messages),
+            settings.context.history_token_budget
+        )
+        result = await self.llm.ainvoke([
+            SystemMessage(content=(
+                "你负责压缩对话历史。请把已有摘要和新增对话合并成一段简洁的摘要，"
+                "保留用户的查询目标、涉及的姓名、证件号、车牌、时间、地点等关键参数和已得到的结论，"
+                f"不要编造内容，不超过{settings.context.summary_token_budget}字。"
+            )),
+            HumanMessage(content=f"已有摘要：{previous_summary or '无'}\n\n新增对话：\n{transcript}")
+        ])
+        return str(result.content).strip()
+    
+    async def clear_memory(self, session_id: Optional[str] = None) -> None:
+        """Clear session memory and its rolling summary"""
+        await super().clear_memory(session_id)
+        if session_id:
+            self.context_builder.forget(session_id)
+        else:
+            self.context_builder.summaries.clear()
+    
+    async def _prepare_inputs(self, message: str, session_id: Optional[str]) -> Dict[str, Any]:
+        """Build executor inputs from session memory and record the user message"""
+        # Get memory context, older turns summarized to fit the token budget
+        history = await self.get_memory_context(max_messages=settings.memory.max_messages, session_id=session_id)
+        memory_context = await self.context_builder.build(session_id or DEFAULT_SESSION, history)
+        langchain_history = self._convert_to_langchain_messages(memory_context)
+        
+        # Add current message to memory
+        user_message = AgentMessage(
+            role="user",
+            content=message,
+            timestamp=datetime.now()
+        )
+        await self.add_to_memory(user_message, session_id)
+        
+        return {
+            "input": message,
+            "chat_history": langchain_history
+        }
+    
+    async def _build_response(
+        self,
+        result: Dict[str, Any],
+        cb: Any,
+        session_id: Optional[str]
+    ) -> Tuple[AgentResponse, bool]:
+        """Record an executor result in memory and convert it to a response, with whether it may be cached"""
+        # Extract response
+        response_content = result.get("output", "")
+        intermediate_steps = result.get("intermediate_steps", [])
+        
+        # Process tool calls
+        tool_calls = []
+        for step in intermediate_steps:
+            if len(step) >= 2:
+                action, observation = step
+                if hasattr(action, 'tool') and hasattr(action, 'tool_input'):
+                    tool_call = ToolCall(
+                        tool_name=action.tool,
+                        parameters=action.tool_input
+                    )
+                    tool_calls.append(tool_call)
+                    self.add_tool_call(tool_call)
+        
+        # Create assistant message
+        assistant_message = AgentMessage(
+            role="assistant",
+            content=response_content,
+            timestamp=datetime.now()
+        )
+        await self.add_to_memory(assistant_message, session_id)
+        
+        usage_stats = {
+            "total_tokens": cb.total_tokens,
+            "prompt_tokens": cb.prompt_tokens,
+            "completion_tokens": cb.completion_tokens,
+            "total_cost": cb.total_cost
+        }
+        estimated_usage = result.get("estimated_usage")
+        if not cb.total_tokens and estimated_usage:
+            # Streamed completions report no usage to the callback
+            usage_stats = self._estimated_usage_stats(**estimated_usage)
+        
+        response = AgentResponse(
+            message=assistant_message,
+            tool_calls=tool_calls,
+            usage_stats=usage_stats
+        )
+        # Answers cut off by the iteration limit or built on failed tools are not reused
+        cacheable = result.get("finished", False) and not result.get("tool_failures", 0)
+        return response, cacheable
+    
+    def _estimated_usage_stats(self, prompt_tokens: int, completion_tokens: int) -> Dict[str, Any]:
+        """Usage stats from estimated token counts"""
+        try:
+            total_cost = (
+                get_openai_token_cost_for_model(self.config.model_name, prompt_tokens)
+                + get_openai_token_cost_for_model(self.config.model_name, completion_tokens, is_completion=True)
+            )
+        except ValueError:
+            total_cost = 0.0  # no price known for the model
+        
+        return {
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_cost": total_cost,
+            "estimated": True
+        }
+    
+    async def _cached_response(self, message: str, session_id: Optional[str]) -> Optional[AgentResponse]:
+        """Answer from the response cache, recording the turn in session memory"""
+        if not self.response_cache:
+            return None
+        
+        response = self.response_cache.lookup(message)
+        if response is None:
+            return None
+        
+        LOG_INFO(f"Answered from response cache ({response.usage_stats['cache']} match)")
+        now = datetime.now()
+        response.message.timestamp = now
+        await self.add_to_memory(AgentMessage(role="user", content=message, timestamp=now), session_id)
+        await self.add_to_memory(response.message, session_id)
+        return response
+    
     async def process_message(
         self,
         message: str,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None
     ) -> AgentResponse:
         """Process a user message and return response"""
         if not self.agent_executor:
             raise RuntimeError("Agent not initialized")
         
         try:
-            # Get memory context
-            memory_context = self.get_memory_context()
-            langchain_history = self._convert_to_langchain_messages(memory_context)
+            self._sync_tools()
+            cached = await self._cached_response(message, session_id)
+            if cached:
+                return cached
             
-            # Add current message to memory
-            user_message = AgentMessage(
-                role="user",
-                content=message,
-                timestamp=datetime.now()
-            )
-            self.add_to_memory(user_message)
+            inputs = await self._prepare_inputs(message, session_id)
             
             # Execute agent
             with get_openai_callback() as cb:
-                result = await self.agent_executor.ainvoke({
-                    "input": message,
-                    "chat_history": langchain_history
-                })
-                
-                # Extract response
-                response_content = result.get("output", "")
-                intermediate_steps = result.get("intermediate_steps", [])
-                
-                # Process tool calls
-                tool_calls = []
-                for step in intermediate_steps:
-                    if len(step) >= 2:
-                        action, observation = step
-                        if hasattr(action, 'tool') and hasattr(action, 'tool_input'):
-                            tool_call = ToolCall(
-                                tool_name=action.tool,
-                                parameters=action.tool_input
-                            )
-                            tool_calls.append(tool_call)
-                            self.add_tool_call(tool_call)
-                
-                # Create assistant message
-                assistant_message = AgentMessage(
-                    role="assistant",
-                    content=response_content,
-                    timestamp=datetime.now()
-                )
-                self.add_to_memory(assistant_message)
-                
-                return AgentResponse(
-                    message=assistant_message,
-                    tool_calls=tool_calls,
-                    usage_stats={
-                        "total_tokens": cb.total_tokens,
-                        "prompt_tokens": cb.prompt_tokens,
-                        "completion_tokens": cb.completion_tokens,
-                        "total_cost": cb.total_cost
-                    }
-                )
-                
+                result = await self.agent_executor.ainvoke(inputs)
+                response, cacheable = await self._build_response(result, cb, session_id)
+            
+            if self.response_cache and cacheable:
+                self.response_cache.store(message, response)
+            return response
+        
         except Exception as e:
             LOG_ERROR(f"Message processing failed: {e}")
             raise
@@ -322,13 +588,36 @@ class LangchainAgent(ToolAgent):
     async def process_message_stream(
         self,
         message: str,
-        context: Optional[Dict[str, Any]] = None
-    ) -> AsyncIterator[AgentResponse]:
-        """Process a user message and return streaming response"""
-        # For now, return non-streaming response
-        # In a real implementation, this would use streaming capabilities
-        response = await self.process_message(message, context)
-        yield response
+        context: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[AgentStreamEvent]:
+        """Process a user message, yielding tokens and tool events as they happen"""
+        if not self.agent_executor:
+            raise RuntimeError("Agent not initialized")
+        
+        try:
+            self._sync_tools()
+            cached = await self._cached_response(message, session_id)
+            if cached:
+                yield AgentStreamEvent("final", dict(cached.usage_stats), response=cached)
+                return
+            
+            inputs = await self._prepare_inputs(message, session_id)
+            
+            with get_openai_callback() as cb:
+                async for event in self.agent_executor.astream(inputs):
+                    if event.event != "final":
+                        yield event
+                        continue
+                    
+                    response, cacheable = await self._build_response(event.data, cb, session_id)
+                    if self.response_cache and cacheable:
+                        self.response_cache.store(message, response)
+                    yield AgentStreamEvent("final", dict(response.usage_stats), response=response)
+        
+        except Exception as e:
+            LOG_ERROR(f"Streaming message processing failed: {e}")
+            raise
 
 
 class DataAnalysisAgent(LangchainAgent):
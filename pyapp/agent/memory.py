@@ -0,0 +1,163 @@
+"""
+Agent Layer - Session Memory
+Per-session conversation history, in process or shared through Redis
+"""
+
+import itertools
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Any, Optional
+
+import orjson
+
+from .base import AgentMessage
+from ..dao.base import TTLCache
+from ..conf import settings
+from ..logger import LOG_ERROR, LOG_WARNING
+
+
+class SessionMemoryStore:
+    """
+    Conversation history keyed by session ID.
+    
+    Each session keeps its last max_messages messages in a bounded deque.
+    Sessions idle for session_ttl seconds, or beyond max_sessions (least
+    recently used first), are evicted, so memory follows active sessions.
+    With a Redis client, history is kept in one Redis list per session so
+    any worker can continue a conversation; the local tier then serves only
+    as a fallback while Redis is unreachable.
+    """
+    
+    def __init__(
+        self,
+        namespace: str,
+        max_messages: int = 50,
+        max_sessions: int = 10000,
+        session_ttl: float = 3600.0,
+        redis_client: Any = None,
+        key_prefix: str = "pyapp:session:"
+    ):
+        self.namespace = namespace
+        self.max_messages = max_messages
+        self.session_ttl = session_ttl
+        self.local = TTLCache(max_size=max_sessions, ttl=session_ttl)
+        self.redis = redis_client
+        self.key_prefix = key_prefix
+        self._seq = itertools.count(1)
+    
+    @property
+    def seq_key(self) -> str:
+        """Redis counter numbering the messages of all sessions in order"""
+        return f"{self.key_prefix}{self.namespace}:seq"
+    
+    def _redis_key(self, session_id: str) -> str:
+        """Redis list holding a session's history"""
+        return f"{self.key_prefix}{self.namespace}:{session_id}"
+    
+    def _local_session(self, session_id: str, create: bool = True) -> Optional[Deque[AgentMessage]]:
+        """Get (or create) a session's local history and mark it active"""
+        self.local.purge_expired()
+        messages = self.local.get(session_id)
+        if messages is None:
+            if not create:
+                return None
+            messages = deque(maxlen=self.max_messages)
+        # Re-set on every access: sliding expiry and LRU order
+        self.local.set(session_id, messages)
+        return messages
+    
+    async def append(self, session_id: str, message: AgentMessage) -> None:
+        """Add a message to a session's history, numbering it after every earlier one"""
+        if not message.timestamp:
+            message.timestamp = datetime.now()
+        # Timestamps can tie; the sequence number orders messages strictly
+        message.seq = next(self._seq)
+        self._local_session(session_id).append(message)
+        
+        if not self.redis:
+            return
+        
+        key = self._redis_key(session_id)
+        try:
+            # Shared by all workers, so any of them can continue the numbering
+            message.seq = await self.redis.incr(self.seq_key)
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.rpush(key, self._dump(message))
+                pipe.ltrim(key, -self.max_messages, -1)
+                pipe.expire(key, max(int(self.session_ttl), 1))
+                await pipe.execute()
+        except Exception as e:
+            LOG_WARNING(f"Redis session write failed, keeping history locally: {e}")
+    
+    async def get_messages(self, session_id: str, max_messages: Optional[int] = None) -> List[AgentMessage]:
+        """Get the most recent messages of a session, oldest first"""
+        count = min(max_messages or self.max_messages, self.max_messages)
+        
+        if self.redis:
+            try:
+                raw = await self.redis.lrange(self._redis_key(session_id), -count, -1)
+                return [self._load(item) for item in raw]
+            except Exception as e:
+                LOG_WARNING(f"Redis session read failed, using local history: {e}")
+        
+        messages = self._local_session(session_id, create=False)
+        return list(messages)[-count:] if messages else []
+    
+    async def clear(self, session_id: str) -> None:
+        """Forget a session"""
+        self.local.discard_if(lambda key: key == session_id)
+        if self.redis:
+            try:
+                await self.redis.delete(self._redis_key(session_id))
+            except Exception as e:
+                LOG_ERROR(f"Failed to clear Redis session {session_id}: {e}")
+    
+    def clear_local(self) -> None:
+        """Forget every session held in process"""
+        self.local.clear()
+    
+    def active_sessions(self) -> int:
+        """Number of sessions held in process"""
+        self.local.purge_expired()
+        return len(self.local)
+    
+    @staticmethod
+    def _dump(message: AgentMessage) -> bytes:
+        """Serialize a message for Redis"""
+        return orjson.dumps({
+            'role': message.role,
+            'content': message.content,
+            'metadata': message.metadata,
+            'timestamp': message.timestamp.isoformat() if message.timestamp else None,
+            'seq': message.seq
+        }, default=str)
+    
+    @staticmethod
+    def _load(raw: bytes) -> AgentMessage:
+        """Deserialize a message read from Redis"""
+        data = orjson.loads(raw)
+        return AgentMessage(
+            role=data['role'],
+            content=data['content'],
+            metadata=data.get('metadata'),
+            timestamp=datetime.fromisoformat(data['timestamp']) if data.get('timestamp') else None,
+            seq=data.get('seq')
+        )
+
+
+def create_session_store(namespace: str) -> SessionMemoryStore:
+    """Create a session memory store from settings"""
+    from ..service.cache import redis_holder
+    
+    redis_client = redis_holder.get_client() if settings.memory.backend == "redis" else None
+    if settings.memory.backend == "redis" and redis_client is None:
+        LOG_WARNING("Session memory backend is redis but Redis is not configured, using local memory")
+    
+    return SessionMemoryStore(
+        namespace=namespace,
+        max_messages=settings.memory.max_messages,
+        max_sessions=settings.memory.max_sessions,
+        session_ttl=settings.memory.session_ttl,
+        redis_client=redis_client,
+        key_prefix=settings.memory.key_prefix
+    )
@@ -0,0 +1,303 @@
+"""
+Agent Layer - Response Cache
+Reuses agent answers for repeated and paraphrased questions
+"""
+
+import hashlib
+import re
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Dict, List, Any, Optional, Tuple, FrozenSet
+
+import numpy as np
+
+from .base import AgentResponse
+from ..conf import settings
+from ..logger import LOG_DEBUG
+
+
+# Punctuation, symbols and whitespace carry no meaning for matching
+_NOISE = re.compile(r'[\s\W_]+', re.UNICODE)
+# ID card numbers, plates, dates and other literal values
+_LITERAL = re.compile(r'[0-9a-z]+')
+# Question words and particles that do not change what is asked
+DEFAULT_FILLER = "的了吗呢吧啊呀么请问帮我你给查询找看一下些哪什有没是否都过"
+
+
+def normalize_question(text: str) -> str:
+    """Canonical form of a question for exact matching"""
+    return _NOISE.sub("", unicodedata.normalize("NFKC", text).lower())
+
+
+class HashingEmbedder:
+    """
+    Local text embedding from hashed character n-grams.
+    
+    Needs no model download or service; character n-grams suit Chinese
+    text, where word boundaries are not marked.
+    """
+    
+    def __init__(self, dim: int = 1024, ngram_range: Tuple[int, int] = (1, 3)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+    
+    def embed(self, text: str) -> np.ndarray:
+        """L2-normalized embedding of normalized text"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(text) - n + 1):
+                digest = zlib.crc32(text[i:i + n].encode("utf-8"))
+                # Sign bit halves the bias of hash collisions
+                vector[digest % self.dim] += 1.0 if digest & 0x80000000 else -1.0
+        
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class VectorIndex:
+    """In-process cosine similarity index over normalized vectors"""
+    
+    def __init__(self, dim: int, capacity: int = 256):
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._keys: List[str] = []
+        self._positions: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    def add(self, key: str, vector: np.ndarray) -> None:
+        """Add or replace a vector"""
+        position = self._positions.get(key)
+        if position is None:
+            position = len(self._keys)
+            if position == len(self._vectors):
+                self._vectors = np.concatenate([self._vectors, np.zeros_like(self._vectors)])
+            self._keys.append(key)
+            self._positions[key] = position
+        self._vectors[position] = vector
+    
+    def remove(self, key: str) -> None:
+        """Remove a vector, moving the last one into its slot"""
+        position = self._positions.pop(key, None)
+        if position is None:
+            return
+        
+        last = len(self._keys) - 1
+        if position != last:
+            moved = self._keys[last]
+            self._vectors[position] = self._vectors[last]
+            self._keys[position] = moved
+            self._positions[moved] = position
+        self._keys.pop()
+    
+    def search(self, vector: np.ndarray, k: int = 5) -> List[Tuple[str, float]]:
+        """The k most similar keys with their cosine similarity"""
+        count = len(self._keys)
+        if not count:
+            return []
+        
+        scores = self._vectors[:count] @ vector
+        k = min(k, count)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(self._keys[i], float(scores[i])) for i in best]
+
+
+@dataclass
+class CachedResponse:
+    """A cached agent answer"""
+    response: AgentResponse
+    literals: FrozenSet[str]  # literal values the question asked about
+    terms: FrozenSet[str]  # content characters of the question
+    created_at: float
+    data_version: int
+
+
+@dataclass
+class ResponseCacheMetrics:
+    """Response cache hit/miss counters"""
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    stale: int = 0  # matches dropped by TTL or a data change
+    skipped: int = 0  # questions that depend on the conversation
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert metrics to a plain dict"""
+        return {
+            'exact_hits': self.exact_hits,
+            'semantic_hits': self.semantic_hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'skipped': self.skipped
+        }
+
+
+class ResponseCache:
+    """
+    Answer cache in front of an agent.
+    
+    Questions are matched exactly by the hash of their normalized text, then
+    as paraphrases. The vector search only picks candidates above
+    similarity_threshold; a candidate matches when it names the same literal
+    values (ID card numbers, plates, dates) and differs in at most
+    max_term_diff content characters once question words are ignored. Hits
+    are therefore near-exact: reworded question words, or (by default) one
+    added or dropped character such as 住过 / 入住过, while a question about
+    another person or place is never answered from the cache. Entries expire after ttl seconds or as soon as
+    any data service records a write. Questions that refer back to the
+    conversation are neither cached nor answered from the cache, and the
+    agent only stores answers of runs that finished with every tool
+    succeeding.
+    """
+    
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        max_entries: int = 2048,
+        similarity_threshold: float = 0.6,
+        max_term_diff: int = 1,
+        context_markers: Optional[List[str]] = None,
+        filler: str = DEFAULT_FILLER,
+        embedder: Optional[HashingEmbedder] = None
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.max_term_diff = max_term_diff
+        self.context_markers = context_markers or []
+        self.filler = frozenset(filler)
+        self.embedder = embedder or HashingEmbedder()
+        self.index = VectorIndex(self.embedder.dim)
+        self.metrics = ResponseCacheMetrics()
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+    
+    def lookup(self, question: str) -> Optional[AgentResponse]:
+        """Cached response for a question, with zero usage, or None"""
+        normalized = normalize_question(question)
+        if not self._cacheable(normalized):
+            self.metrics.skipped += 1
+            return None
+        
+        key = self._key(normalized)
+        entry = self._fresh(key)
+        if entry is not None:
+            self.metrics.exact_hits += 1
+            return self._hit(key, entry, "exact")
+        
+        literals, terms = self._literals(normalized), self._terms(normalized)
+        for candidate, score in self.index.search(self._embed(normalized)):
+            if score < self.similarity_threshold:
+                break
+            entry = self._fresh(candidate)
+            if entry is not None and entry.literals == literals and len(entry.terms ^ terms) <= self.max_term_diff:
+                self.metrics.semantic_hits += 1
+                LOG_DEBUG(f"Semantic response cache hit ({score:.3f}): {question}")
+                return self._hit(candidate, entry, "semantic")
+        
+        self.metrics.misses += 1
+        return None
+    
+    def store(self, question: str, response: AgentResponse) -> None:
+        """Cache the response to a question"""
+        normalized = normalize_question(question)
+        if not self._cacheable(normalized) or not response.message.content:
+            return
+        
+        key = self._key(normalized)
+        self._entries[key] = CachedResponse(
+            response=response,
+            literals=self._literals(normalized),
+            terms=self._terms(normalized),
+            created_at=time.monotonic(),
+            data_version=self._data_version()
+        )
+        self._entries.move_to_end(key)
+        self.index.add(key, self._embed(normalized))
+        
+        while len(self._entries) > self.max_entries:
+            oldest, _ = self._entries.popitem(last=False)
+            self.index.remove(oldest)
+    
+    def clear(self) -> None:
+        """Drop all cached responses"""
+        for key in list(self._entries):
+            self._drop(key)
+    
+    def _cacheable(self, normalized: str) -> bool:
+        """Check that a question stands on its own"""
+        return bool(normalized) and not any(marker in normalized for marker in self.context_markers)
+    
+    def _fresh(self, key: str) -> Optional[CachedResponse]:
+        """Entry for key if it is within its TTL and no data changed since"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        if time.monotonic() - entry.created_at > self.ttl or entry.data_version != self._data_version():
+            self.metrics.stale += 1
+            self._drop(key)
+            return None
+        return entry
+    
+    def _hit(self, key: str, entry: CachedResponse, match: str) -> AgentResponse:
+        """Copy of a cached response reporting no token usage"""
+        self._entries.move_to_end(key)
+        return replace(
+            entry.response,
+            message=replace(entry.response.message),
+            usage_stats={
+                "total_tokens": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_cost": 0.0,
+                "cache": match
+            }
+        )
+    
+    def _drop(self, key: str) -> None:
+        """Remove an entry and its vector"""
+        self._entries.pop(key, None)
+        self.index.remove(key)
+    
+    @staticmethod
+    def _key(normalized: str) -> str:
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _literals(normalized: str) -> FrozenSet[str]:
+        return frozenset(_LITERAL.findall(normalized))
+    
+    def _embed(self, normalized: str) -> np.ndarray:
+        """Embedding of a question without its question words"""
+        return self.embedder.embed("".join(char for char in normalized if char not in self.filler))
+    
+    def _terms(self, normalized: str) -> FrozenSet[str]:
+        """Content characters outside literal values and question words"""
+        return frozenset(_LITERAL.sub("", normalized)) - self.filler
+    
+    @staticmethod
+    def _data_version() -> int:
+        """Write counter of the data services answers are derived from"""
+        from ..service import service_registry
+        return service_registry.get_data_version()
+
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """Create a response cache from settings, None when disabled"""
+    config = settings.response_cache
+    if not config.enable:
+        return None
+    
+    return ResponseCache(
+        ttl=config.ttl,
+        max_entries=config.max_entries,
+        similarity_threshold=config.similarity_threshold,
+        max_term_diff=config.max_term_diff,
+        context_markers=config.context_markers,
+        embedder=HashingEmbedder(dim=config.embedding_dim)
+    )
@@ -0,0 +1,198 @@
+"""
+Agent Layer - Tool Output Shaping
+Compacts tool results before they are fed to the LLM
+"""
+
+import csv
+import dataclasses
+import io
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple
+
+from .context import get_token_counter
+from ..conf import settings
+
+
+@dataclass
+class ToolOutputPolicy:
+    """How one tool's results are shaped"""
+    format: str = "table"  # "table" (CSV, column names once) or "json" (compact)
+    columns: Optional[List[str]] = None  # projection of result rows, None keeps all
+    max_rows: int = 50  # rows per result list, the rest reported as "N more rows"
+    max_tokens: int = 2000  # token cap for the whole result
+    max_cell_chars: int = 200  # longer values are cut
+    drop_internal: bool = True  # drop "_"-prefixed fields such as _id and _score
+
+
+@dataclass
+class ToolOutputMetrics:
+    """Token counts before and after shaping"""
+    calls: int = 0
+    raw_tokens: int = 0  # estimated, as pretty-printed JSON
+    shaped_tokens: int = 0
+    truncated: int = 0  # results cut by max_rows or max_tokens
+    
+    @property
+    def saved_tokens(self) -> int:
+        """Tokens not sent to the LLM thanks to shaping"""
+        return self.raw_tokens - self.shaped_tokens
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert metrics to a plain dict"""
+        return {
+            'calls': self.calls,
+            'raw_tokens': self.raw_tokens,
+            'shaped_tokens': self.shaped_tokens,
+            'saved_tokens': self.saved_tokens,
+            'truncated': self.truncated
+        }
+
+
+def _is_rows(value: Any) -> bool:
+    """Check if value is a list of records"""
+    return isinstance(value, list) and bool(value) and all(isinstance(item, dict) for item in value)
+
+
+def _dump(value: Any) -> str:
+    """Compact JSON, keeping non-ASCII text readable"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class ToolOutputShaper:
+    """
+    Turns tool results into compact text for the LLM.
+    
+    Nulls, empty values and internal fields are dropped, and result rows are
+    projected to the configured columns. Lists of records are written as CSV
+    with the column names once, or as compact JSON. Long lists are cut with
+    an "N more rows" marker, and rows are halved until the result fits the
+    tool's token cap.
+    """
+    
+    def __init__(self):
+        self.metrics: Dict[str, ToolOutputMetrics] = {}
+        self._policies: Dict[str, ToolOutputPolicy] = {}
+    
+    def set_policy(self, tool_name: str, policy: ToolOutputPolicy) -> None:
+        """Override the shaping policy of a tool"""
+        self._policies[tool_name] = policy
+    
+    def get_policy(self, tool_name: str) -> ToolOutputPolicy:
+        """Policy of a tool: settings defaults with its per-tool overrides"""
+        policy = self._policies.get(tool_name)
+        if policy is None:
+            config = settings.tool_output
+            options = {
+                'format': config.format,
+                'max_rows': config.max_rows,
+                'max_tokens': config.max_tokens,
+                'max_cell_chars': config.max_cell_chars,
+                'drop_internal': config.drop_internal
+            }
+            options.update(config.tools.get(tool_name, {}))
+            policy = ToolOutputPolicy(**options)
+            self._policies[tool_name] = policy
+        return policy
+    
+    def shape(self, tool_name: str, data: Any) -> str:
+        """Shape a tool result and record the tokens saved"""
+        policy = self.get_policy(tool_name)
+        counter = get_token_counter()
+        
+        cleaned = self._clean(data, policy)
+        max_rows = policy.max_rows
+        text, truncated = self._render(cleaned, policy, max_rows)
+        tokens = counter.count(text)
+        
+        # Fewer rows per list until the result fits
+        while tokens > policy.max_tokens and max_rows > 1:
+            max_rows = max(1, max_rows // 2)
+            text, truncated = self._render(cleaned, policy, max_rows)
+            tokens = counter.count(text)
+        
+        if tokens > policy.max_tokens:
+            text = counter.truncate(text, policy.max_tokens) + f"\n... [truncated to {policy.max_tokens} tokens]"
+            tokens = counter.count(text)
+            truncated = True
+        
+        metrics = self.metrics.setdefault(tool_name, ToolOutputMetrics())
+        metrics.calls += 1
+        # Only an estimate: tokenizing the whole raw payload would cost much of what shaping saves
+        metrics.raw_tokens += counter.estimate(json.dumps(data, ensure_ascii=False, indent=2, default=str))
+        metrics.shaped_tokens += tokens
+        metrics.truncated += int(truncated)
+        return text
+    
+    def _clean(self, value: Any, policy: ToolOutputPolicy) -> Any:
+        """Drop empty and internal fields and project result rows"""
+        if dataclasses.is_dataclass(value) and not isinstance(value, type):
+            value = dataclasses.asdict(value)
+        
+        if isinstance(value, dict):
+            return {
+                key: self._clean(item, policy)
+                for key, item in value.items()
+                if not (policy.drop_internal and str(key).startswith("_")) and item not in (None, "", [], {})
+            }
+        
+        if isinstance(value, list):
+            items = [self._clean(item, policy) for item in value]
+            if policy.columns and _is_rows(items):
+                items = [{column: row[column] for column in policy.columns if column in row} for row in items]
+            return items
+        
+        return value
+    
+    def _render(self, value: Any, policy: ToolOutputPolicy, max_rows: int) -> Tuple[str, bool]:
+        """Render a cleaned value and report whether rows were cut"""
+        if _is_rows(value):
+            rows = value[:max_rows]
+            more = len(value) - len(rows)
+            text = self._rows_to_csv(rows, policy) if policy.format == "table" else _dump(rows)
+            if more:
+                text += f"\n... {more} more rows"
+            return text, bool(more)
+        
+        # Records nested in an object (e.g. {"index": {"total": 3, "items": [...]}}) get their own block
+        if isinstance(value, dict) and any(_is_rows(item) or isinstance(item, dict) for item in value.values()):
+            parts, truncated = [], False
+            for key, item in value.items():
+                text, cut = self._render(item, policy, max_rows)
+                truncated = truncated or cut
+                parts.append(f"[{key}]\n{text}" if "\n" in text or _is_rows(item) else f"{key}: {text}")
+            return "\n".join(parts), truncated
+        
+        if isinstance(value, str):
+            return value, False
+        return _dump(value), False
+    
+    def _rows_to_csv(self, rows: List[Dict[str, Any]], policy: ToolOutputPolicy) -> str:
+        """Write rows as CSV with one header line of their columns"""
+        columns: Dict[str, None] = {}
+        for row in rows:
+            columns.update(dict.fromkeys(row))
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([self._cell(row.get(column), policy) for column in columns])
+        return buffer.getvalue().rstrip("\n")
+    
+    def _cell(self, value: Any, policy: ToolOutputPolicy) -> str:
+        """Format one CSV cell"""
+        if value is None:
+            return ""
+        text = value if isinstance(value, str) else _dump(value)
+        if len(text) > policy.max_cell_chars:
+            text = text[:policy.max_cell_chars] + "…"
+        return text
+    
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Shaping metrics per tool"""
+        return {name: metrics.to_dict() for name, metrics in self.metrics.items()}
+
+
+# Global tool output shaper
+tool_output_shaper = ToolOutputShaper()
@@ -138,6 +138,22 @@ def safe_float_convert(value: Any) -> Optional[float]:
         return None
 
 
+def catalog_table_rows(catalog: Any, app_filter: str) -> List[Dict[str, Any]]:
+    """Table definitions from a schema catalog, shaped like security_table_define rows"""
+    return [
+        {'id': table.id, 'TableName': table.name, 'TableCnName': table.cn_name, 'APPID': table.app_id}
+        for table in catalog.list_tables(app_filter)
+    ]
+
+
+def catalog_column_rows(catalog: Any, table_id: int) -> List[Dict[str, Any]]:
+    """Column definitions from a schema catalog, shaped like security_tablecolumn_define rows"""
+    return [
+        {'ColName': column.name, 'ColCnName': column.cn_name}
+        for column in catalog.get_columns(table_id)
+    ]
+
+
 def parse_mapping_response(mapping_data: Dict[str, Any]) -> MappingResponse:
     """Parse Elasticsearch mapping response"""
     properties = {}
@@ -9,17 +9,20 @@ import os
 
 from ..logger import LOG_INFO, LOG_ERROR, LOG_DEBUG
 from ..dao.mysql_dao import MySQLDAO
+from ..service.schema_catalog import SchemaCatalogService
 from .common import (
     Field, TableInfo, safe_str_convert, safe_int_convert,
-    normalize_path, snake_to_camel
+    normalize_path, snake_to_camel,
+    catalog_table_rows
 )
 
 
 class ControllerBuilder:
     """Builds FastAPI controllers from database schema"""
     
-    def __init__(self, mysql_dao: MySQLDAO, output_dir: str = "controller"):
+    def __init__(self, mysql_dao: MySQLDAO, output_dir: str = "controller", catalog: Optional[SchemaCatalogService] = None):
         self.mysql_dao = mysql_dao
+        self.catalog = catalog
         self.output_dir = output_dir
         self.controller_template = self._create_controller_template()
     
@@ -152,7 +155,10 @@ async def get_{{table_name_lower}}_by_id(record_id: str):
         return built_controllers
     
     def _get_table_definitions(self, app_filter: str) -> List[Dict[str, Any]]:
-        """Get table definitions from MySQL"""
+        """Get table definitions from the schema catalog, or MySQL without one"""
+        if self.catalog and self.catalog.is_loaded():
+            return catalog_table_rows(self.catalog, app_filter)
+        
         query = """
             SELECT id, TableName, TableCnName, APPID 
             FROM security_table_define 
@@ -9,17 +9,20 @@ import os
 
 from ..logger import LOG_INFO, LOG_ERROR, LOG_DEBUG
 from ..dao.mysql_dao import MySQLDAO
+from ..service.schema_catalog import SchemaCatalogService
 from .common import (
     Field, TableInfo, safe_str_convert, safe_int_convert,
-    normalize_path, snake_to_camel, camel_to_snake
+    normalize_path, snake_to_camel, camel_to_snake,
+    catalog_table_rows, catalog_column_rows
 )
 
 
 class MCPToolBuilder:
     """Builds MCP tools from database schema"""
     
-    def __init__(self, mysql_dao: MySQLDAO, output_dir: str = "service/mcptools"):
+    def __init__(self, mysql_dao: MySQLDAO, output_dir: str = "service/mcptools", catalog: Optional[SchemaCatalogService] = None):
         self.mysql_dao = mysql_dao
+        self.catalog = catalog
         self.output_dir = output_dir
         self.tool_template = self._create_tool_template()
     
@@ -165,7 +168,10 @@ FUNCTIONS = [query_{{table_name_lower}}]
         return built_tools
     
     def _get_table_definitions(self, app_filter: str) -> List[Dict[str, Any]]:
-        """Get table definitions from MySQL"""
+        """Get table definitions from the schema catalog, or MySQL without one"""
+        if self.catalog and self.catalog.is_loaded():
+            return catalog_table_rows(self.catalog, app_filter)
+        
         query = """
             SELECT id, TableName, TableCnName, APPID 
             FROM security_table_define 
@@ -201,7 +207,10 @@ FUNCTIONS = [query_{{table_name_lower}}]
         return self._write_tool_file(app_id, table_name, tool_code)
     
     def _get_column_definitions(self, table_id: int) -> List[Dict[str, Any]]:
-        """Get column definitions from MySQL"""
+        """Get column definitions from the schema catalog, or MySQL without one"""
+        if self.catalog and self.catalog.is_loaded():
+            return catalog_column_rows(self.catalog, table_id)
+        
         query = """
             SELECT ColName, ColCnName 
             FROM security_tablecolumn_define 
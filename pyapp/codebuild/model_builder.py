@@ -11,18 +11,21 @@ from datetime import datetime
 
 from ..logger import LOG_INFO, LOG_ERROR, LOG_DEBUG
 from ..dao.mysql_dao import MySQLDAO
+from ..service.schema_catalog import SchemaCatalogService
 from .common import (
     Field, TableInfo, MappingResponse, parse_mapping_response,
     extract_fields_from_mapping, snake_to_camel, capitalize_first,
-    normalize_path, safe_str_convert, safe_int_convert
+    normalize_path, safe_str_convert, safe_int_convert,
+    catalog_table_rows, catalog_column_rows
 )
 
 
 class ModelBuilder:
     """Builds Pydantic models from database schema"""
     
-    def __init__(self, mysql_dao: MySQLDAO, output_dir: str = "modules"):
+    def __init__(self, mysql_dao: MySQLDAO, output_dir: str = "modules", catalog: Optional[SchemaCatalogService] = None):
         self.mysql_dao = mysql_dao
+        self.catalog = catalog
         self.output_dir = output_dir
         self.model_template = self._create_model_template()
     
@@ -91,7 +94,10 @@ class {{class_name}}(BaseModel):
         return table_infos
     
     def _get_table_definitions(self, app_filter: str) -> List[Dict[str, Any]]:
-        """Get table definitions from MySQL"""
+        """Get table definitions from the schema catalog, or MySQL without one"""
+        if self.catalog and self.catalog.is_loaded():
+            return catalog_table_rows(self.catalog, app_filter)
+        
         query = """
             SELECT id, TableName, TableCnName, APPID 
             FROM security_table_define 
@@ -140,7 +146,10 @@ class {{class_name}}(BaseModel):
         )
     
     def _get_column_definitions(self, table_id: int) -> List[Dict[str, Any]]:
-        """Get column definitions from MySQL"""
+        """Get column definitions from the schema catalog, or MySQL without one"""
+        if self.catalog and self.catalog.is_loaded():
+            return catalog_column_rows(self.catalog, table_id)
+        
         query = """
             SELECT ColName, ColCnName 
             FROM security_tablecolumn_define 
@@ -149,7 +158,14 @@ class {{class_name}}(BaseModel):
         return self.mysql_dao.execute_query(query, [table_id])
     
     def _get_es_mapping(self, index_name: str) -> MappingResponse:
-        """Get Elasticsearch mapping (simulated)"""
+        """Get Elasticsearch mapping from the schema catalog (simulated without one)"""
+        table = self.catalog.get_table(index_name) if self.catalog else None
+        if table and table.mapping:
+            # Top-level fields only, matching the mapping response properties
+            return MappingResponse(properties={
+                name: props for name, props in table.mapping.items() if '.' not in name
+            })
+        
         # In real implementation, this would call Elasticsearch
         # For now, return a mock mapping
         mock_mapping = {
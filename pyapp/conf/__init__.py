@@ -5,7 +5,7 @@ Handles loading and accessing configuration settings from YAML files
 
 import os
 import yaml
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, List, Any, Union
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -19,6 +19,31 @@ class DatabaseConfig(BaseSettings):
     port: int = 0
     dbname: str = ""
     charset: str = "utf8"
+    pool_minsize: int = 1
+    pool_maxsize: int = 10
+    pool_recycle: int = 3600  # seconds, -1 disables recycling
+    pool_acquire_timeout: float = 10.0  # seconds
+    pool_health_check_interval: int = 30  # idle seconds before ping, -1 disables
+    local_infile: bool = False  # allow LOAD DATA LOCAL INFILE bulk loads (MySQL)
+    load_data_dir: str = ""  # private directory for LOAD DATA files, default <tmp>/pyapp-load-data-<uid>
+    schema_cache_ttl: float = 300.0  # seconds table lists/schemas are reused
+
+
+class ElasticsearchConfig(DatabaseConfig):
+    """Elasticsearch configuration settings"""
+    uri: str = ""
+    connections_per_node: int = 10  # HTTP connection pool size per node
+    request_timeout: float = 30.0  # seconds
+    max_retries: int = 3
+    retry_on_timeout: bool = True
+    http_compress: bool = False
+    projection: str = "source"  # field projection via "source" filtering or "docvalues"
+    track_total_hits: Union[bool, int] = 10000  # True = exact, int = count up to this many
+    agg_cache_ttl: float = 60.0  # seconds aggregation results are reused
+    write_refresh: Union[bool, str] = False  # refresh policy for writes: False, True or "wait_for"
+    bulk_chunk_size: int = 500  # documents per bulk request
+    bulk_max_chunk_bytes: int = 10 * 1024 * 1024  # bytes per bulk request
+    bulk_concurrency: int = 4  # bulk requests in flight
 
 
 class PlatformConfig(BaseSettings):
@@ -39,6 +64,65 @@ class McpToolConfig(BaseSettings):
     stdio_command: str = "uvx"
     stdio_env: str = ""
     stdio_args: str = ""
+    coalesce_tools: str = ""  # ';'-separated remote tools whose identical concurrent calls share one request
+
+
+class SchemaCatalogConfig(BaseSettings):
+    """Schema catalog configuration"""
+    refresh_interval: float = 300.0  # seconds between change checks, 0 disables
+    mapping_ttl: float = 3600.0  # seconds before ES mappings are reloaded
+
+
+class CacheConfig(BaseSettings):
+    """Result cache configuration"""
+    enable: bool = True
+    local_max_size: int = 1024  # entries per service in the in-process tier
+    tool_ttl: int = 300  # seconds MCP tool results are reused
+    search_ttl: int = 300  # seconds data service searches are reused
+    key_prefix: str = "pyapp:cache:"
+    redis_timeout: float = 0.5  # seconds before a Redis call counts as a miss
+    generation_check_interval: float = 1.0  # seconds between checks for other workers' invalidations
+
+
+class MemoryConfig(BaseSettings):
+    """Conversation memory configuration"""
+    backend: str = "local"  # "local" (per process) or "redis" (shared by workers)
+    max_messages: int = 50  # messages kept per session
+    max_sessions: int = 10000  # sessions kept in process, least recently used evicted
+    session_ttl: float = 3600.0  # seconds an idle session is kept
+    key_prefix: str = "pyapp:session:"
+
+
+class ContextConfig(BaseSettings):
+    """Agent context window configuration"""
+    tokenizer_encoding: str = "cl100k_base"  # tiktoken encoding used to count tokens
+    history_token_budget: int = 3000  # tokens of chat history sent with a request
+    summary_token_budget: int = 500  # tokens of the rolling summary of older turns
+    summarize_ratio: float = 0.6  # share of the budget the kept history fills after summarizing
+    catalog_token_budget: int = 1500  # tokens of the table catalog in the default system prompt
+
+
+class ToolOutputConfig(BaseSettings):
+    """Tool result shaping before results are sent to the LLM"""
+    format: str = "table"  # "table" (CSV, column names once) or "json" (compact)
+    max_rows: int = 50  # rows per result list, the rest reported as "N more rows"
+    max_tokens: int = 2000  # token cap per tool result
+    max_cell_chars: int = 200  # longer values are cut
+    drop_internal: bool = True  # drop "_"-prefixed fields such as _id and _score
+    tools: Dict[str, Dict[str, Any]] = Field(default_factory=dict)  # per-tool overrides, e.g. {"columns": [...]}
+
+
+class ResponseCacheConfig(BaseSettings):
+    """Agent answer cache for repeated and paraphrased questions"""
+    enable: bool = True
+    ttl: float = 300.0  # seconds an answer is reused; any data write also invalidates it
+    max_entries: int = 2048
+    similarity_threshold: float = 0.6  # cosine similarity for a paraphrase candidate
+    max_term_diff: int = 1  # content characters a paraphrase may differ by (decides the match)
+    embedding_dim: int = 1024
+    context_markers: List[str] = Field(default_factory=lambda: [
+        "他", "她", "它", "上述", "上面", "刚才", "之前", "以上", "继续", "这个人", "那个人"
+    ])  # questions referring to the conversation are never cached
 
 
 class GatewayConfig(BaseSettings):
@@ -56,12 +140,18 @@ class Settings(BaseSettings):
     platform: PlatformConfig = Field(default_factory=PlatformConfig)
     mcp_tool: McpToolConfig = Field(default_factory=McpToolConfig)
     gateway: GatewayConfig = Field(default_factory=GatewayConfig)
-    es: DatabaseConfig = Field(default_factory=DatabaseConfig)
+    schema_catalog: SchemaCatalogConfig = Field(default_factory=SchemaCatalogConfig)
+    cache: CacheConfig = Field(default_factory=CacheConfig)
+    memory: MemoryConfig = Field(default_factory=MemoryConfig)
+    context: ContextConfig = Field(default_factory=ContextConfig)
+    tool_output: ToolOutputConfig = Field(default_factory=ToolOutputConfig)
+    response_cache: ResponseCacheConfig = Field(default_factory=ResponseCacheConfig)
+    es: ElasticsearchConfig = Field(default_factory=ElasticsearchConfig)
     mysql: DatabaseConfig = Field(default_factory=DatabaseConfig)
     redis: DatabaseConfig = Field(default_factory=DatabaseConfig)
     nebula: DatabaseConfig = Field(default_factory=DatabaseConfig)
     milvus: DatabaseConfig = Field(default_factory=DatabaseConfig)
-
+    
     class Config:
         env_file = ".env"
         env_prefix = "ZX_"
@@ -97,11 +187,59 @@ def load_config(config_path: str = "conf/config.yaml") -> Settings:
                 "gatwayurl_1400": "",
                 "gatwayurl_everything": ""
             },
+            "schema_catalog": {
+                "refresh_interval": 300.0,
+                "mapping_ttl": 3600.0
+            },
+            "cache": {
+                "enable": True,
+                "local_max_size": 1024,
+                "tool_ttl": 300,
+                "search_ttl": 300,
+                "key_prefix": "pyapp:cache:",
+                "redis_timeout": 0.5,
+                "generation_check_interval": 1.0
+            },
+            "memory": {
+                "backend": "local",
+                "max_messages": 50,
+                "max_sessions": 10000,
+                "session_ttl": 3600.0,
+                "key_prefix": "pyapp:session:"
+            },
+            "context": {
+                "tokenizer_encoding": "cl100k_base",
+                "history_token_budget": 3000,
+                "summary_token_budget": 500,
+                "summarize_ratio": 0.6,
+                "catalog_token_budget": 1500
+            },
+            "tool_output": {
+                "format": "table",
+                "max_rows": 50,
+                "max_tokens": 2000,
+                "max_cell_chars": 200,
+                "drop_internal": True,
+                "tools": {}
+            },
+            "response_cache": {
+                "enable": True,
+                "ttl": 300.0,
+                "max_entries": 2048,
+                "similarity_threshold": 0.6,
+                "max_term_diff": 1,
+                "embedding_dim": 1024,
+                "context_markers": [
+                    "他", "她", "它", "上述", "上面", "刚才", "之前", "以上", "继续", "这个人", "那个人"
+                ]
+            },
             "ES": {
                 "enable": True,
                 "uri": "",
                 "username": "elastic",
-                "password": ""
+                "password": "",
+                "connections_per_node": 10,
+                "request_timeout": 30
             },
             "MySQL": {
                 "enable": True,
@@ -110,7 +248,9 @@ def load_config(config_path: str = "conf/config.yaml") -> Settings:
                 "address": "",
                 "port": 3306,
                 "dbName": "uec",
-                "charset": "utf8"
+                "charset": "utf8",
+                "pool_minsize": 1,
+                "pool_maxsize": 10
             },
             "Redis": {
                 "enable": True,
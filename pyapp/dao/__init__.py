@@ -5,9 +5,12 @@ Provides factory methods for creating DAO instances and utility functions
 
 from typing import Dict, Any, Optional, Union
 from ..conf import settings
-from .mysql_dao import MySQLDAO
-from .elasticsearch_dao import ElasticsearchDAO
-from .base import BaseDAO, SearchResponse, StatResult, QueryFilter, SortOption, PaginationOptions
+from .mysql_dao import MySQLDAO, CountStrategy
+from .elasticsearch_dao import ElasticsearchDAO, ElasticsearchClientRegistry, es_client_registry
+from .base import (
+    BaseDAO, SearchResponse, StatResult, QueryFilter, SortOption, PaginationOptions,
+    MultiSearchItem, BulkResult, RowBatch, PoolMetrics, encode_cursor, decode_cursor
+)
 from ..logger import LOG_INFO, LOG_ERROR, LOG_DEBUG
 
 
@@ -23,7 +26,15 @@ class DAOFactory:
             'username': settings.mysql.username,
             'password': settings.mysql.password,
             'dbname': settings.mysql.dbname,
-            'charset': settings.mysql.charset
+            'charset': settings.mysql.charset,
+            'minsize': settings.mysql.pool_minsize,
+            'maxsize': settings.mysql.pool_maxsize,
+            'pool_recycle': settings.mysql.pool_recycle,
+            'acquire_timeout': settings.mysql.pool_acquire_timeout,
+            'health_check_interval': settings.mysql.pool_health_check_interval,
+            'local_infile': settings.mysql.local_infile,
+            'load_data_dir': settings.mysql.load_data_dir,
+            'schema_cache_ttl': settings.mysql.schema_cache_ttl
         }
         return MySQLDAO(config)
     
@@ -33,7 +44,19 @@ class DAOFactory:
         config = {
             'uri': settings.es.uri,
             'username': settings.es.username,
-            'password': settings.es.password
+            'password': settings.es.password,
+            'connections_per_node': settings.es.connections_per_node,
+            'request_timeout': settings.es.request_timeout,
+            'max_retries': settings.es.max_retries,
+            'retry_on_timeout': settings.es.retry_on_timeout,
+            'http_compress': settings.es.http_compress,
+            'projection': settings.es.projection,
+            'track_total_hits': settings.es.track_total_hits,
+            'agg_cache_ttl': settings.es.agg_cache_ttl,
+            'write_refresh': settings.es.write_refresh,
+            'bulk_chunk_size': settings.es.bulk_chunk_size,
+            'bulk_max_chunk_bytes': settings.es.bulk_max_chunk_bytes,
+            'bulk_concurrency': settings.es.bulk_concurrency
         }
         return ElasticsearchDAO(config)
     
@@ -64,9 +87,11 @@ class DatabaseManager:
         if settings.mysql.enable:
             try:
                 self.mysql_dao = DAOFactory.create_mysql_dao()
-                await self.mysql_dao.connect()
-                self.connections['mysql'] = self.mysql_dao
-                LOG_INFO("MySQL connection initialized")
+                if await self.mysql_dao.connect():
+                    self.connections['mysql'] = self.mysql_dao
+                    LOG_INFO("MySQL connection initialized")
+                else:
+                    success = False
             except Exception as e:
                 LOG_ERROR(f"Failed to initialize MySQL: {e}")
                 success = False
@@ -75,9 +100,11 @@ class DatabaseManager:
         if settings.es.enable:
             try:
                 self.elasticsearch_dao = DAOFactory.create_elasticsearch_dao()
-                await self.elasticsearch_dao.connect()
-                self.connections['elasticsearch'] = self.elasticsearch_dao
-                LOG_INFO("Elasticsearch connection initialized")
+                if await self.elasticsearch_dao.connect():
+                    self.connections['elasticsearch'] = self.elasticsearch_dao
+                    LOG_INFO("Elasticsearch connection initialized")
+                else:
+                    success = False
             except Exception as e:
                 LOG_ERROR(f"Failed to initialize Elasticsearch: {e}")
                 success = False
@@ -96,6 +123,13 @@ class DatabaseManager:
                 LOG_ERROR(f"Failed to close {name} connection: {e}")
                 success = False
         
+        # Shared Elasticsearch clients outlive individual DAOs
+        try:
+            await es_client_registry.close_all()
+        except Exception as e:
+            LOG_ERROR(f"Failed to close Elasticsearch clients: {e}")
+            success = False
+        
         self.connections.clear()
         return success
     
@@ -110,6 +144,14 @@ class DatabaseManager:
     def get_dao(self, dao_type: str) -> Optional[BaseDAO]:
         """Get DAO instance by type"""
         return self.connections.get(dao_type.lower())
+    
+    def get_pool_metrics(self) -> Dict[str, PoolMetrics]:
+        """Get connection pool metrics for every pooled connection"""
+        metrics = {}
+        for name, dao in self.connections.items():
+            if hasattr(dao, 'get_pool_metrics'):
+                metrics[name] = dao.get_pool_metrics()
+        return metrics
 
 
 # Global database manager instance
@@ -143,16 +185,14 @@ async def search_by_keywords(
         # Get ES DAO
         es_dao = await get_dao('elasticsearch')
         
-        # Perform search
+        # Perform search, with the aggregation folded into the same request
         pagination = PaginationOptions(offset=offset, limit=size)
-        result = await es_dao.search(index, filters, pagination=pagination)
-        
-        # If aggregation field is specified, perform aggregation
-        if agg_field:
-            agg_result = await es_dao.aggregate(index, filters, agg_field)
-            result.stats = {agg_field: agg_result}
-        
-        return result
+        return await es_dao.search(
+            index,
+            filters,
+            pagination=pagination,
+            agg_fields=[agg_field] if agg_field else None
+        )
         
     except Exception as e:
         LOG_ERROR(f"Search by keywords failed: {e}")
@@ -213,11 +253,20 @@ __all__ = [
     'is_flexible_time_field',
     'parse_time_range',
     'MySQLDAO',
+    'CountStrategy',
     'ElasticsearchDAO',
+    'ElasticsearchClientRegistry',
+    'es_client_registry',
     'BaseDAO',
     'SearchResponse',
     'StatResult',
     'QueryFilter',
     'SortOption',
-    'PaginationOptions'
+    'PaginationOptions',
+    'MultiSearchItem',
+    'BulkResult',
+    'RowBatch',
+    'PoolMetrics',
+    'encode_cursor',
+    'decode_cursor'
 ]
\ No newline at end of file
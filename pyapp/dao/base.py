@@ -4,18 +4,24 @@ Provides base data access objects for different database types
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional, Union
-from dataclasses import dataclass
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Union, Callable, Hashable, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
+import base64
+import binascii
 import json
+import time
 
 
 @dataclass
 class SearchResponse:
     """Standard search response"""
     hits: List[Dict[str, Any]]
-    total: int
+    total: int  # -1 when the backend was asked not to count
     stats: Dict[str, 'StatResult']
+    next_cursor: Optional[str] = None  # set for keyset pagination while more pages remain
+    error: Optional[str] = None  # set when one search of a multi-search failed
 
 
 @dataclass
@@ -32,7 +38,7 @@ class StatResult:
 class QueryFilter:
     """Query filter for database operations"""
     field: str
-    operator: str  # eq, ne, gt, lt, gte, lte, like, in, not_in
+    operator: str  # eq, ne, gt, lt, gte, lte, like, prefix, in, not_in
     value: Any
 
 
@@ -49,6 +55,110 @@ class PaginationOptions:
     offset: int = 0
     limit: int = 100
     max_limit: int = 1000
+    keyset: bool = False  # seek past the previous page instead of using offset
+    cursor: Optional[str] = None  # next_cursor from the previous page, implies keyset
+
+    @property
+    def is_keyset(self) -> bool:
+        """Check if keyset (seek) pagination is requested"""
+        return self.keyset or bool(self.cursor)
+
+
+@dataclass
+class BulkResult:
+    """Outcome of a bulk write, with one ID slot per input document"""
+    ids: List[Optional[str]] = field(default_factory=list)  # None where the item failed
+    errors: List[Dict[str, Any]] = field(default_factory=list)  # position, status and error per failed item
+
+    @property
+    def success_count(self) -> int:
+        """Number of documents written"""
+        return len(self.ids) - len(self.errors)
+
+
+@dataclass
+class RowBatch:
+    """A batch of tuple rows sharing one column header"""
+    columns: Tuple[str, ...]
+    rows: List[tuple]
+
+
+@dataclass
+class MultiSearchItem:
+    """One search of a multi-search batch"""
+    index: str
+    filters: List[QueryFilter]
+    sort_options: Optional[List[SortOption]] = None
+    pagination: Optional[PaginationOptions] = None
+    fields: Optional[List[str]] = None
+
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """Encode pagination state as an opaque URL-safe cursor"""
+    raw = json.dumps(state, separators=(',', ':'), ensure_ascii=False, default=str)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(
+    cursor: str,
+    sort_key: Optional[List[str]] = None,
+    required: Tuple[str, ...] = ()
+) -> Dict[str, Any]:
+    """Decode a pagination cursor, checking it was issued for the same sort and store"""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (ValueError, binascii.Error) as e:
+        raise ValueError(f"Invalid pagination cursor: {e}")
+    
+    # required: backend-specific fields, e.g. the ES point-in-time id
+    if not isinstance(state, dict) or not isinstance(state.get('v'), list):
+        raise ValueError("Invalid pagination cursor")
+    if any(not isinstance(state.get(key), str) or not state[key] for key in required):
+        raise ValueError("Invalid pagination cursor")
+    if sort_key is not None and state.get('s') != sort_key:
+        raise ValueError("Pagination cursor does not match the requested sort order")
+    return state
+
+
+def sort_key_of(sort_options: List[SortOption]) -> List[str]:
+    """Fingerprint a sort order for cursor validation"""
+    return [f"{sort_obj.field}:{sort_obj.direction.lower()}" for sort_obj in sort_options]
+
+
+@dataclass
+class PoolMetrics:
+    """Connection pool metrics snapshot"""
+    size: int = 0
+    minsize: int = 0
+    maxsize: int = 0
+    in_use: int = 0
+    idle: int = 0
+    acquisitions: int = 0
+    acquire_timeouts: int = 0
+    health_check_failures: int = 0
+    wait_time_total: float = 0.0  # seconds
+    wait_time_max: float = 0.0  # seconds
+
+    @property
+    def wait_time_avg(self) -> float:
+        """Average time spent waiting for a connection"""
+        return self.wait_time_total / self.acquisitions if self.acquisitions else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert metrics to a plain dict"""
+        return {
+            'size': self.size,
+            'minsize': self.minsize,
+            'maxsize': self.maxsize,
+            'in_use': self.in_use,
+            'idle': self.idle,
+            'acquisitions': self.acquisitions,
+            'acquire_timeouts': self.acquire_timeouts,
+            'health_check_failures': self.health_check_failures,
+            'wait_time_total': self.wait_time_total,
+            'wait_time_max': self.wait_time_max,
+            'wait_time_avg': self.wait_time_avg
+        }
 
 
 class BaseDAO(ABC):
@@ -129,9 +239,10 @@ class BaseDAO(ABC):
         index: str,
         filters: List[QueryFilter],
         sort_options: Optional[List[SortOption]] = None,
-        pagination: Optional[PaginationOptions] = None
+        pagination: Optional[PaginationOptions] = None,
+        fields: Optional[List[str]] = None
     ) -> SearchResponse:
-        """Search with filters and pagination"""
+        """Search with filters and pagination, returning only fields if given"""
         pass
     
     @abstractmethod
@@ -189,10 +300,80 @@ class ValidationMixin:
         return value
 
 
+class TTLCache:
+    """In-process LRU cache with per-entry expiry"""
+    
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value, or default if missing or expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        
+        self._data.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Cache a value for ttl seconds (defaults to the cache TTL)"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+    
+    def purge_expired(self) -> int:
+        """Drop expired entries from the least recently used end and return the count"""
+        # Exact when every access re-sets the entry with the default TTL
+        now = time.monotonic()
+        purged = 0
+        while self._data:
+            key, (expires_at, _) = next(iter(self._data.items()))
+            if expires_at >= now:
+                break
+            del self._data[key]
+            purged += 1
+        return purged
+    
+    def discard_if(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches predicate and return the count"""
+        keys = [key for key in self._data if predicate(key)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+    
+    def clear(self) -> None:
+        """Drop all entries"""
+        self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
 class QueryBuilder:
     """Helper class for building complex queries"""
     
-    def __init__(self):
+    # Placeholder syntax per driver paramstyle
+    PLACEHOLDER_STYLES = ("format", "qmark", "numeric")  # %s (aiomysql), ? , $1 (asyncpg)
+    MULTI_VALUE_OPERATORS = ("in", "not_in")
+    COMPARISON_OPERATORS = {
+        "eq": "=", "ne": "!=", "gt": ">", "lt": "<", "gte": ">=", "lte": "<=",
+        "like": "LIKE", "prefix": "LIKE"
+    }
+    
+    def __init__(self, placeholder_style: str = "format"):
+        if placeholder_style not in self.PLACEHOLDER_STYLES:
+            raise ValueError(f"Unsupported placeholder style: {placeholder_style}")
+        self.placeholder_style = placeholder_style
         self.reset()
     
     def reset(self):
@@ -202,6 +383,7 @@ class QueryBuilder:
         self.filters = []
         self.sorts = []
         self.pagination = None
+        self.seek_values = None
     
     def add_filter(self, field: str, operator: str, value: Any) -> 'QueryBuilder':
         """Add a filter condition"""
@@ -218,6 +400,43 @@ class QueryBuilder:
         self.pagination = PaginationOptions(offset, limit)
         return self
     
+    def seek_after(self, values: List[Any]) -> 'QueryBuilder':
+        """Continue after the row with the given sort values (keyset pagination)"""
+        self.seek_values = values
+        return self
+    
+    def filter_shape(self) -> Tuple:
+        """Hashable structure of the filters (fields, operators, IN arity), without values"""
+        return tuple(
+            (filter_obj.field, filter_obj.operator,
+             len(filter_obj.value) if filter_obj.operator in self.MULTI_VALUE_OPERATORS else None)
+            for filter_obj in self.filters
+        )
+    
+    def shape(self) -> Tuple:
+        """Hashable structure of the whole query, identical for queries sharing SQL text"""
+        return (
+            self.placeholder_style,
+            self.filter_shape(),
+            tuple((sort_obj.field, sort_obj.direction.lower()) for sort_obj in self.sorts),
+            self.seek_values is not None,
+            self.pagination is not None
+        )
+    
+    def filter_params(self) -> List[Any]:
+        """Parameter values of the WHERE clause, in placeholder order"""
+        params = []
+        for filter_obj in self.filters:
+            params.extend(self._filter_values(filter_obj))
+        return params
+    
+    def collect_params(self) -> List[Any]:
+        """All parameter values in placeholder order, without building any SQL"""
+        params = self.filter_params() + self._keyset_values()
+        if self.pagination:
+            params += [self.pagination.limit, self.pagination.offset]
+        return params
+    
     def build_where_clause(self) -> str:
         """Build WHERE clause from filters"""
         if not self.filters:
@@ -230,46 +449,82 @@ class QueryBuilder:
         
         return "WHERE " + " AND ".join(where_clauses)
     
+    def _filter_values(self, filter_obj: QueryFilter) -> List[Any]:
+        """Parameter values bound by one filter"""
+        if filter_obj.operator in self.MULTI_VALUE_OPERATORS:
+            return list(filter_obj.value)
+        if filter_obj.operator == "like":
+            return [f"%{filter_obj.value}%"]
+        if filter_obj.operator == "prefix":
+            return [f"{filter_obj.value}%"]
+        return [filter_obj.value]
+    
     def _build_filter_clause(self, filter_obj: QueryFilter) -> str:
         """Build individual filter clause"""
-        param_placeholder = f"${len(self.params) + 1}"
-        
-        if filter_obj.operator == "eq":
-            self.params.append(filter_obj.value)
-            return f"{filter_obj.field} = {param_placeholder}"
-        elif filter_obj.operator == "ne":
-            self.params.append(filter_obj.value)
-            return f"{filter_obj.field} != {param_placeholder}"
-        elif filter_obj.operator == "gt":
-            self.params.append(filter_obj.value)
-            return f"{filter_obj.field} > {param_placeholder}"
-        elif filter_obj.operator == "lt":
-            self.params.append(filter_obj.value)
-            return f"{filter_obj.field} < {param_placeholder}"
-        elif filter_obj.operator == "gte":
-            self.params.append(filter_obj.value)
-            return f"{filter_obj.field} >= {param_placeholder}"
-        elif filter_obj.operator == "lte":
-            self.params.append(filter_obj.value)
-            return f"{filter_obj.field} <= {param_placeholder}"
-        elif filter_obj.operator == "like":
-            self.params.append(f"%{filter_obj.value}%")
-            return f"{filter_obj.field} LIKE {param_placeholder}"
-        elif filter_obj.operator == "in":
-            placeholders = []
-            for i, val in enumerate(filter_obj.value):
-                self.params.append(val)
-                placeholders.append(f"${len(self.params)}")
-            return f"{filter_obj.field} IN ({', '.join(placeholders)})"
-        elif filter_obj.operator == "not_in":
-            placeholders = []
-            for i, val in enumerate(filter_obj.value):
-                self.params.append(val)
-                placeholders.append(f"${len(self.params)}")
-            return f"{filter_obj.field} NOT IN ({', '.join(placeholders)})"
+        if filter_obj.operator in self.COMPARISON_OPERATORS:
+            placeholder = self._add_param(self._filter_values(filter_obj)[0])
+            return f"{filter_obj.field} {self.COMPARISON_OPERATORS[filter_obj.operator]} {placeholder}"
+        elif filter_obj.operator in self.MULTI_VALUE_OPERATORS:
+            placeholders = [self._add_param(value) for value in self._filter_values(filter_obj)]
+            keyword = "IN" if filter_obj.operator == "in" else "NOT IN"
+            return f"{filter_obj.field} {keyword} ({', '.join(placeholders)})"
         else:
             raise ValueError(f"Unsupported operator: {filter_obj.operator}")
     
+    def _add_param(self, value: Any) -> str:
+        """Add a parameter and return its placeholder"""
+        self.params.append(value)
+        if self.placeholder_style == "numeric":
+            return f"${len(self.params)}"
+        if self.placeholder_style == "qmark":
+            return "?"
+        return "%s"
+    
+    def _uniform_direction(self) -> Optional[str]:
+        """The single sort direction, or None when directions are mixed"""
+        directions = {sort_obj.direction.lower() for sort_obj in self.sorts}
+        return directions.pop() if len(directions) == 1 else None
+    
+    def _keyset_values(self) -> List[Any]:
+        """Parameter values of the keyset predicate, in placeholder order"""
+        if not self.seek_values:
+            return []
+        if self._uniform_direction():
+            return list(self.seek_values)
+        
+        values = []
+        for i in range(len(self.sorts)):
+            values.extend(self.seek_values[:i + 1])
+        return values
+    
+    def build_keyset_clause(self) -> str:
+        """Build the predicate selecting rows after seek_values in sort order"""
+        if not self.seek_values:
+            return ""
+        
+        if len(self.seek_values) != len(self.sorts):
+            raise ValueError("Keyset values do not match the sort columns")
+        
+        direction = self._uniform_direction()
+        if direction:
+            # Row constructor comparison can use a composite index
+            operator = ">" if direction == "asc" else "<"
+            fields = [sort_obj.field for sort_obj in self.sorts]
+            placeholders = [self._add_param(value) for value in self.seek_values]
+            return f"({', '.join(fields)}) {operator} ({', '.join(placeholders)})"
+        
+        # Mixed directions: (a > x) OR (a = x AND b < y) OR ...
+        disjuncts = []
+        for i, sort_obj in enumerate(self.sorts):
+            terms = []
+            for prev_obj, prev_value in zip(self.sorts[:i], self.seek_values[:i]):
+                terms.append(f"{prev_obj.field} = {self._add_param(prev_value)}")
+            operator = ">" if sort_obj.direction.lower() == "asc" else "<"
+            terms.append(f"{sort_obj.field} {operator} {self._add_param(self.seek_values[i])}")
+            disjuncts.append("(" + " AND ".join(terms) + ")")
+        
+        return "(" + " OR ".join(disjuncts) + ")"
+    
     def build_order_clause(self) -> str:
         """Build ORDER BY clause"""
         if not self.sorts:
@@ -287,4 +542,6 @@ class QueryBuilder:
         if not self.pagination:
             return ""
         
-        return f"LIMIT {self.pagination.limit} OFFSET {self.pagination.offset}"
\ No newline at end of file
+        limit = self._add_param(self.pagination.limit)
+        offset = self._add_param(self.pagination.offset)
+        return f"LIMIT {limit} OFFSET {offset}"
\ No newline at end of file
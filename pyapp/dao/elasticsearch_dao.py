@@ -4,62 +4,142 @@ Provides Elasticsearch-specific data access operations
 """
 
 import asyncio
-from typing import Dict, List, Any, Optional, Union
+from collections import deque
+from contextlib import aclosing
+from typing import Dict, List, Any, Optional, Union, Tuple, AsyncIterator, AsyncIterable, Iterable
 import json
 import re
 from datetime import datetime
 from elasticsearch import AsyncElasticsearch
-from elasticsearch.helpers import async_bulk
+from elasticsearch.helpers import async_streaming_bulk
 
-from .base import BaseDAO, ConnectionMixin, ValidationMixin, QueryBuilder, SearchResponse, StatResult, QueryFilter, SortOption, PaginationOptions
-from ..logger import LOG_INFO, LOG_ERROR, LOG_DEBUG
+from .base import (
+    BaseDAO, ConnectionMixin, ValidationMixin, QueryBuilder, SearchResponse, StatResult,
+    QueryFilter, SortOption, PaginationOptions, MultiSearchItem, BulkResult, TTLCache,
+    encode_cursor, decode_cursor, sort_key_of
+)
+from ..logger import LOG_INFO, LOG_ERROR, LOG_DEBUG, LOG_WARNING
 
 
-class ElasticsearchDAO(BaseDAO, ConnectionMixin, ValidationMixin):
-    """Elasticsearch Data Access Object implementation"""
+class ElasticsearchClientRegistry:
+    """Per-process registry of connected Elasticsearch clients, one per cluster config"""
     
-    def __init__(self, connection_config: Dict[str, Any]):
-        super().__init__(connection_config)
-        self.client: Optional[AsyncElasticsearch] = None
+    def __init__(self):
+        self._clients: Dict[Tuple[Any, ...], AsyncElasticsearch] = {}
+        self._lock = asyncio.Lock()
     
-    async def connect(self) -> bool:
-        """Establish Elasticsearch connection"""
-        try:
-            hosts = [self.config.get('uri', 'http://localhost:9200')]
+    @staticmethod
+    def _cluster_key(config: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Build the registry key identifying a cluster and its client settings"""
+        return (
+            tuple(ElasticsearchClientRegistry._parse_hosts(config)),
+            config.get('username') or '',
+            config.get('password') or '',
+            config.get('connections_per_node', 10),
+            config.get('request_timeout', 30.0),
+            config.get('max_retries', 3),
+            config.get('retry_on_timeout', True),
+            config.get('http_compress', False)
+        )
+    
+    @staticmethod
+    def _parse_hosts(config: Dict[str, Any]) -> List[str]:
+        """Split a comma-separated URI setting into a host list"""
+        uri = config.get('uri') or 'http://localhost:9200'
+        return [host.strip() for host in uri.split(',') if host.strip()]
+    
+    async def get_client(self, config: Dict[str, Any]) -> AsyncElasticsearch:
+        """Get the shared client for a cluster, connecting it on first use"""
+        key = self._cluster_key(config)
+        client = self._clients.get(key)
+        if client:
+            return client
+        
+        async with self._lock:
+            client = self._clients.get(key)
+            if client:
+                return client
             
             # Build authentication
             auth = None
-            username = self.config.get('username')
-            password = self.config.get('password')
+            username = config.get('username')
+            password = config.get('password')
             if username and password:
                 auth = (username, password)
             
-            self.client = AsyncElasticsearch(
-                hosts=hosts,
+            client = AsyncElasticsearch(
+                hosts=self._parse_hosts(config),
                 basic_auth=auth,
-                timeout=30,
-                max_retries=3,
-                retry_on_timeout=True
+                connections_per_node=config.get('connections_per_node', 10),
+                request_timeout=config.get('request_timeout', 30.0),
+                max_retries=config.get('max_retries', 3),
+                retry_on_timeout=config.get('retry_on_timeout', True),
+                http_compress=config.get('http_compress', False)
             )
             
-            # Test connection
-            info = await self.client.info()
+            # Test connection once per cluster
+            try:
+                info = await client.info()
+            except Exception:
+                await client.close()
+                raise
+            
             LOG_INFO(f"Elasticsearch connected successfully: {info.get('version', {}).get('number', 'unknown')}")
+            self._clients[key] = client
+            return client
+    
+    async def close_all(self) -> None:
+        """Close every registered client"""
+        async with self._lock:
+            for client in self._clients.values():
+                try:
+                    await client.close()
+                except Exception as e:
+                    LOG_ERROR(f"Failed to close Elasticsearch client: {e}")
+            self._clients.clear()
+            LOG_INFO("Elasticsearch clients closed")
+    
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+# Global Elasticsearch client registry
+es_client_registry = ElasticsearchClientRegistry()
+
+
+class ElasticsearchDAO(BaseDAO, ConnectionMixin, ValidationMixin):
+    """Elasticsearch Data Access Object implementation"""
+    
+    KEYWORD_TYPES = {'keyword', 'constant_keyword'}
+    TEXT_TYPES = {'text', 'match_only_text'}
+    RELEVANCE_QUERIES = {'match', 'match_phrase', 'match_phrase_prefix'}
+    
+    def __init__(self, connection_config: Dict[str, Any]):
+        super().__init__(connection_config)
+        self.client: Optional[AsyncElasticsearch] = None
+        self.mapping_cache = TTLCache(
+            max_size=self.config.get('mapping_cache_size', 256),
+            ttl=self.config.get('mapping_cache_ttl', 300.0)
+        )
+        # Any object with get(key) / set(key, value) / discard_if(predicate) can replace this
+        self.agg_cache = TTLCache(
+            max_size=self.config.get('agg_cache_size', 1024),
+            ttl=self.config.get('agg_cache_ttl', 60.0)
+        )
+    
+    async def connect(self) -> bool:
+        """Attach to the shared Elasticsearch client for this cluster"""
+        try:
+            self.client = await es_client_registry.get_client(self.config)
             return True
         except Exception as e:
             LOG_ERROR(f"Failed to connect to Elasticsearch: {e}")
             return False
     
     async def disconnect(self) -> bool:
-        """Close Elasticsearch connection"""
-        try:
-            if self.client:
-                await self.client.close()
-                LOG_INFO("Elasticsearch connection closed successfully")
-            return True
-        except Exception as e:
-            LOG_ERROR(f"Failed to close Elasticsearch connection: {e}")
-            return False
+        """Detach from the shared client (closed by es_client_registry.close_all)"""
+        self.client = None
+        return True
     
     async def execute_query(
         self,
@@ -93,7 +173,8 @@ class ElasticsearchDAO(BaseDAO, ConnectionMixin, ValidationMixin):
     async def insert_one(
         self,
         index: str,
-        data: Dict[str, Any]
+        data: Dict[str, Any],
+        refresh: Optional[Union[bool, str]] = None
     ) -> Optional[str]:
         """Insert a single document and return ID"""
         if not self.client:
@@ -103,10 +184,11 @@ class ElasticsearchDAO(BaseDAO, ConnectionMixin, ValidationMixin):
             response = await self.client.index(
                 index=index,
                 body=data,
-                refresh='wait_for'
+                refresh=self._refresh_policy(refresh)
             )
             
             doc_id = response.get('_id')
+            self._invalidate_aggregations(index)
             LOG_INFO(f"Inserted document with ID: {doc_id}")
             return doc_id
         except Exception as e:
@@ -116,43 +198,142 @@ class ElasticsearchDAO(BaseDAO, ConnectionMixin, ValidationMixin):
     async def insert_many(
         self,
         index: str,
-        data: List[Dict[str, Any]]
+        data: List[Dict[str, Any]],
+        refresh: Optional[Union[bool, str]] = None
     ) -> List[str]:
         """Insert multiple documents and return IDs"""
+        result = await self.bulk_insert(index, data, refresh=refresh)
+        
+        if result.errors:
+            LOG_ERROR(f"Bulk insert had {len(result.errors)} errors")
+            raise Exception(f"Bulk insert failed with {len(result.errors)} errors")
+        
+        return result.ids
+    
+    async def bulk_insert(
+        self,
+        index: str,
+        documents: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        chunk_size: Optional[int] = None,
+        max_chunk_bytes: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        refresh: Optional[Union[bool, str]] = None
+    ) -> BulkResult:
+        """
+        Stream documents into an index through concurrent bulk requests.
+        
+        Documents are pulled lazily from a sync or async iterable and split
+        into requests of at most chunk_size documents / max_chunk_bytes bytes,
+        with up to `concurrency` requests in flight. A document may carry its
+        own '_id'. Failed items are reported in BulkResult.errors rather than
+        raised. The index is refreshed once at the end only when requested.
+        """
         if not self.client:
             raise RuntimeError("Elasticsearch client not initialized")
         
-        try:
-            # Prepare bulk actions
-            actions = []
-            for doc in data:
-                action = {
-                    '_index': index,
-                    '_source': doc
-                }
-                actions.append(action)
+        chunk_size = chunk_size or self.config.get('bulk_chunk_size', 500)
+        max_chunk_bytes = max_chunk_bytes or self.config.get('bulk_max_chunk_bytes', 10 * 1024 * 1024)
+        concurrency = max(concurrency or self.config.get('bulk_concurrency', 4), 1)
+        
+        queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * chunk_size)
+        end_of_input = object()
+        ids: Dict[int, Optional[str]] = {}
+        errors: List[Dict[str, Any]] = []
+        read = {'count': 0}
+        
+        async def produce() -> None:
+            if hasattr(documents, '__aiter__'):
+                async for doc in documents:
+                    await queue.put((read['count'], self._bulk_action(index, doc)))
+                    read['count'] += 1
+            else:
+                for doc in documents:
+                    await queue.put((read['count'], self._bulk_action(index, doc)))
+                    read['count'] += 1
+            # Only after all input is queued: on failure or cancellation the consumers
+            # are cancelled instead, so a full queue with no reader cannot block here
+            for _ in range(concurrency):
+                await queue.put(end_of_input)
+        
+        async def consume() -> None:
+            # streaming_bulk reports items in the order it read them
+            positions = deque()
             
-            # Execute bulk operation
-            success_count, errors = await async_bulk(self.client, actions, refresh='wait_for')
+            async def actions():
+                while True:
+                    item = await queue.get()
+                    if item is end_of_input:
+                        return
+                    position, action = item
+                    positions.append(position)
+                    yield action
             
-            if errors:
-                LOG_ERROR(f"Bulk insert had {len(errors)} errors")
-                raise Exception(f"Bulk insert failed with {len(errors)} errors")
+            async for ok, item in async_streaming_bulk(
+                self.client,
+                actions(),
+                chunk_size=chunk_size,
+                max_chunk_bytes=max_chunk_bytes,
+                raise_on_error=False,
+                raise_on_exception=False
+            ):
+                position = positions.popleft()
+                info = next(iter(item.values()), {})
+                if ok:
+                    ids[position] = info.get('_id')
+                else:
+                    errors.append({
+                        'position': position,
+                        'status': info.get('status'),
+                        'error': info.get('error')
+                    })
+        
+        tasks = [asyncio.create_task(produce())]
+        tasks += [asyncio.create_task(consume()) for _ in range(concurrency)]
+        try:
+            await asyncio.gather(*tasks)
             
-            # Generate IDs (ES might auto-generate them)
-            doc_ids = [f"doc_{i}" for i in range(len(data))]
+            refresh = self._refresh_policy(refresh)
+            if refresh:
+                await self.client.indices.refresh(index=index)
             
-            LOG_INFO(f"Inserted {success_count} documents")
-            return doc_ids
+            result = BulkResult(
+                ids=[ids.get(position) for position in range(read['count'])],
+                errors=sorted(errors, key=lambda error: error['position'])
+            )
+            self._invalidate_aggregations(index)
+            if result.errors:
+                LOG_WARNING(f"Bulk insert into {index} had {len(result.errors)} failed items")
+            LOG_INFO(f"Bulk inserted {result.success_count} documents into {index}")
+            return result
         except Exception as e:
             LOG_ERROR(f"ES bulk insert failed: {e}")
             raise
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def _bulk_action(self, index: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a bulk index action, lifting a caller-supplied '_id'"""
+        action = {'_index': index}
+        if '_id' in doc:
+            doc = dict(doc)
+            action['_id'] = doc.pop('_id')
+        action['_source'] = doc
+        return action
+    
+    def _refresh_policy(self, refresh: Optional[Union[bool, str]]) -> Union[bool, str]:
+        """Resolve a write's refresh policy, defaulting to the configured one"""
+        if refresh is None:
+            return self.config.get('write_refresh', False)
+        return refresh
     
     async def update_one(
         self,
         index: str,
         doc_id: str,
-        data: Dict[str, Any]
+        data: Dict[str, Any],
+        refresh: Optional[Union[bool, str]] = None
     ) -> bool:
         """Update a single document"""
         if not self.client:
@@ -163,9 +344,10 @@ class ElasticsearchDAO(BaseDAO, ConnectionMixin, ValidationMixin):
                 index=index,
                 id=doc_id,
                 body={'doc': data},
-                refresh='wait_for'
+                refresh=self._refresh_policy(refresh)
             )
             
+            self._invalidate_aggregations(index)
             LOG_INFO(f"Updated document {doc_id}")
             return True
         except Exception as e:
@@ -175,7 +357,8 @@ class ElasticsearchDAO(BaseDAO, ConnectionMixin, ValidationMixin):
     async def delete_one(
         self,
         index: str,
-        doc_id: str
+        doc_id: str,
+        refresh: Optional[Union[bool, str]] = None
     ) -> bool:
         """Delete a single document"""
         if not self.client:
@@ -185,9 +368,10 @@ class ElasticsearchDAO(BaseDAO, ConnectionMixin, ValidationMixin):
             await self.client.delete(
                 index=index,
                 id=doc_id,
-                refresh='wait_for'
+                refresh=self._refresh_policy(refresh)
             )
             
+            self._invalidate_aggregations(index)
             LOG_INFO(f"Deleted document {doc_id}")
             return True
         except Exception as e:
@@ -199,41 +383,198 @@ class ElasticsearchDAO(BaseDAO, ConnectionMixin, ValidationMixin):
         index: str,
         filters: List[QueryFilter],
         sort_options: Optional[List[SortOption]] = None,
-        pagination: Optional[PaginationOptions] = None
+        pagination: Optional[PaginationOptions] = None,
+        fields: Optional[List[str]] = None,
+        scoring: bool = False,
+        track_total_hits: Optional[Union[bool, int]] = None,
+        agg_fields: Optional[List[str]] = None
     ) -> SearchResponse:
-        """Search with filters and pagination"""
+        """
+        Search with filters and pagination, returning only fields if given.
+        
+        With scoring=False (the default) every filter runs in filter context
+        and no scores are tracked; scoring=True moves text matches to must so
+        they rank hits. track_total_hits is True for an exact total, False for
+        none or an int to cap counting (total is then a lower bound); None uses
+        the configured default. Stats for agg_fields are computed in the same
+        request (or served from the aggregation cache) and returned in stats.
+        """
         if not self.client:
             raise RuntimeError("Elasticsearch client not initialized")
         
         try:
+            mapping = await self.get_field_mapping(index)
+            
+            if pagination and pagination.is_keyset:
+                return await self._search_after(
+                    index, filters, sort_options, pagination, fields,
+                    mapping, scoring, track_total_hits, agg_fields
+                )
+            
             # Build ES query
-            query_body = self._build_search_query(filters, sort_options, pagination)
+            query_body = self._build_search_query(filters, sort_options, pagination, fields, mapping, scoring)
+            self._apply_hit_tracking(query_body, scoring, track_total_hits)
+            stats, pending = self._cached_stats(index, filters, agg_fields)
+            if pending:
+                query_body['aggs'] = self._build_stats_aggs(pending)
             
             # Execute search
             response = await self.client.search(
                 index=index,
                 body=query_body
             )
-            
-            # Extract results
-            hits = []
-            for hit in response.get('hits', {}).get('hits', []):
-                source = hit.get('_source', {})
-                source['_id'] = hit.get('_id')
-                source['_score'] = hit.get('_score')
-                hits.append(source)
-            
-            total = response.get('hits', {}).get('total', {}).get('value', 0)
+            stats.update(self._collect_stats(index, filters, response, pending))
             
             return SearchResponse(
-                hits=hits,
-                total=total,
-                stats={}
+                hits=self._extract_hits(response),
+                total=self._extract_total(response),
+                stats=stats
             )
         except Exception as e:
             LOG_ERROR(f"ES search failed: {e}")
             raise
     
+    async def multi_search(self, items: List[MultiSearchItem]) -> List[SearchResponse]:
+        """Run several searches in one _msearch round trip, returning responses in order"""
+        if not self.client:
+            raise RuntimeError("Elasticsearch client not initialized")
+        
+        if not items:
+            return []
+        
+        try:
+            # Cold mappings are fetched in one get_mapping request, not one per item
+            indices = list(dict.fromkeys(item.index for item in items))
+            missing = [index for index in indices if self.mapping_cache.get(index) is None]
+            if missing:
+                await self.load_field_mappings(missing)
+            # Aliases and patterns are cached under other names, so look those up concurrently
+            mappings = dict(zip(indices, await asyncio.gather(*(self.get_field_mapping(index) for index in indices))))
+            
+            # Build header/body pairs
+            searches = []
+            for item in items:
+                query_body = self._build_search_query(
+                    item.filters, item.sort_options, item.pagination, item.fields, mappings[item.index]
+                )
+                self._apply_hit_tracking(query_body, False, None)
+                searches.append({'index': item.index})
+                searches.append(query_body)
+            
+            response = await self.client.msearch(body=searches)
+            
+            # A failing index does not fail the whole batch
+            results = []
+            for item, item_response in zip(items, response.get('responses', [])):
+                if 'error' in item_response:
+                    error = item_response['error']
+                    reason = error.get('reason', error) if isinstance(error, dict) else error
+                    LOG_ERROR(f"ES multi-search on {item.index} failed: {reason}")
+                    results.append(SearchResponse(hits=[], total=0, stats={}, error=str(reason)))
+                else:
+                    results.append(SearchResponse(
+                        hits=self._extract_hits(item_response),
+                        total=self._extract_total(item_response),
+                        stats={}
+                    ))
+            return results
+        except Exception as e:
+            LOG_ERROR(f"ES multi-search failed: {e}")
+            raise
+    
+    async def _search_after(
+        self,
+        index: str,
+        filters: List[QueryFilter],
+        sort_options: Optional[List[SortOption]],
+        pagination: PaginationOptions,
+        fields: Optional[List[str]] = None,
+        mapping: Optional[Dict[str, Dict[str, Any]]] = None,
+        scoring: bool = False,
+        track_total_hits: Optional[Union[bool, int]] = None,
+        agg_fields: Optional[List[str]] = None
+    ) -> SearchResponse:
+        """Keyset page over a point-in-time using search_after"""
+        keep_alive = self.config.get('pit_keep_alive', '1m')
+        sort_key = sort_key_of(sort_options or [])
+        
+        search_after = None
+        if pagination.cursor:
+            state = decode_cursor(pagination.cursor, sort_key, required=('pit',))
+            pit_id = state['pit']
+            search_after = state['v']
+        else:
+            pit = await self.client.open_point_in_time(index=index, keep_alive=keep_alive)
+            pit_id = pit['id']
+        
+        query_body = {
+            'query': self._build_bool_query(filters, mapping, scoring),
+            'size': pagination.limit,
+            # _shard_doc is the cheap unique tiebreaker available inside a PIT
+            'sort': self._build_sort(sort_options) + [{'_shard_doc': 'asc'}],
+            'pit': {'id': pit_id, 'keep_alive': keep_alive}
+        }
+        if search_after:
+            query_body['search_after'] = search_after
+        self._apply_projection(query_body, fields)
+        self._apply_hit_tracking(query_body, scoring, track_total_hits)
+        
+        # Stats only ride along with the first page
+        stats, pending = self._cached_stats(index, filters, agg_fields if not pagination.cursor else None)
+        if pending:
+            query_body['aggs'] = self._build_stats_aggs(pending)
+        
+        # PIT searches must not name an index
+        response = await self.client.search(body=query_body)
+        stats.update(self._collect_stats(index, filters, response, pending))
+        pit_id = response.get('pit_id', pit_id)
+        raw_hits = response.get('hits', {}).get('hits', [])
+        
+        next_cursor = None
+        if raw_hits and len(raw_hits) == pagination.limit:
+            next_cursor = encode_cursor({
+                's': sort_key,
+                'pit': pit_id,
+                'v': raw_hits[-1].get('sort')
+            })
+        else:
+            await self._close_pit(pit_id)
+        
+        return SearchResponse(
+            hits=self._extract_hits(response),
+            total=self._extract_total(response),
+            stats=stats,
+            next_cursor=next_cursor
+        )
+    
+    async def _close_pit(self, pit_id: str) -> None:
+        """Release a point-in-time, logging rather than raising on failure"""
+        try:
+            await self.client.close_point_in_time(body={'id': pit_id})
+        except Exception as e:
+            LOG_ERROR(f"Failed to close point-in-time: {e}")
+    
+    def _extract_hits(self, response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Flatten search hits into source dicts with _id and _score"""
+        hits = []
+        for hit in response.get('hits', {}).get('hits', []):
+            source = hit.get('_source', {})
+            # Doc value fields come back as lists
+            for field, values in hit.get('fields', {}).items():
+                source[field] = values[0] if len(values) == 1 else values
+            source['_id'] = hit.get('_id')
+            source['_score'] = hit.get('_score')
+            hits.append(source)
+        return hits
+    
+    def _extract_total(self, response: Dict[str, Any]) -> int:
+        """Extract the total hit count from a search response, -1 when not counted"""
+        total = response.get('hits', {}).get('total')
+        if total is None:
+            # track_total_hits=False omits the count, as opposed to zero hits
+            return -1
+        return total['value'] if isinstance(total, dict) else int(total)
+    
     async def aggregate(
         self,
         index: str,
@@ -245,27 +586,18 @@ class ElasticsearchDAO(BaseDAO, ConnectionMixin, ValidationMixin):
             raise RuntimeError("Elasticsearch client not initialized")
         
         try:
-            # Build aggregation query
+            cache_key = self._agg_cache_key(index, filters, agg_field)
+            cached = self.agg_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            # Build aggregation query: one stats agg covers all five metrics
             query_body = {
                 'size': 0,
-                'query': self._build_bool_query(filters),
-                'aggs': {
-                    'total_count': {
-                        'value_count': {'field': agg_field}
-                    },
-                    'total_sum': {
-                        'sum': {'field': agg_field}
-                    },
-                    'total_avg': {
-                        'avg': {'field': agg_field}
-                    },
-                    'total_min': {
-                        'min': {'field': agg_field}
-                    },
-                    'total_max': {
-                        'max': {'field': agg_field}
-                    }
-                }
+                # Only the aggregations are read: no scores, no hit counting
+                'track_total_hits': False,
+                'query': self._build_bool_query(filters, await self.get_field_mapping(index)),
+                'aggs': self._build_stats_aggs([agg_field])
             }
             
             # Execute aggregation
@@ -274,77 +606,180 @@ class ElasticsearchDAO(BaseDAO, ConnectionMixin, ValidationMixin):
                 body=query_body
             )
             
-            # Extract aggregation results
-            aggregations = response.get('aggregations', {})
-            
-            return StatResult(
-                count=int(aggregations.get('total_count', {}).get('value', 0)),
-                sum=float(aggregations.get('total_sum', {}).get('value', 0)),
-                average=float(aggregations.get('total_avg', {}).get('value', 0)),
-                min=float(aggregations.get('total_min', {}).get('value', 0)),
-                max=float(aggregations.get('total_max', {}).get('value', 0))
-            )
+            return self._collect_stats(index, filters, response, [agg_field])[agg_field]
         except Exception as e:
             LOG_ERROR(f"ES aggregation failed: {e}")
             raise
     
+    def _agg_cache_key(self, index: str, filters: List[QueryFilter], agg_field: str) -> Tuple[Any, ...]:
+        """Build an aggregation cache key from the index, normalized filters and field"""
+        normalized = tuple(sorted(
+            (filter_obj.field, filter_obj.operator, json.dumps(filter_obj.value, sort_keys=True, ensure_ascii=False, default=str))
+            for filter_obj in filters
+        ))
+        return (index, normalized, agg_field)
+    
+    def _cached_stats(
+        self,
+        index: str,
+        filters: List[QueryFilter],
+        agg_fields: Optional[List[str]]
+    ) -> Tuple[Dict[str, StatResult], List[str]]:
+        """Split agg_fields into cached stats and fields still to aggregate"""
+        stats = {}
+        pending = []
+        for agg_field in agg_fields or []:
+            cached = self.agg_cache.get(self._agg_cache_key(index, filters, agg_field))
+            if cached is not None:
+                stats[agg_field] = cached
+            else:
+                pending.append(agg_field)
+        return stats, pending
+    
+    def _build_stats_aggs(self, agg_fields: List[str]) -> Dict[str, Any]:
+        """Build one stats aggregation per field, named after the field"""
+        return {agg_field: {'stats': {'field': agg_field}} for agg_field in agg_fields}
+    
+    def _collect_stats(
+        self,
+        index: str,
+        filters: List[QueryFilter],
+        response: Dict[str, Any],
+        agg_fields: List[str]
+    ) -> Dict[str, StatResult]:
+        """Read stats aggregations from a response and cache them"""
+        aggregations = response.get('aggregations', {})
+        stats = {}
+        for agg_field in agg_fields:
+            agg = aggregations.get(agg_field, {})
+            # min/max/avg are null when no document has the field
+            result = StatResult(
+                count=int(agg.get('count') or 0),
+                sum=float(agg.get('sum') or 0),
+                average=float(agg.get('avg') or 0),
+                min=float(agg.get('min') or 0),
+                max=float(agg.get('max') or 0)
+            )
+            self.agg_cache.set(self._agg_cache_key(index, filters, agg_field), result)
+            stats[agg_field] = result
+        return stats
+    
+    def _invalidate_aggregations(self, index: str) -> None:
+        """Forget cached aggregations for an index after a write"""
+        self.agg_cache.discard_if(lambda key: key[0] == index)
+    
     def _build_search_query(
         self,
         filters: List[QueryFilter],
         sort_options: Optional[List[SortOption]] = None,
-        pagination: Optional[PaginationOptions] = None
+        pagination: Optional[PaginationOptions] = None,
+        fields: Optional[List[str]] = None,
+        mapping: Optional[Dict[str, Dict[str, Any]]] = None,
+        scoring: bool = False
     ) -> Dict[str, Any]:
         """Build ES search query"""
         query_body = {
-            'query': self._build_bool_query(filters),
+            'query': self._build_bool_query(filters, mapping, scoring),
             'size': pagination.limit if pagination else 100,
             'from': pagination.offset if pagination else 0
         }
         
         # Add sorting
         if sort_options:
-            sorts = []
-            for sort_obj in sort_options:
-                sort_dict = {sort_obj.field: {'order': sort_obj.direction.lower()}}
-                sorts.append(sort_dict)
-            query_body['sort'] = sorts
+            query_body['sort'] = self._build_sort(sort_options)
         
+        self._apply_projection(query_body, fields)
         return query_body
     
-    def _build_bool_query(self, filters: List[QueryFilter]) -> Dict[str, Any]:
-        """Build ES bool query from filters"""
+    def _apply_hit_tracking(
+        self,
+        query_body: Dict[str, Any],
+        scoring: bool,
+        track_total_hits: Optional[Union[bool, int]]
+    ) -> None:
+        """Set score tracking and total hit counting for a search body"""
+        query_body['track_scores'] = scoring
+        if track_total_hits is None:
+            track_total_hits = self.config.get('track_total_hits', 10000)
+        query_body['track_total_hits'] = track_total_hits
+    
+    def _apply_projection(self, query_body: Dict[str, Any], fields: Optional[List[str]]) -> None:
+        """Limit returned fields via _source filtering or docvalue_fields"""
+        if not fields:
+            return
+        
+        if self.config.get('projection') == 'docvalues':
+            # Read from columnar doc values and skip _source entirely
+            query_body['_source'] = False
+            query_body['docvalue_fields'] = list(fields)
+        else:
+            query_body['_source'] = {'includes': list(fields)}
+    
+    def _build_sort(self, sort_options: Optional[List[SortOption]]) -> List[Dict[str, Any]]:
+        """Build ES sort clauses"""
+        sorts = []
+        for sort_obj in sort_options or []:
+            sorts.append({sort_obj.field: {'order': sort_obj.direction.lower()}})
+        return sorts
+    
+    def _build_bool_query(
+        self,
+        filters: List[QueryFilter],
+        mapping: Optional[Dict[str, Dict[str, Any]]] = None,
+        scoring: bool = False
+    ) -> Dict[str, Any]:
+        """Build ES bool query from filters, in (cacheable) filter context unless scoring"""
         if not filters:
             return {'match_all': {}}
         
         must_clauses = []
+        filter_clauses = []
         
         for filter_obj in filters:
-            clause = self._build_filter_clause(filter_obj)
-            if clause:
+            clause = self._build_filter_clause(filter_obj, mapping)
+            if not clause:
+                continue
+            if scoring and next(iter(clause)) in self.RELEVANCE_QUERIES:
                 must_clauses.append(clause)
+            else:
+                filter_clauses.append(clause)
         
-        return {'bool': {'must': must_clauses}}
+        bool_query = {'filter': filter_clauses}
+        if must_clauses:
+            bool_query['must'] = must_clauses
+        return {'bool': bool_query}
     
-    def _build_filter_clause(self, filter_obj: QueryFilter) -> Optional[Dict[str, Any]]:
-        """Build individual ES filter clause"""
+    def _build_filter_clause(
+        self,
+        filter_obj: QueryFilter,
+        mapping: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Build individual ES filter clause, choosing the query type from the field mapping"""
         field = filter_obj.field
         operator = filter_obj.operator
         value = filter_obj.value
+        mapping = mapping or {}
         
         # Handle time field detection
         if self._is_time_field(field):
             value = self._convert_time_value(value)
         
+        # Time ranges arrive as {'gte': ..., 'lte': ...}
+        if isinstance(value, dict) and operator in ("eq", "like"):
+            return {'range': {field: value}}
+        
         if operator == "eq":
-            # Check if it's a numeric value
-            if isinstance(value, (int, float)):
+            if not isinstance(value, str):
                 return {'term': {field: value}}
-            else:
-                # Use wildcard for string values to support partial matching
-                return {'wildcard': {field: f"*{value}*"}}
+            
+            keyword_field = self._keyword_field(field, mapping)
+            if keyword_field:
+                return {'term': {keyword_field: value}}
+            # Analyzed or unmapped field: exact phrase instead of a wildcard scan
+            return {'match_phrase': {field: value}}
         
         elif operator == "ne":
-            return {'bool': {'must_not': {'term': {field: value}}}}
+            return {'bool': {'must_not': {'term': {self._keyword_field(field, mapping) or field: value}}}}
         
         elif operator == "gt":
             return {'range': {field: {'gt': value}}}
@@ -359,18 +794,138 @@ class ElasticsearchDAO(BaseDAO, ConnectionMixin, ValidationMixin):
             return {'range': {field: {'lte': value}}}
         
         elif operator == "like":
-            return {'wildcard': {field: f"*{value}*"}}
+            return self._build_substring_clause(field, str(value), mapping)
+        
+        elif operator == "prefix":
+            keyword_field = self._keyword_field(field, mapping)
+            if keyword_field or field not in mapping:
+                return {'prefix': {keyword_field or field: value}}
+            return {'match_phrase_prefix': {field: value}}
         
         elif operator == "in":
-            return {'terms': {field: value}}
+            return {'terms': {self._keyword_field(field, mapping) or field: value}}
         
         elif operator == "not_in":
-            return {'bool': {'must_not': {'terms': {field: value}}}}
+            return {'bool': {'must_not': {'terms': {self._keyword_field(field, mapping) or field: value}}}}
         
         else:
             LOG_WARNING(f"Unsupported operator: {operator}")
             return None
     
+    def _build_substring_clause(
+        self,
+        field: str,
+        value: str,
+        mapping: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Build a substring match without a leading-wildcard term scan where the mapping allows"""
+        props = mapping.get(field)
+        
+        # Unmapped fields: phrase match on the field as given
+        if props is None:
+            return {'match_phrase': {field: value}}
+        
+        # n-gram analyzed (sub)field: substrings are indexed terms
+        ngram_field = self._find_field(field, props, self._is_ngram_field)
+        if ngram_field:
+            return {'match_phrase': {ngram_field: value}}
+        
+        # wildcard-typed (sub)field: built for infix matching
+        wildcard_field = self._find_field(field, props, lambda p: p.get('type') == 'wildcard')
+        if wildcard_field:
+            return {'wildcard': {wildcard_field: {'value': f"*{value}*"}}}
+        
+        # Analyzed text: phrase match (per-character for CJK analyzers)
+        if props.get('type') in self.TEXT_TYPES:
+            return {'match_phrase': {field: value}}
+        
+        # Plain keyword only: a leading wildcard is the sole exact option
+        LOG_DEBUG(f"No n-gram or wildcard subfield for {field}, using a wildcard query")
+        return {'wildcard': {field: {'value': f"*{value}*"}}}
+    
+    def _keyword_field(self, field: str, mapping: Dict[str, Dict[str, Any]]) -> Optional[str]:
+        """Resolve the keyword (sub)field used for exact matching"""
+        props = mapping.get(field)
+        if props is None:
+            return None
+        return self._find_field(field, props, lambda p: p.get('type') in self.KEYWORD_TYPES)
+    
+    def _find_field(self, field: str, props: Dict[str, Any], predicate) -> Optional[str]:
+        """Return the field or its first multi-field matching predicate"""
+        if predicate(props):
+            return field
+        for sub_name, sub_props in props.get('fields', {}).items():
+            if predicate(sub_props):
+                return f"{field}.{sub_name}"
+        return None
+    
+    def _is_ngram_field(self, props: Dict[str, Any]) -> bool:
+        """Check if a field is analyzed with an n-gram analyzer"""
+        if props.get('type') not in self.TEXT_TYPES:
+            return False
+        analyzer = str(props.get('analyzer', ''))
+        return 'ngram' in analyzer.lower()
+    
+    async def get_field_mapping(self, index: str) -> Dict[str, Dict[str, Any]]:
+        """Get flattened field mappings (dotted path -> properties), cached per index"""
+        mapping = self.mapping_cache.get(index)
+        if mapping is not None:
+            return mapping
+        
+        response = await self.get_mapping(index)
+        mapping = {}
+        # Index patterns and aliases return one mapping per concrete index
+        for index_data in getattr(response, 'body', response).values():
+            properties = index_data.get('mappings', {}).get('properties', {})
+            self._flatten_properties(properties, '', mapping)
+        
+        # Failed lookups are retried sooner
+        self.mapping_cache.set(index, mapping, ttl=None if mapping else 30.0)
+        return mapping
+    
+    async def load_field_mappings(
+        self,
+        indices: List[str],
+        batch_size: int = 50
+    ) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Fetch flattened field mappings of many indices in few requests, priming the mapping cache"""
+        if not self.client:
+            raise RuntimeError("Elasticsearch client not initialized")
+        
+        mappings = {}
+        try:
+            # Batched to keep the index list within the HTTP request line limit
+            for i in range(0, len(indices), batch_size):
+                response = await self.client.indices.get_mapping(
+                    index=",".join(indices[i:i + batch_size]),
+                    ignore_unavailable=True,
+                    allow_no_indices=True
+                )
+                for index, index_data in getattr(response, 'body', response).items():
+                    mapping = {}
+                    self._flatten_properties(index_data.get('mappings', {}).get('properties', {}), '', mapping)
+                    mappings[index] = mapping
+                    self.mapping_cache.set(index, mapping)
+            
+            LOG_DEBUG(f"Loaded mappings for {len(mappings)} indices")
+            return mappings
+        except Exception as e:
+            LOG_ERROR(f"Failed to load mappings: {e}")
+            raise
+    
+    def _flatten_properties(
+        self,
+        properties: Dict[str, Any],
+        prefix: str,
+        out: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """Flatten nested mapping properties into dotted paths"""
+        for name, props in properties.items():
+            path = f"{prefix}{name}"
+            out.setdefault(path, props)
+            if 'properties' in props:
+                self._flatten_properties(props['properties'], f"{path}.", out)
+    
     def _is_time_field(self, field_name: str) -> bool:
         """Check if field is a time field"""
         time_fields = {
@@ -466,6 +1021,7 @@ class ElasticsearchDAO(BaseDAO, ConnectionMixin, ValidationMixin):
         if not self.client:
             raise RuntimeError("Elasticsearch client not initialized")
         
+        scroll_id = None
         try:
             all_hits = []
             
@@ -495,11 +1051,111 @@ class ElasticsearchDAO(BaseDAO, ConnectionMixin, ValidationMixin):
                 if not hits:
                     break
             
-            # Clear scroll
-            if scroll_id:
-                await self.client.clear_scroll(scroll_id=scroll_id)
-            
             return [hit.get('_source', {}) for hit in all_hits]
         except Exception as e:
             LOG_ERROR(f"Scroll search failed: {e}")
-            raise
\ No newline at end of file
+            raise
+        finally:
+            # Clear scroll, also on error or cancellation
+            if scroll_id:
+                try:
+                    await self.client.clear_scroll(scroll_id=scroll_id)
+                except Exception as e:
+                    LOG_ERROR(f"Failed to clear scroll: {e}")
+    
+    async def search_iter(
+        self,
+        index: str,
+        filters: List[QueryFilter],
+        fields: Optional[List[str]] = None,
+        batch_size: int = 1000,
+        slices: int = 1
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream hits matching filters in batches (see scroll_search_iter)"""
+        query = {'query': self._build_bool_query(filters, await self.get_field_mapping(index))}
+        if fields:
+            query['_source'] = {'includes': list(fields)}
+        
+        async with aclosing(self.scroll_search_iter(index, query, batch_size=batch_size, slices=slices)) as batches:
+            async for batch in batches:
+                yield batch
+    
+    async def scroll_search_iter(
+        self,
+        index: str,
+        query: Dict[str, Any],
+        batch_size: int = 1000,
+        slices: int = 1,
+        keep_alive: str = '2m'
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Stream hits in batches over a point-in-time using search_after.
+        
+        With slices > 1 the PIT is scanned by parallel sliced searches. Batches
+        are handed over through a bounded queue, so slow consumers pause the
+        scan and memory stays within about 2 * slices * batch_size hits. The
+        PIT is closed when iteration ends, fails or is cancelled; wrap the
+        iterator in contextlib.aclosing() when breaking out early.
+        """
+        if not self.client:
+            raise RuntimeError("Elasticsearch client not initialized")
+        
+        slices = max(slices, 1)
+        pit = await self.client.open_point_in_time(index=index, keep_alive=keep_alive)
+        pit_state = {'id': pit['id']}
+        queue: asyncio.Queue = asyncio.Queue(maxsize=slices)
+        slice_done = object()
+        
+        async def scan_slice(slice_id: int) -> None:
+            search_after = None
+            try:
+                while True:
+                    body = {
+                        'query': query.get('query', {'match_all': {}}),
+                        'size': batch_size,
+                        'sort': [{'_shard_doc': 'asc'}],
+                        'pit': {'id': pit_state['id'], 'keep_alive': keep_alive},
+                        'track_total_hits': False
+                    }
+                    if '_source' in query:
+                        body['_source'] = query['_source']
+                    if slices > 1:
+                        body['slice'] = {'id': slice_id, 'max': slices}
+                    if search_after:
+                        body['search_after'] = search_after
+                    
+                    response = await self.client.search(body=body)
+                    pit_state['id'] = response.get('pit_id', pit_state['id'])
+                    raw_hits = response.get('hits', {}).get('hits', [])
+                    if not raw_hits:
+                        break
+                    
+                    search_after = raw_hits[-1].get('sort')
+                    # Blocks while the consumer is behind (back-pressure)
+                    await queue.put(self._extract_hits(response))
+                    
+                    if len(raw_hits) < batch_size:
+                        break
+                await queue.put(slice_done)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await queue.put(e)
+        
+        workers = [asyncio.create_task(scan_slice(i)) for i in range(slices)]
+        try:
+            finished = 0
+            while finished < len(workers):
+                item = await queue.get()
+                if item is slice_done:
+                    finished += 1
+                elif isinstance(item, Exception):
+                    LOG_ERROR(f"Streaming scroll failed: {item}")
+                    raise item
+                else:
+                    yield item
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await self._close_pit(pit_state['id'])
\ No newline at end of file
@@ -4,23 +4,65 @@ Provides MySQL-specific data access operations
 """
 
 import asyncio
-from typing import Dict, List, Any, Optional, Union
+import os
+import re
+import tempfile
+from contextlib import asynccontextmanager
+from dataclasses import replace
+from enum import Enum
+from typing import Dict, List, Any, Optional, Union, AsyncIterator, Tuple
 import aiomysql
 from datetime import datetime
 
-from .base import BaseDAO, ConnectionMixin, ValidationMixin, QueryBuilder, SearchResponse, StatResult, QueryFilter, SortOption, PaginationOptions
-from ..logger import LOG_INFO, LOG_ERROR, LOG_DEBUG
+from .base import (
+    BaseDAO, ConnectionMixin, ValidationMixin, QueryBuilder, SearchResponse, StatResult,
+    QueryFilter, SortOption, PaginationOptions, BulkResult, RowBatch, PoolMetrics, TTLCache,
+    encode_cursor, decode_cursor, sort_key_of
+)
+from ..logger import LOG_INFO, LOG_ERROR, LOG_DEBUG, LOG_WARNING
+
+
+class CountStrategy(str, Enum):
+    """How MySQLDAO.search computes the total hit count"""
+    EXACT = "exact"  # COUNT(*) OVER() in the page query (MySQL 8.0+)
+    ESTIMATED = "estimated"  # optimizer row estimate from EXPLAIN / INFORMATION_SCHEMA
+    NONE = "none"  # no count, total is -1
 
 
 class MySQLDAO(BaseDAO, ConnectionMixin, ValidationMixin):
     """MySQL Data Access Object implementation"""
     
+    TOTAL_COLUMN = "_search_total"
+    PACKET_HEADROOM = 1024  # bytes kept free below max_allowed_packet
+    LOAD_DATA_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'})
+    IDENTIFIER_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+    
     def __init__(self, connection_config: Dict[str, Any]):
         super().__init__(connection_config)
         self.pool = None
+        self.count_cache = TTLCache(
+            max_size=self.config.get('count_cache_size', 1024),
+            ttl=self.config.get('count_cache_ttl', 60.0)
+        )
+        self.schema_cache = TTLCache(
+            max_size=self.config.get('schema_cache_size', 256),
+            ttl=self.config.get('schema_cache_ttl', 300.0)
+        )
+        # SQL text keyed by query shape; values are always bound as parameters
+        self.query_cache = TTLCache(
+            max_size=self.config.get('query_cache_size', 512),
+            ttl=float('inf')
+        )
+        self.metrics = PoolMetrics(
+            minsize=self.config.get('minsize', 1),
+            maxsize=self.config.get('maxsize', 10)
+        )
     
     async def connect(self) -> bool:
         """Establish MySQL connection pool"""
+        if self.pool:
+            return True
+        
         try:
             self.pool = await aiomysql.create_pool(
                 host=self.config.get('address', 'localhost'),
@@ -29,8 +71,10 @@ class MySQLDAO(BaseDAO, ConnectionMixin, ValidationMixin):
                 password=self.config.get('password', ''),
                 db=self.config.get('dbname', 'uec'),
                 charset=self.config.get('charset', 'utf8mb4'),
-                minsize=1,
-                maxsize=10,
+                minsize=self.metrics.minsize,
+                maxsize=self.metrics.maxsize,
+                pool_recycle=self.config.get('pool_recycle', -1),
+                local_infile=self.config.get('local_infile', False),
                 autocommit=True
             )
             LOG_INFO("MySQL connection pool created successfully")
@@ -45,23 +89,76 @@ class MySQLDAO(BaseDAO, ConnectionMixin, ValidationMixin):
             if self.pool:
                 self.pool.close()
                 await self.pool.wait_closed()
+                self.pool = None
                 LOG_INFO("MySQL connection pool closed successfully")
             return True
         except Exception as e:
             LOG_ERROR(f"Failed to close MySQL connection pool: {e}")
             return False
     
+    @asynccontextmanager
+    async def lease(self, timeout: Optional[float] = None) -> AsyncIterator[aiomysql.Connection]:
+        """Lease a health-checked connection from the shared pool"""
+        if not self.pool:
+            raise RuntimeError("MySQL connection pool not initialized")
+        
+        loop = asyncio.get_running_loop()
+        if timeout is None:
+            timeout = self.config.get('acquire_timeout', 10.0)
+        
+        started = loop.time()
+        try:
+            conn = await asyncio.wait_for(self.pool.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self.metrics.acquire_timeouts += 1
+            LOG_ERROR(f"Timed out after {timeout}s waiting for a MySQL connection")
+            raise
+        
+        waited = loop.time() - started
+        self.metrics.acquisitions += 1
+        self.metrics.wait_time_total += waited
+        self.metrics.wait_time_max = max(self.metrics.wait_time_max, waited)
+        
+        try:
+            await self._check_connection(conn)
+            yield conn
+        finally:
+            self.pool.release(conn)
+    
+    async def _check_connection(self, conn: aiomysql.Connection) -> None:
+        """Ping connections that have been idle longer than the health check interval"""
+        interval = self.config.get('health_check_interval', 30)
+        if interval < 0:
+            return
+        
+        if asyncio.get_running_loop().time() - conn.last_usage < interval:
+            return
+        
+        try:
+            await conn.ping(reconnect=True)
+        except Exception as e:
+            self.metrics.health_check_failures += 1
+            LOG_ERROR(f"MySQL connection health check failed: {e}")
+            conn.close()
+            raise
+    
+    def get_pool_metrics(self) -> PoolMetrics:
+        """Get a snapshot of the connection pool metrics"""
+        metrics = replace(self.metrics)
+        if self.pool:
+            metrics.size = self.pool.size
+            metrics.idle = self.pool.freesize
+            metrics.in_use = self.pool.size - self.pool.freesize
+        return metrics
+    
     async def execute_query(
         self,
         query: str,
         params: Optional[List[Any]] = None
     ) -> List[Dict[str, Any]]:
         """Execute a query and return results"""
-        if not self.pool:
-            raise RuntimeError("MySQL connection pool not initialized")
-        
         try:
-            async with self.pool.acquire() as conn:
+            async with self.lease() as conn:
                 async with conn.cursor(aiomysql.DictCursor) as cursor:
                     LOG_DEBUG(f"Executing query: {query}")
                     LOG_DEBUG(f"Query params: {params}")
@@ -75,17 +172,81 @@ class MySQLDAO(BaseDAO, ConnectionMixin, ValidationMixin):
             LOG_ERROR(f"Query execution failed: {e}")
             raise
     
+    async def iter_query(
+        self,
+        query: str,
+        params: Optional[List[Any]] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream query results as batches of dict rows through a server-side cursor"""
+        async for _, rows in self._stream_query(query, params, batch_size, aiomysql.SSDictCursor):
+            yield rows
+    
+    async def iter_query_tuples(
+        self,
+        query: str,
+        params: Optional[List[Any]] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[RowBatch]:
+        """Stream query results as batches of tuple rows with a shared column header"""
+        columns = None
+        async for cursor, rows in self._stream_query(query, params, batch_size, aiomysql.SSCursor):
+            if columns is None:
+                columns = tuple(column[0] for column in cursor.description)
+            yield RowBatch(columns=columns, rows=rows)
+    
+    async def _stream_query(
+        self,
+        query: str,
+        params: Optional[List[Any]],
+        batch_size: int,
+        cursor_class: type
+    ) -> AsyncIterator[Tuple[aiomysql.Cursor, List[Any]]]:
+        """
+        Run a query on an unbuffered cursor and yield (cursor, rows) per fetchmany batch.
+        
+        Rows are read from the socket as the consumer asks for them, so memory
+        stays at one batch. The connection is held until iteration ends; wrap
+        the iterator in contextlib.aclosing() when breaking out early.
+        """
+        streamed = 0
+        exhausted = False
+        try:
+            async with self.lease() as conn:
+                cursor = await conn.cursor(cursor_class)
+                try:
+                    LOG_DEBUG(f"Streaming query: {query}")
+                    LOG_DEBUG(f"Query params: {params}")
+                    
+                    await cursor.execute(query, params or [])
+                    while True:
+                        rows = await cursor.fetchmany(batch_size)
+                        if not rows:
+                            exhausted = True
+                            break
+                        streamed += len(rows)
+                        yield cursor, rows
+                finally:
+                    if exhausted:
+                        await cursor.close()
+                    else:
+                        # Draining an abandoned unbuffered result would read it all;
+                        # drop the connection instead and let the pool discard it
+                        conn.close()
+            
+            LOG_DEBUG(f"Streamed {streamed} rows")
+        except Exception as e:
+            LOG_ERROR(f"Streaming query failed: {e}")
+            raise
+    
     async def execute_update(
         self,
         query: str,
         params: Optional[List[Any]] = None
     ) -> int:
         """Execute an update/delete operation and return affected rows"""
-        if not self.pool:
-            raise RuntimeError("MySQL connection pool not initialized")
-        
         try:
-            async with self.pool.acquire() as conn:
+            async with self.lease() as conn:
                 async with conn.cursor() as cursor:
                     LOG_DEBUG(f"Executing update: {query}")
                     LOG_DEBUG(f"Update params: {params}")
@@ -118,11 +279,12 @@ class MySQLDAO(BaseDAO, ConnectionMixin, ValidationMixin):
         """
         
         try:
-            async with self.pool.acquire() as conn:
+            async with self.lease() as conn:
                 async with conn.cursor() as cursor:
                     await cursor.execute(query, values)
                     record_id = cursor.lastrowid
                     
+                    self._invalidate_counts(table)
                     LOG_INFO(f"Inserted record with ID: {record_id}")
                     return str(record_id)
         except Exception as e:
@@ -133,35 +295,189 @@ class MySQLDAO(BaseDAO, ConnectionMixin, ValidationMixin):
         self,
         table: str,
         data: List[Dict[str, Any]]
-    ) -> List[str]:
-        """Insert multiple records and return IDs"""
+    ) -> List[Optional[str]]:
+        """Insert multiple records and return IDs, None where a generated ID is unknown (see bulk_insert)"""
+        result = await self.bulk_insert(table, data)
+        return result.ids
+    
+    async def bulk_insert(
+        self,
+        table: str,
+        data: List[Dict[str, Any]],
+        use_load_data: bool = False,
+        batch_size: int = 10000
+    ) -> BulkResult:
+        """
+        Insert many records in batches, one transaction per batch.
+        
+        By default each batch is a multi-row INSERT packed up to the server's
+        max_allowed_packet. With use_load_data the rows are rendered as TSV and
+        sent with LOAD DATA LOCAL INFILE, batch_size rows at a time (requires
+        local_infile on both client and server). All records must have the same
+        keys. Without local_infile enabled, use_load_data falls back to INSERT.
+        IDs are the explicit 'id' values when given, otherwise derived
+        from LAST_INSERT_ID() and @@auto_increment_increment; they are None
+        where the server does not guarantee consecutive values.
+        """
         if not data:
-            return []
+            return BulkResult()
         
         columns = list(data[0].keys())
-        placeholders = ['%s'] * len(columns)
-        values_list = [[row.get(col) for col in columns] for row in data]
+        # A key missing from the first record would be dropped, and its 'id' misreported
+        keys = set(columns)
+        for position, record in enumerate(data):
+            if record.keys() != keys:
+                raise ValueError(f"Record {position} has keys {sorted(record)}, expected {sorted(columns)}")
+        quoted_table = self._quote_identifier(table)
+        column_list = ", ".join(self._quote_identifier(col) for col in columns)
+        rows = [tuple(record.get(col) for col in columns) for record in data]
         
-        query = f"""
-            INSERT INTO {table} ({', '.join(columns)})
-            VALUES ({', '.join(placeholders)})
-        """
+        if use_load_data and not self.config.get('local_infile', False):
+            LOG_WARNING("local_infile is disabled, bulk loading with INSERT instead of LOAD DATA")
+            use_load_data = False
         
         try:
-            async with self.pool.acquire() as conn:
+            ids = []
+            async with self.lease() as conn:
                 async with conn.cursor() as cursor:
-                    await cursor.executemany(query, values_list)
-                    record_id = cursor.lastrowid
+                    await cursor.execute(
+                        "SELECT @@max_allowed_packet, @@auto_increment_increment, @@innodb_autoinc_lock_mode"
+                    )
+                    max_packet, increment, lock_mode = await cursor.fetchone()
                     
-                    # Generate IDs for bulk insert
-                    record_ids = [str(record_id + i) for i in range(len(data))]
+                    if use_load_data:
+                        batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+                    else:
+                        batches = self._pack_insert_batches(conn, rows, max_packet - self.PACKET_HEADROOM)
                     
-                    LOG_INFO(f"Inserted {len(data)} records")
-                    return record_ids
+                    for batch in batches:
+                        await conn.begin()
+                        try:
+                            if use_load_data:
+                                first_id, affected = await self._load_data_batch(
+                                    cursor, quoted_table, column_list, batch
+                                )
+                                # LOAD DATA is a "bulk insert": interleaved lock mode may leave gaps
+                                consecutive = lock_mode < 2 and affected == len(batch)
+                            else:
+                                values = ", ".join(batch)
+                                await cursor.execute(
+                                    f"INSERT INTO {quoted_table} ({column_list}) VALUES {values}"
+                                )
+                                first_id, consecutive = cursor.lastrowid, True
+                            await conn.commit()
+                        except Exception:
+                            await conn.rollback()
+                            raise
+                        
+                        ids.extend(self._batch_ids(
+                            data[len(ids):len(ids) + len(batch)], first_id, increment, consecutive
+                        ))
+            
+            self._invalidate_counts(table)
+            if None in ids:
+                LOG_WARNING(f"Bulk insert into {table} could not resolve all generated IDs")
+            LOG_INFO(f"Bulk inserted {len(ids)} records into {table}")
+            return BulkResult(ids=ids)
         except Exception as e:
             LOG_ERROR(f"Bulk insert failed: {e}")
             raise
     
+    def _pack_insert_batches(
+        self,
+        conn: aiomysql.Connection,
+        rows: List[tuple],
+        max_bytes: int
+    ) -> List[List[str]]:
+        """Render rows as escaped VALUES tuples and pack them into packet-sized batches"""
+        batches = []
+        batch, batch_bytes = [], 0
+        for row in rows:
+            literal = conn.escape(row)
+            literal_bytes = len(literal.encode('utf-8')) + 2  # ", " separator
+            if batch and batch_bytes + literal_bytes > max_bytes:
+                batches.append(batch)
+                batch, batch_bytes = [], 0
+            batch.append(literal)
+            batch_bytes += literal_bytes
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    async def _load_data_batch(
+        self,
+        cursor: aiomysql.Cursor,
+        quoted_table: str,
+        column_list: str,
+        rows: List[tuple]
+    ) -> Tuple[int, int]:
+        """Send rows with LOAD DATA LOCAL INFILE and return (first generated ID, rows loaded)"""
+        payload = "".join(
+            "\t".join(self._load_data_value(value) for value in row) + "\n" for row in rows
+        )
+        
+        # The driver streams LOCAL INFILE from a named file; mkstemp creates it owner-only (0600)
+        fd, path = tempfile.mkstemp(suffix='.tsv', dir=self._load_data_dir())
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as infile:
+                infile.write(payload)
+            await cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {quoted_table} "
+                f"CHARACTER SET {self.config.get('charset', 'utf8mb4')} ({column_list})",
+                [path]
+            )
+            return cursor.lastrowid, cursor.rowcount
+        finally:
+            os.unlink(path)
+    
+    def _load_data_dir(self) -> str:
+        """Private directory for LOAD DATA files, created owner-only (0700)"""
+        directory = self.config.get('load_data_dir') or os.path.join(
+            tempfile.gettempdir(), f"pyapp-load-data-{os.getuid()}"
+        )
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        
+        # The records must not be readable by other users, nor the directory swapped by one
+        info = os.stat(directory)
+        if info.st_uid != os.getuid() or info.st_mode & 0o077:
+            raise PermissionError(f"LOAD DATA directory {directory} must be owned by this user with mode 0700")
+        return directory
+    
+    def _load_data_value(self, value: Any) -> str:
+        """Render one value in LOAD DATA's default tab-separated format"""
+        if value is None:
+            return "\\N"
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        return str(value).translate(self.LOAD_DATA_ESCAPES)
+    
+    def _batch_ids(
+        self,
+        records: List[Dict[str, Any]],
+        first_id: int,
+        increment: int,
+        consecutive: bool
+    ) -> List[Optional[str]]:
+        """Resolve the IDs of one inserted batch"""
+        # Explicit IDs can move the auto-increment counter mid-batch
+        if any(record.get('id') is not None for record in records):
+            consecutive = False
+        
+        ids = []
+        generated = 0
+        for record in records:
+            if record.get('id') is not None:
+                ids.append(str(record['id']))
+            elif first_id and consecutive:
+                # A multi-row INSERT reserves one block of auto-increment values
+                ids.append(str(first_id + generated * increment))
+                generated += 1
+            else:
+                ids.append(None)
+        return ids
+    
     async def update_one(
         self,
         table: str,
@@ -184,6 +500,7 @@ class MySQLDAO(BaseDAO, ConnectionMixin, ValidationMixin):
         
         try:
             affected_rows = await self.execute_update(query, values)
+            self._invalidate_counts(table)
             return affected_rows > 0
         except Exception as e:
             LOG_ERROR(f"Update failed: {e}")
@@ -199,6 +516,7 @@ class MySQLDAO(BaseDAO, ConnectionMixin, ValidationMixin):
         
         try:
             affected_rows = await self.execute_update(query, [record_id])
+            self._invalidate_counts(table)
             return affected_rows > 0
         except Exception as e:
             LOG_ERROR(f"Delete failed: {e}")
@@ -209,54 +527,162 @@ class MySQLDAO(BaseDAO, ConnectionMixin, ValidationMixin):
         table: str,
         filters: List[QueryFilter],
         sort_options: Optional[List[SortOption]] = None,
-        pagination: Optional[PaginationOptions] = None
+        pagination: Optional[PaginationOptions] = None,
+        fields: Optional[List[str]] = None,
+        count_strategy: Union[CountStrategy, str] = CountStrategy.EXACT
     ) -> SearchResponse:
-        """Search with filters and pagination"""
+        """Search with filters and pagination, counting hits per count_strategy"""
+        strategy = CountStrategy(count_strategy)
+        keyset = pagination is not None and pagination.is_keyset
         builder = QueryBuilder()
         
         # Add filters
         for filter_obj in filters:
             builder.add_filter(filter_obj.field, filter_obj.operator, filter_obj.value)
         
+        # Keyset pagination needs a unique tiebreaker as the last sort column
+        sorts = list(sort_options or [])
+        if keyset:
+            tiebreaker = self.config.get('keyset_tiebreaker', 'id')
+            if not any(sort_obj.field == tiebreaker for sort_obj in sorts):
+                sorts.append(SortOption(tiebreaker, sorts[-1].direction if sorts else "asc"))
+        
         # Add sorting
-        if sort_options:
-            for sort_obj in sort_options:
-                builder.add_sort(sort_obj.field, sort_obj.direction)
+        for sort_obj in sorts:
+            builder.add_sort(sort_obj.field, sort_obj.direction)
         
         # Add pagination
+        offset = 0
         if pagination:
-            builder.paginate(pagination.offset, pagination.limit)
+            offset = 0 if keyset else pagination.offset
+            builder.paginate(offset, pagination.limit)
         
-        # Build query
-        where_clause = builder.build_where_clause()
-        order_clause = builder.build_order_clause()
-        pagination_clause = builder.build_pagination_clause()
+        if keyset and pagination.cursor:
+            state = decode_cursor(pagination.cursor, sort_key_of(sorts))
+            builder.seek_after(state['v'])
         
-        query = f"""
-            SELECT * FROM {table}
-            {where_clause}
-            {order_clause}
-            {pagination_clause}
-        """
+        # Reuse the count of a recently seen filter set
+        count_params = builder.filter_params()
+        count_key = (table, builder.filter_shape(), tuple(count_params), strategy.value)
+        total = None
+        if strategy != CountStrategy.NONE:
+            total = self.count_cache.get(count_key)
+        counted = total is None  # a cached count keeps its original expiry
+        
+        # Select only the requested columns (plus keyset sort columns)
+        columns = "*"
+        if fields:
+            projected = list(fields)
+            if keyset:
+                projected += [sort_obj.field for sort_obj in sorts]
+            columns = ", ".join(self._quote_identifier(name) for name in dict.fromkeys(projected))
+        
+        # Count in the same round trip as the page when needed
+        windowed = strategy == CountStrategy.EXACT and total is None and builder.seek_values is None
+        
+        # Hot query shapes skip SQL string building
+        query_key = ('search', table, columns, windowed, builder.shape())
+        query = self.query_cache.get(query_key)
+        if query is None:
+            query = self._compile_search(builder, table, columns, windowed)
+            self.query_cache.set(query_key, query)
         
         # Execute query
-        results = await self.execute_query(query, builder.params)
+        results = await self.execute_query(query, builder.collect_params())
         
-        # Get total count
-        count_query = f"""
-            SELECT COUNT(*) as total FROM {table}
-            {where_clause}
-        """
+        if windowed and results:
+            total = results[0][self.TOTAL_COLUMN]
+            for row in results:
+                del row[self.TOTAL_COLUMN]
+        elif windowed and offset == 0:
+            total = 0
+        elif strategy == CountStrategy.EXACT and total is None:
+            # Pages past the end and keyset pages carry no window total
+            total = await self._count_exact(table, self._where_clause(builder), count_params)
+        elif strategy == CountStrategy.ESTIMATED and total is None:
+            total = await self._count_estimated(table, self._where_clause(builder), count_params)
+        
+        if strategy == CountStrategy.NONE:
+            total = -1
+        elif counted:
+            self.count_cache.set(count_key, total)
         
-        count_result = await self.execute_query(count_query, builder.params)
-        total = count_result[0]['total'] if count_result else 0
+        # Hand out a cursor while full pages keep coming
+        next_cursor = None
+        if keyset and results and len(results) == pagination.limit:
+            next_cursor = encode_cursor({
+                's': sort_key_of(sorts),
+                'v': [results[-1].get(sort_obj.field) for sort_obj in sorts]
+            })
         
         return SearchResponse(
             hits=results,
             total=total,
-            stats={}
+            stats={},
+            next_cursor=next_cursor
         )
     
+    def _compile_search(self, builder: QueryBuilder, table: str, columns: str, windowed: bool) -> str:
+        """Build the SQL text of a search page query"""
+        where_clause = builder.build_where_clause()
+        if builder.seek_values is not None:
+            seek_clause = builder.build_keyset_clause()
+            where_clause = f"{where_clause} AND {seek_clause}" if where_clause else f"WHERE {seek_clause}"
+        
+        select_list = f"{columns}, COUNT(*) OVER() AS {self.TOTAL_COLUMN}" if windowed else columns
+        
+        return f"""
+            SELECT {select_list} FROM {table}
+            {where_clause}
+            {builder.build_order_clause()}
+            {builder.build_pagination_clause()}
+        """
+    
+    def _where_clause(self, builder: QueryBuilder) -> str:
+        """WHERE clause text for the builder's filters, cached by filter shape"""
+        key = ('where', builder.placeholder_style, builder.filter_shape())
+        where_clause = self.query_cache.get(key)
+        if where_clause is None:
+            where_builder = QueryBuilder(builder.placeholder_style)
+            where_builder.filters = builder.filters
+            where_clause = where_builder.build_where_clause()
+            self.query_cache.set(key, where_clause)
+        return where_clause
+    
+    def _quote_identifier(self, name: str) -> str:
+        """Validate and backtick-quote a column name"""
+        if not self.IDENTIFIER_PATTERN.match(name):
+            raise ValueError(f"Invalid column name: {name}")
+        return f"`{name}`"
+    
+    async def _count_exact(self, table: str, where_clause: str, params: List[Any]) -> int:
+        """Count matching rows with a separate COUNT(*) query"""
+        count_query = f"""
+            SELECT COUNT(*) as total FROM {table}
+            {where_clause}
+        """
+        
+        count_result = await self.execute_query(count_query, params)
+        return count_result[0]['total'] if count_result else 0
+    
+    async def _count_estimated(self, table: str, where_clause: str, params: List[Any]) -> int:
+        """Estimate matching rows from optimizer statistics"""
+        if not where_clause:
+            query = """
+                SELECT TABLE_ROWS as total
+                FROM INFORMATION_SCHEMA.TABLES
+                WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+            """
+            result = await self.execute_query(query, [self.config.get('dbname'), table])
+            return int(result[0]['total'] or 0) if result else 0
+        
+        result = await self.execute_query(f"EXPLAIN SELECT * FROM {table} {where_clause}", params)
+        return int(result[0].get('rows') or 0) if result else 0
+    
+    def _invalidate_counts(self, table: str) -> None:
+        """Forget cached counts for a table after a write"""
+        self.count_cache.discard_if(lambda key: key[0] == table)
+    
     async def aggregate(
         self,
         table: str,
@@ -270,22 +696,24 @@ class MySQLDAO(BaseDAO, ConnectionMixin, ValidationMixin):
         for filter_obj in filters:
             builder.add_filter(filter_obj.field, filter_obj.operator, filter_obj.value)
         
-        where_clause = builder.build_where_clause()
-        
         # Build aggregation query
-        query = f"""
-            SELECT 
-                COUNT({agg_field}) as count,
-                SUM({agg_field}) as sum,
-                AVG({agg_field}) as average,
-                MIN({agg_field}) as min,
-                MAX({agg_field}) as max
-            FROM {table}
-            {where_clause}
-        """
+        query_key = ('aggregate', table, agg_field, builder.filter_shape())
+        query = self.query_cache.get(query_key)
+        if query is None:
+            query = f"""
+                SELECT 
+                    COUNT({agg_field}) as count,
+                    SUM({agg_field}) as sum,
+                    AVG({agg_field}) as average,
+                    MIN({agg_field}) as min,
+                    MAX({agg_field}) as max
+                FROM {table}
+                {self._where_clause(builder)}
+            """
+            self.query_cache.set(query_key, query)
         
         try:
-            result = await self.execute_query(query, builder.params)
+            result = await self.execute_query(query, builder.filter_params())
             
             if result:
                 row = result[0]
@@ -303,7 +731,11 @@ class MySQLDAO(BaseDAO, ConnectionMixin, ValidationMixin):
             raise
     
     async def get_table_schema(self, table_name: str) -> List[Dict[str, Any]]:
-        """Get table schema information"""
+        """Get table schema information, cached for schema_cache_ttl"""
+        cached = self.schema_cache.get(('schema', table_name))
+        if cached is not None:
+            return cached
+        
         query = """
             SELECT 
                 COLUMN_NAME as column_name,
@@ -317,10 +749,16 @@ class MySQLDAO(BaseDAO, ConnectionMixin, ValidationMixin):
             ORDER BY ORDINAL_POSITION
         """
         
-        return await self.execute_query(query, [self.config.get('dbname'), table_name])
+        schema = await self.execute_query(query, [self.config.get('dbname'), table_name])
+        self.schema_cache.set(('schema', table_name), schema)
+        return schema
     
     async def get_table_list(self) -> List[Dict[str, Any]]:
-        """Get list of tables in database"""
+        """Get list of tables in database, cached for schema_cache_ttl"""
+        cached = self.schema_cache.get(('tables',))
+        if cached is not None:
+            return cached
+        
         query = """
             SELECT 
                 TABLE_NAME as table_name,
@@ -330,15 +768,14 @@ class MySQLDAO(BaseDAO, ConnectionMixin, ValidationMixin):
             ORDER BY TABLE_NAME
         """
         
-        return await self.execute_query(query, [self.config.get('dbname')])
+        tables = await self.execute_query(query, [self.config.get('dbname')])
+        self.schema_cache.set(('tables',), tables)
+        return tables
     
     async def execute_transaction(self, operations: List[Dict[str, Any]]) -> bool:
         """Execute multiple operations in a transaction"""
-        if not self.pool:
-            raise RuntimeError("MySQL connection pool not initialized")
-        
         try:
-            async with self.pool.acquire() as conn:
+            async with self.lease() as conn:
                 async with conn.cursor() as cursor:
                     # Start transaction
                     await conn.begin()
@@ -354,13 +791,13 @@ class MySQLDAO(BaseDAO, ConnectionMixin, ValidationMixin):
                         await conn.commit()
                         LOG_INFO("Transaction completed successfully")
                         return True
-                        
+                    
                     except Exception as e:
                         # Rollback transaction
                         await conn.rollback()
                         LOG_ERROR(f"Transaction failed, rolled back: {e}")
                         raise
-                        
+        
         except Exception as e:
             LOG_ERROR(f"Transaction execution failed: {e}")
             raise
@@ -377,5 +814,6 @@ class MySQLDAO(BaseDAO, ConnectionMixin, ValidationMixin):
         backup_query = f"CREATE TABLE {backup_table} AS SELECT * FROM {table_name}"
         await self.execute_update(backup_query)
         
+        self.schema_cache.discard_if(lambda key: key in (('tables',), ('schema', backup_table)))
         LOG_INFO(f"Table {table_name} backed up to {backup_table}")
         return True
\ No newline at end of file
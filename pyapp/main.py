@@ -5,19 +5,24 @@ FastAPI application with AI agent capabilities
 
 import asyncio
 import os
-from contextlib import asynccontextmanager
+import uuid
+from contextlib import asynccontextmanager, aclosing
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, AsyncIterator
+import orjson
 import uvicorn
 
 from .conf import settings
 from .logger import LOG_INFO, LOG_ERROR, LOG_DEBUG
 from .dao import db_manager
 from .service import initialize_services, shutdown_services
-from .agent import initialize_agents, shutdown_agents, process_message
+from .agent import (
+    initialize_agents, shutdown_agents, process_message, process_message_stream,
+    get_agent, AgentResponse
+)
 from .service import execute_mcp_tool
 
 
@@ -27,11 +32,13 @@ class ChatRequest(BaseModel):
     message: str = Field(..., description="User message")
     agent_name: Optional[str] = Field("query_assistant_agent", description="Agent name to use")
     context: Optional[Dict[str, Any]] = Field(None, description="Additional context")
+    session_id: Optional[str] = Field(None, description="Conversation ID from a previous response (new conversation if omitted)")
 
 
 class ChatResponse(BaseModel):
     """Chat response model"""
     response: str = Field(..., description="Assistant response")
+    session_id: str = Field(..., description="Conversation ID to send with follow-up messages")
     tool_calls: List[Dict[str, Any]] = Field(default_factory=list, description="Tool calls made")
     usage_stats: Optional[Dict[str, Any]] = Field(None, description="Usage statistics")
 
@@ -54,6 +61,11 @@ class HealthResponse(BaseModel):
     status: str = Field(..., description="Application status")
     services: Dict[str, str] = Field(default_factory=dict, description="Service statuses")
     agents: Dict[str, str] = Field(default_factory=dict, description="Agent statuses")
+    pools: Dict[str, Dict[str, Any]] = Field(default_factory=dict, description="Connection pool metrics")
+    caches: Dict[str, Dict[str, Any]] = Field(default_factory=dict, description="Result cache metrics")
+    coalescing: Dict[str, Any] = Field(default_factory=dict, description="Tool call de-duplication metrics")
+    tool_output: Dict[str, Dict[str, Any]] = Field(default_factory=dict, description="Tool output tokens before/after shaping")
+    response_caches: Dict[str, Dict[str, Any]] = Field(default_factory=dict, description="Agent answer cache metrics")
 
 
 @asynccontextmanager
@@ -79,7 +91,7 @@ async def lifespan(app: FastAPI):
             LOG_ERROR("Failed to initialize agents")
         
         LOG_INFO("Application started successfully")
-        
+    
     except Exception as e:
         LOG_ERROR(f"Failed to start application: {e}")
         raise
@@ -100,7 +112,7 @@ async def lifespan(app: FastAPI):
         await db_manager.close_all()
         
         LOG_INFO("Application shutdown successfully")
-        
+    
     except Exception as e:
         LOG_ERROR(f"Error during shutdown: {e}")
 
@@ -150,16 +162,36 @@ async def health_check():
             service_status[service_name] = "initialized" if service and service.is_initialized() else "not_initialized"
         
         # Check agent status
-        from .agent import agent_registry
+        from .agent import agent_registry, tool_output_shaper
         agent_status = {}
+        response_cache_status = {}
         for agent_name in agent_registry.list_agents():
             agent = agent_registry.get_agent(agent_name)
             agent_status[agent_name] = "initialized" if agent and agent.is_initialized() else "not_initialized"
+            if getattr(agent, "response_cache", None):
+                response_cache_status[agent_name] = agent.response_cache.metrics.to_dict()
+        
+        # Check connection pools
+        pool_status = {
+            name: metrics.to_dict()
+            for name, metrics in db_manager.get_pool_metrics().items()
+        }
+        
+        # Check result caches
+        from .service import mcp_service
+        cache_status = service_registry.get_cache_metrics()
+        if mcp_service.cache:
+            cache_status[mcp_service.config.service_name] = mcp_service.cache.metrics.to_dict()
         
         return HealthResponse(
             status="healthy",
             services=service_status,
-            agents=agent_status
+            agents=agent_status,
+            pools=pool_status,
+            caches=cache_status,
+            coalescing=mcp_service.get_coalescing_metrics(),
+            tool_output=tool_output_shaper.get_metrics(),
+            response_caches=response_cache_status
         )
     
     except Exception as e:
@@ -175,32 +207,82 @@ async def health_check():
 async def chat_endpoint(request: ChatRequest):
     """Chat endpoint for interacting with AI agents"""
     try:
+        session_id = request.session_id or uuid.uuid4().hex
+        
         # Process message with agent
         response = await process_message(
             message=request.message,
             agent_name=request.agent_name,
-            context=request.context
+            context=request.context,
+            session_id=session_id
         )
         
-        # Convert tool calls to dict format
-        tool_calls = []
-        for tool_call in response.tool_calls:
-            tool_calls.append({
-                "tool_name": tool_call.tool_name,
-                "parameters": tool_call.parameters
-            })
-        
-        return ChatResponse(
-            response=response.message.content,
-            tool_calls=tool_calls,
-            usage_stats=response.usage_stats
-        )
+        return _chat_response(response, session_id)
     
     except Exception as e:
         LOG_ERROR(f"Chat endpoint failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _chat_response(response: AgentResponse, session_id: str) -> ChatResponse:
+    """Convert an agent response to the API model"""
+    # Convert tool calls to dict format
+    tool_calls = []
+    for tool_call in response.tool_calls:
+        tool_calls.append({
+            "tool_name": tool_call.tool_name,
+            "parameters": tool_call.parameters
+        })
+    
+    return ChatResponse(
+        response=response.message.content,
+        session_id=session_id,
+        tool_calls=tool_calls,
+        usage_stats=response.usage_stats
+    )
+
+
+def _sse_event(event: str, data: Any) -> bytes:
+    """Encode one server-sent event"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data, default=str) + b"\n\n"
+
+
+async def _stream_chat(request: ChatRequest, session_id: str) -> AsyncIterator[bytes]:
+    """Relay agent events as SSE until the run finishes or the client leaves"""
+    events = process_message_stream(
+        message=request.message,
+        agent_name=request.agent_name,
+        context=request.context,
+        session_id=session_id
+    )
+    # A client disconnect cancels this generator; closing the agent stream
+    # then cancels its in-flight LLM call and tools
+    async with aclosing(events) as iterator:
+        try:
+            async for event in iterator:
+                if event.response is not None:
+                    yield _sse_event(event.event, _chat_response(event.response, session_id).model_dump())
+                else:
+                    yield _sse_event(event.event, event.data)
+        except Exception as e:
+            LOG_ERROR(f"Chat stream failed: {e}")
+            yield _sse_event("error", {"message": str(e)})
+
+
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Chat endpoint streaming tokens, tool calls and usage as server-sent events"""
+    if not get_agent(request.agent_name):
+        raise HTTPException(status_code=404, detail=f"Agent not found: {request.agent_name}")
+    
+    session_id = request.session_id or uuid.uuid4().hex
+    return StreamingResponse(
+        _stream_chat(request, session_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Session-ID": session_id}
+    )
+
+
 @app.post("/api/tool", response_model=ToolResponse)
 async def tool_endpoint(request: ToolRequest):
     """Tool execution endpoint"""
@@ -225,13 +307,26 @@ async def list_tools():
     try:
         from .service import mcp_service
         tools = await mcp_service.list_available_tools()
-        return {"tools": tools}
+        return {"tools": tools, "version": mcp_service.get_catalog().version}
     
     except Exception as e:
         LOG_ERROR(f"List tools failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/tools/reload")
+async def reload_tools():
+    """Re-fetch the MCP tool list; agents pick up a new version on their next message"""
+    try:
+        from .service import mcp_service
+        catalog = await mcp_service.reload_catalog()
+        return {"tools": catalog.names(), "version": catalog.version}
+    
+    except Exception as e:
+        LOG_ERROR(f"Reload tools failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/agents")
 async def list_agents():
     """List available agents"""
@@ -249,13 +344,11 @@ async def list_agents():
 async def list_tables():
     """List available data tables"""
     try:
-        from .dao import DAOFactory
-        mysql_dao = DAOFactory.create_mysql_dao()
+        from .dao import get_dao
         
-        # Connect and get tables
-        await mysql_dao.connect()
+        # Use the shared connection pool
+        mysql_dao = await get_dao('mysql')
         tables = await mysql_dao.get_table_list()
-        await mysql_dao.disconnect()
         
         return {"tables": tables}
     
@@ -268,18 +361,72 @@ class QueryRequest(BaseModel):
     """Data query request model"""
     table_name: str = Field(..., description="Table name to query")
     filters: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Query filters")
-    limit: int = Field(100, description="Result limit")
-    offset: int = Field(0, description="Result offset")
+    limit: int = Field(100, gt=0, description="Result limit")
+    offset: int = Field(0, ge=0, description="Result offset")
+    keyset: bool = Field(False, description="Use keyset pagination (returns next_cursor)")
+    cursor: Optional[str] = Field(None, description="next_cursor from the previous page")
+    stream: Optional[str] = Field(None, description="Stream up to limit hits as 'ndjson' or 'json' (array)")
+    fields: Optional[List[str]] = Field(None, description="Fields to return (default: all)")
+
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+STREAM_BATCH_SIZE = 1000
+
+
+def _dump_hit(hit: Dict[str, Any]) -> bytes:
+    """Serialize a hit with orjson, stringifying unsupported values"""
+    return orjson.dumps(hit, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+async def _stream_hits(
+    batches: AsyncIterator[List[Dict[str, Any]]],
+    first_batch: Optional[List[Dict[str, Any]]],
+    stream_format: str,
+    limit: int
+) -> AsyncIterator[bytes]:
+    """Encode DAO batches, starting with the already fetched first one, as NDJSON lines or one chunked JSON array"""
+    sent = 0
+    async with aclosing(batches) as iterator:
+        if stream_format == "json":
+            yield b"["
+        
+        batch = first_batch
+        while batch is not None:
+            batch = batch[:limit - sent]
+            if stream_format == "ndjson":
+                yield b"".join(_dump_hit(hit) + b"\n" for hit in batch)
+            else:
+                chunk = b",".join(_dump_hit(hit) for hit in batch)
+                yield (b"," + chunk) if sent and chunk else chunk
+            
+            sent += len(batch)
+            if sent >= limit:
+                break
+            batch = await anext(iterator, None)
+        
+        if stream_format == "json":
+            yield b"]"
 
 
 @app.post("/api/query")
 async def query_data(request: QueryRequest):
     """Query data endpoint"""
     try:
-        from .dao import DAOFactory, QueryFilter, PaginationOptions
+        from .dao import get_dao, QueryFilter, PaginationOptions
+        
+        if request.stream:
+            if request.stream not in STREAM_MEDIA_TYPES:
+                raise ValueError(f"Unsupported stream format: {request.stream}")
+            # A stream always starts at the first hit
+            if request.offset or request.keyset or request.cursor:
+                raise ValueError("offset, keyset and cursor cannot be combined with stream")
         
-        # Create DAO
-        dao = DAOFactory.create_dao("elasticsearch")
+        # Use the shared, connected Elasticsearch client
+        dao = await get_dao("elasticsearch")
         
         # Convert filters to QueryFilter objects
         filters = []
@@ -287,23 +434,45 @@ async def query_data(request: QueryRequest):
             if value is not None:
                 filters.append(QueryFilter(field, "eq", value))
         
+        # Stream straight from the DAO iterator, skipping the response model
+        if request.stream:
+            batches = dao.search_iter(
+                request.table_name,
+                filters,
+                fields=request.fields,
+                batch_size=min(request.limit, STREAM_BATCH_SIZE)
+            )
+            # Fetch the first batch before the 200 goes out, so a missing index
+            # or a failed point-in-time open is still reported as an error status
+            first_batch = await anext(batches, None)
+            return StreamingResponse(
+                _stream_hits(batches, first_batch, request.stream, request.limit),
+                media_type=STREAM_MEDIA_TYPES[request.stream]
+            )
+        
         # Create pagination
         pagination = PaginationOptions(
             offset=request.offset,
-            limit=request.limit
+            limit=request.limit,
+            keyset=request.keyset,
+            cursor=request.cursor
         )
         
         # Execute search
-        result = await dao.search(request.table_name, filters, pagination=pagination)
+        result = await dao.search(request.table_name, filters, pagination=pagination, fields=request.fields)
         
-        return {
+        return ORJSONResponse({
             "data": result.hits,
             "total": result.total,
             "page": (request.offset // request.limit) + 1,
             "size": request.limit,
-            "total_pages": (result.total + request.limit - 1) // request.limit
-        }
+            # A negative total means the hits were not counted
+            "total_pages": (result.total + request.limit - 1) // request.limit if result.total >= 0 else None,
+            "next_cursor": result.next_cursor
+        })
     
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         LOG_ERROR(f"Query endpoint failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
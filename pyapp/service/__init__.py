@@ -13,13 +13,27 @@ from .base import (
     ServiceRegistry,
     service_registry
 )
+from .cache import (
+    ResultCache,
+    CacheMetrics,
+    SingleFlight,
+    redis_holder
+)
 from .mcp_service import (
     MCPServiceImplementation,
+    ToolSpec,
+    ToolCatalog,
     mcp_service,
     register_mcp_tools,
     execute_mcp_tool,
     mcp_tool
 )
+from .schema_catalog import (
+    SchemaCatalogService,
+    TableDefinition,
+    ColumnDefinition,
+    schema_catalog
+)
 from .modules.zxyc_tools import (
     ZXYCDataService,
     zxyc_service,
@@ -40,13 +54,27 @@ __all__ = [
     'ServiceRegistry',
     'service_registry',
     
+    # Result cache
+    'ResultCache',
+    'CacheMetrics',
+    'SingleFlight',
+    'redis_holder',
+    
     # MCP Service
     'MCPServiceImplementation',
+    'ToolSpec',
+    'ToolCatalog',
     'mcp_service',
     'register_mcp_tools',
     'execute_mcp_tool',
     'mcp_tool',
     
+    # Schema catalog
+    'SchemaCatalogService',
+    'TableDefinition',
+    'ColumnDefinition',
+    'schema_catalog',
+    
     # ZXYC Services
     'ZXYCDataService',
     'zxyc_service',
@@ -57,12 +85,12 @@ __all__ = [
 async def initialize_services() -> bool:
     """Initialize all services"""
     try:
+        # Register MCP tools (and their services) before initializing them
+        await register_mcp_tools()
+        
         # Initialize service registry
         success = await service_registry.initialize_all()
         
-        # Register MCP tools
-        await register_mcp_tools()
-        
         return success
     except Exception as e:
         from ..logger import LOG_ERROR
@@ -73,7 +101,9 @@ async def initialize_services() -> bool:
 async def shutdown_services() -> bool:
     """Shutdown all services"""
     try:
-        return await service_registry.shutdown_all()
+        success = await service_registry.shutdown_all()
+        await redis_holder.close()
+        return success
     except Exception as e:
         from ..logger import LOG_ERROR
         LOG_ERROR(f"Failed to shutdown services: {e}")
@@ -9,7 +9,8 @@ from dataclasses import dataclass
 from datetime import datetime
 import json
 
-from ..dao.base import SearchResponse, StatResult, QueryFilter, SortOption, PaginationOptions
+from ..dao.base import SearchResponse, StatResult, QueryFilter, SortOption, PaginationOptions, MultiSearchItem
+from .cache import ResultCache, create_result_cache
 from ..logger import LOG_INFO, LOG_ERROR, LOG_DEBUG
 
 
@@ -30,8 +31,10 @@ class SearchResult:
     total: int
     page: int
     size: int
-    total_pages: int
+    total_pages: int  # -1 when total was not counted
     stats: Optional[Dict[str, StatResult]] = None
+    next_cursor: Optional[str] = None
+    error: Optional[str] = None
 
 
 @dataclass
@@ -50,6 +53,9 @@ class BaseService(ABC):
     def __init__(self, config: ServiceConfig):
         self.config = config
         self._initialized = False
+        self.cache: Optional[ResultCache] = None
+        if config.cache_enabled:
+            self.cache = create_result_cache(config.service_name, config.cache_ttl)
     
     async def initialize(self) -> bool:
         """Initialize service"""
@@ -131,43 +137,102 @@ class DataService(BaseService):
         super().__init__(config)
         self.dao_type = dao_type
         self._dao = None
+        self.data_version = 0  # bumped on every write, lets caches of derived answers notice
     
     async def _on_initialize(self) -> None:
         """Initialize data service"""
         from ..dao import get_dao
         self._dao = await get_dao(self.dao_type)
     
+    async def _on_shutdown(self) -> None:
+        """Shutdown data service (the shared DAO is closed by the database manager)"""
+        self._dao = None
+    
     async def search_data(
         self,
         index: str,
         filters: List[QueryFilter],
         sort_options: Optional[List[SortOption]] = None,
-        pagination: Optional[PaginationOptions] = None
+        pagination: Optional[PaginationOptions] = None,
+        fields: Optional[List[str]] = None
     ) -> SearchResult:
-        """Search data with filters and pagination"""
+        """Search data with filters and pagination, returning only fields if given"""
         if not self._dao:
             raise RuntimeError("Service not initialized")
         
+        async def run_search() -> SearchResult:
+            response = await self._dao.search(index, filters, sort_options, pagination, fields=fields)
+            return self._to_search_result(response, pagination)
+        
         try:
-            response = await self._dao.search(index, filters, sort_options, pagination)
-            
-            # Calculate pagination info
-            page = (pagination.offset // pagination.limit) + 1 if pagination else 1
-            size = pagination.limit if pagination else len(response.hits)
-            total_pages = (response.total + size - 1) // size if size > 0 else 1
+            # Keyset pages carry a point-in-time that expires long before a cached page would
+            if not self.cache or (pagination and pagination.is_keyset):
+                return await run_search()
             
-            return SearchResult(
-                items=response.hits,
-                total=response.total,
-                page=page,
-                size=size,
-                total_pages=total_pages,
-                stats=response.stats
+            params = {
+                'index': index,
+                'filters': filters,
+                'sort_options': sort_options,
+                'pagination': pagination,
+                'fields': fields
+            }
+            return await self.cache.get_or_compute(
+                'search_data', params, run_search, decode=self._decode_search_result
             )
         except Exception as e:
             LOG_ERROR(f"Search failed: {e}")
             raise
     
+    def _decode_search_result(self, data: Dict[str, Any]) -> SearchResult:
+        """Rebuild a search result read back from the shared cache"""
+        stats = data.get('stats')
+        if stats:
+            data['stats'] = {name: StatResult(**stat) for name, stat in stats.items()}
+        return SearchResult(**data)
+    
+    async def multi_search_data(self, items: List[MultiSearchItem]) -> List[SearchResult]:
+        """Run several searches in one round trip (DAOs with multi_search only)"""
+        if not self._dao:
+            raise RuntimeError("Service not initialized")
+        
+        if not hasattr(self._dao, 'multi_search'):
+            raise NotImplementedError(f"DAO {self.dao_type} does not support multi-search")
+        
+        try:
+            responses = await self._dao.multi_search(items)
+            return [
+                self._to_search_result(response, item.pagination)
+                for item, response in zip(items, responses)
+            ]
+        except Exception as e:
+            LOG_ERROR(f"Multi-search failed: {e}")
+            raise
+    
+    def _to_search_result(
+        self,
+        response: SearchResponse,
+        pagination: Optional[PaginationOptions]
+    ) -> SearchResult:
+        """Convert a DAO search response to a paginated search result"""
+        # Calculate pagination info
+        page = (pagination.offset // pagination.limit) + 1 if pagination else 1
+        size = pagination.limit if pagination else len(response.hits)
+        if response.total < 0:
+            total_pages = -1  # not counted
+        else:
+            total_pages = (response.total + size - 1) // size if size > 0 else 1
+        
+        return SearchResult(
+            items=response.hits,
+            total=response.total,
+            page=page,
+            size=size,
+            total_pages=total_pages,
+            stats=response.stats,
+            next_cursor=response.next_cursor,
+            error=response.error
+        )
+    
     async def get_by_id(
         self,
         index: str,
@@ -197,6 +262,7 @@ class DataService(BaseService):
         
         try:
             record_id = await self._dao.insert_one(index, data)
+            await self._clear_cache()
             return self.create_success_result(
                 data={"id": record_id},
                 message="Record created successfully"
@@ -217,6 +283,7 @@ class DataService(BaseService):
         
         try:
             success = await self._dao.update_one(index, record_id, data)
+            await self._clear_cache()
             if success:
                 return self.create_success_result(
                     data={"id": record_id},
@@ -239,6 +306,7 @@ class DataService(BaseService):
         
         try:
             success = await self._dao.delete_one(index, record_id)
+            await self._clear_cache()
             if success:
                 return self.create_success_result(
                     data={"id": record_id},
@@ -250,6 +318,16 @@ class DataService(BaseService):
             LOG_ERROR(f"Delete record failed: {e}")
             return self.create_error_result(f"Failed to delete record: {str(e)}")
     
+    async def _clear_cache(self) -> None:
+        """Invalidate cached results after a write, in both cache tiers"""
+        self.data_version += 1
+        if self.cache:
+            try:
+                await self.cache.invalidate()
+            except Exception as e:
+                # The write itself went through; callers must not retry it blindly
+                raise RuntimeError(f"written, but cached results may be stale: {e}") from e
+    
     async def aggregate_data(
         self,
         index: str,
@@ -386,6 +464,18 @@ class ServiceRegistry:
         
         return success
     
+    def get_cache_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Result cache metrics of every service with caching enabled"""
+        return {
+            name: service.cache.metrics.to_dict()
+            for name, service in self._services.items()
+            if service.cache
+        }
+    
+    def get_data_version(self) -> int:
+        """Combined write counter of all data services"""
+        return sum(getattr(service, 'data_version', 0) for service in self._services.values())
+    
     def list_services(self) -> List[str]:
         """List all registered services"""
         return list(self._services.keys())
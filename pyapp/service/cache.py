@@ -0,0 +1,333 @@
+"""
+Service Layer - Result Cache
+Two-tier (in-process LRU + Redis) cache for tool and search results
+"""
+
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Callable, Awaitable, Hashable, Tuple
+
+import orjson
+
+from ..dao.base import TTLCache
+from ..conf import settings
+from ..logger import LOG_INFO, LOG_ERROR, LOG_WARNING
+
+
+_MISSING = object()
+
+
+def canonical_key(name: str, params: Any) -> str:
+    """Stable hash of (name, params); dict key order does not matter"""
+    payload = orjson.dumps(
+        [name, params],
+        option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        default=str
+    )
+    return f"{name}:{hashlib.sha256(payload).hexdigest()}"
+
+
+@dataclass
+class CacheMetrics:
+    """Result cache hit/miss counters"""
+    local_hits: int = 0
+    remote_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0  # callers that waited on an identical in-flight fill
+    remote_errors: int = 0
+    
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups answered from either tier"""
+        hits = self.local_hits + self.remote_hits
+        lookups = hits + self.misses
+        return hits / lookups if lookups else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert metrics to a plain dict"""
+        return {
+            'local_hits': self.local_hits,
+            'remote_hits': self.remote_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'remote_errors': self.remote_errors,
+            'hit_rate': round(self.hit_rate, 4)
+        }
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers share its result"""
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.coalesced_by_group: Dict[str, int] = {}
+    
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        group: Optional[str] = None
+    ) -> Any:
+        """Await fn(), or the identical call already in flight for key"""
+        self.calls += 1
+        task = self._calls.get(key)
+        if task is None:
+            # A separate task, so a cancelled caller does not cancel the others
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+            if group is not None:
+                self.coalesced_by_group[group] = self.coalesced_by_group.get(group, 0) + 1
+        return await asyncio.shield(task)
+    
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        """Drop a finished call so the next caller starts a fresh one"""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # retrieved, even when every caller went away
+    
+    def in_flight(self) -> int:
+        """Number of calls currently running"""
+        return len(self._calls)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert counters to a plain dict"""
+        return {
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'in_flight': self.in_flight(),
+            'by_group': dict(self.coalesced_by_group)
+        }
+
+
+class ResultCache:
+    """
+    Two-tier result cache: an in-process LRU in front of an optional Redis.
+    
+    Keys are a hash of the canonical JSON of (name, params), so dict order
+    does not matter. Concurrent misses on one key run the computation once.
+    Redis failures only cost a miss. Cached values are shared between callers
+    and must be treated as read-only.
+    
+    Keys also carry the namespace's generation. invalidate() bumps it with
+    INCR in Redis, so entries cached before a write are never read again
+    from either tier; other workers pick up the new generation within
+    generation_check_interval seconds. If the INCR fails the namespace's
+    keys are deleted instead, and if that fails too invalidate() raises.
+    """
+    
+    def __init__(
+        self,
+        namespace: str,
+        max_size: int = 1024,
+        ttl: float = 300.0,
+        redis_client: Any = None,
+        key_prefix: str = "pyapp:cache:",
+        generation_check_interval: float = 1.0
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = TTLCache(max_size=max_size, ttl=ttl)
+        self.redis = redis_client
+        self.key_prefix = key_prefix
+        self.metrics = CacheMetrics()
+        self._flights = SingleFlight()
+        self.generation = 0
+        self.generation_check_interval = generation_check_interval
+        self._generation_checked_at: Optional[float] = None
+    
+    @property
+    def generation_key(self) -> str:
+        """Redis counter of the namespace's invalidations"""
+        return f"{self.key_prefix}{self.namespace}:generation"
+    
+    def make_key(self, name: str, params: Any) -> str:
+        """Canonical cache key for a call in the current generation"""
+        return f"{self.key_prefix}{self.namespace}:{self.generation}:{canonical_key(name, params)}"
+    
+    async def get_or_compute(
+        self,
+        name: str,
+        params: Any,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        decode: Optional[Callable[[Any], Any]] = None
+    ) -> Any:
+        """Return the cached result of a call, computing and storing it on a miss"""
+        await self._sync_generation()
+        key = self.make_key(name, params)
+        ttl = self.ttl if ttl is None else ttl
+        
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self.metrics.local_hits += 1
+            return value
+        
+        value = await self._flights.do(key, lambda: self._fill(key, compute, ttl, decode))
+        self.metrics.coalesced = self._flights.coalesced
+        return value
+    
+    async def _fill(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: float,
+        decode: Optional[Callable[[Any], Any]]
+    ) -> Any:
+        """Fill the local tier from Redis or from the computation"""
+        raw, remaining = await self._remote_get(key)
+        if raw is not None:
+            self.metrics.remote_hits += 1
+            value = decode(raw) if decode else raw
+            self.local.set(key, value, ttl=min(ttl, remaining) if remaining else ttl)
+            return value
+        
+        self.metrics.misses += 1
+        value = await compute()
+        self.local.set(key, value, ttl=ttl)
+        await self._remote_set(key, value, ttl)
+        return value
+    
+    async def _remote_get(self, key: str) -> Tuple[Any, Optional[float]]:
+        """Read a value and its remaining TTL (seconds) from Redis"""
+        if not self.redis:
+            return None, None
+        
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.get(key)
+                pipe.pttl(key)
+                raw, pttl = await pipe.execute()
+            if raw is None:
+                return None, None
+            return orjson.loads(raw), (pttl / 1000 if pttl and pttl > 0 else None)
+        except Exception as e:
+            self.metrics.remote_errors += 1
+            LOG_WARNING(f"Redis cache read failed: {e}")
+            return None, None
+    
+    async def _remote_set(self, key: str, value: Any, ttl: float) -> None:
+        """Write a value to Redis with expiry"""
+        if not self.redis:
+            return
+        
+        try:
+            await self.redis.set(key, orjson.dumps(value, default=str), px=max(int(ttl * 1000), 1))
+        except Exception as e:
+            self.metrics.remote_errors += 1
+            LOG_WARNING(f"Redis cache write failed: {e}")
+    
+    async def invalidate(self) -> None:
+        """Make every cached result of the namespace unreachable, here and in Redis"""
+        self.local.clear()
+        if not self.redis:
+            self.generation += 1
+            return
+        
+        try:
+            self._set_generation(await self.redis.incr(self.generation_key))
+            self._generation_checked_at = time.monotonic()
+            return
+        except Exception as e:
+            self.metrics.remote_errors += 1
+            LOG_WARNING(f"Redis cache generation bump failed, deleting the namespace keys instead: {e}")
+        
+        try:
+            await self._delete_remote_entries()
+        except Exception as e:
+            self.metrics.remote_errors += 1
+            LOG_ERROR(f"Redis cache invalidation failed, cached results may be stale: {e}")
+            raise
+    
+    async def _delete_remote_entries(self, batch_size: int = 500) -> None:
+        """Delete the namespace's cached results from Redis, keeping its generation counter"""
+        generation_keys = (self.generation_key, self.generation_key.encode())
+        keys = [
+            key async for key in self.redis.scan_iter(match=f"{self.key_prefix}{self.namespace}:*", count=batch_size)
+            if key not in generation_keys
+        ]
+        for i in range(0, len(keys), batch_size):
+            await self.redis.delete(*keys[i:i + batch_size])
+    
+    async def _sync_generation(self) -> None:
+        """Pick up invalidations made by other workers, at most once per check interval"""
+        if not self.redis:
+            return
+        
+        now = time.monotonic()
+        if self._generation_checked_at is not None and now - self._generation_checked_at < self.generation_check_interval:
+            return
+        self._generation_checked_at = now
+        
+        try:
+            raw = await self.redis.get(self.generation_key)
+        except Exception as e:
+            self.metrics.remote_errors += 1
+            LOG_WARNING(f"Redis cache generation read failed: {e}")
+            return
+        self._set_generation(int(raw or 0))
+    
+    def _set_generation(self, generation: int) -> None:
+        """Switch to a generation, dropping local entries of the old one"""
+        if generation != self.generation:
+            self.generation = generation
+            self.local.clear()
+    
+    def clear_local(self) -> None:
+        """Drop the in-process tier"""
+        self.local.clear()
+
+
+class RedisClientHolder:
+    """Lazily created Redis client shared by all result caches"""
+    
+    def __init__(self):
+        self._client = None
+    
+    def get_client(self) -> Any:
+        """Get the shared client, or None when Redis is disabled"""
+        if self._client is None and settings.redis.enable and settings.redis.address:
+            import redis.asyncio as aioredis
+            self._client = aioredis.Redis(
+                host=settings.redis.address,
+                port=settings.redis.port or 6379,
+                password=settings.redis.password or None,
+                db=int(settings.redis.dbname or 0),
+                socket_timeout=settings.cache.redis_timeout,
+                socket_connect_timeout=settings.cache.redis_timeout
+            )
+            LOG_INFO(f"Redis result cache at {settings.redis.address}:{settings.redis.port or 6379}")
+        return self._client
+    
+    async def close(self) -> None:
+        """Close the shared client"""
+        if self._client is not None:
+            try:
+                await self._client.close()
+            except Exception as e:
+                LOG_ERROR(f"Failed to close Redis client: {e}")
+            finally:
+                self._client = None
+
+
+# Global Redis client holder
+redis_holder = RedisClientHolder()
+
+
+def create_result_cache(namespace: str, ttl: float) -> ResultCache:
+    """Create a result cache backed by the shared Redis client"""
+    return ResultCache(
+        namespace=namespace,
+        max_size=settings.cache.local_max_size,
+        ttl=ttl,
+        redis_client=redis_holder.get_client(),
+        key_prefix=settings.cache.key_prefix,
+        generation_check_interval=settings.cache.generation_check_interval
+    )
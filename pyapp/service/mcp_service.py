@@ -4,13 +4,16 @@ Provides MCP (Model Context Protocol) service functionality
 """
 
 import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
 from typing import Dict, List, Any, Optional, Callable
 import json
 from mcp import ClientSession, StdioServerParameters
 import mcp.types as types
 
 from .base import MCPService, ServiceResult, ServiceConfig
-from ..logger import LOG_INFO, LOG_ERROR, LOG_DEBUG
+from .cache import SingleFlight, canonical_key
+from ..logger import LOG_INFO, LOG_ERROR, LOG_DEBUG, LOG_WARNING
 from ..conf import settings
 
 
@@ -55,7 +58,7 @@ class MCPServerManager:
             return False
     
     async def list_tools(self) -> List[types.Tool]:
-        """List available tools from MCP server"""
+        """List available tools from MCP server, raising when the request fails"""
         if not self.session or not self.available:
             return []
         
@@ -64,7 +67,7 @@ class MCPServerManager:
             return tools_result.tools
         except Exception as e:
             LOG_ERROR(f"Failed to list MCP tools: {e}")
-            return []
+            raise
     
     async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
         """Call a tool on the MCP server"""
@@ -80,17 +83,50 @@ class MCPServerManager:
     
     async def close(self) -> None:
         """Close MCP server connection"""
-        if self.session:
-            try:
+        try:
+            if self.session:
                 await self.session.close()
                 LOG_INFO("MCP server connection closed")
-            except Exception as e:
-                LOG_ERROR(f"Failed to close MCP server connection: {e}")
+        except Exception as e:
+            LOG_ERROR(f"Failed to close MCP server connection: {e}")
         finally:
             self.session = None
             self.available = False
 
 
+@dataclass(frozen=True)
+class ToolSpec:
+    """Name, description and input schema of one tool"""
+    name: str
+    description: str
+    input_schema: Optional[Dict[str, Any]] = None
+    source: str = "mcp"  # "mcp" (remote server) or "local" (registered handler)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the tool info dict"""
+        return {
+            "name": self.name,
+            "description": self.description,
+            "inputSchema": self.input_schema
+        }
+
+
+@dataclass(frozen=True)
+class ToolCatalog:
+    """Immutable snapshot of the available tools; version grows on every change"""
+    version: int = 0
+    tools: Dict[str, ToolSpec] = field(default_factory=dict)
+    loaded_at: Optional[datetime] = None
+    
+    def names(self) -> List[str]:
+        """Tool names in registration order"""
+        return list(self.tools)
+    
+    def get(self, tool_name: str) -> Optional[ToolSpec]:
+        """Spec of a tool, if it exists"""
+        return self.tools.get(tool_name)
+
+
 class MCPServiceImplementation(MCPService):
     """MCP service implementation"""
     
@@ -98,11 +134,23 @@ class MCPServiceImplementation(MCPService):
         config = ServiceConfig(
             service_name="mcp_service",
             version="1.0.0",
-            enabled=settings.mcp_tool.mtype in ["stdio", "sse"]
+            enabled=settings.mcp_tool.mtype in ["stdio", "sse"],
+            cache_enabled=settings.cache.enable,
+            cache_ttl=settings.cache.tool_ttl
         )
         super().__init__(config)
         self.server_manager = MCPServerManager()
         self.tool_handlers = {}
+        # Identical concurrent calls of opted-in tools share one execution
+        self.in_flight = SingleFlight()
+        self.coalesce_tools = {
+            name.strip() for name in settings.mcp_tool.coalesce_tools.split(";") if name.strip()
+        }
+        # Tool list of the MCP server, fetched once per (re)load
+        self._server_tools: List[types.Tool] = []
+        self._catalog = ToolCatalog()
+        self._catalog_stale = True
+        self._catalog_lock = asyncio.Lock()
     
     async def _on_initialize(self) -> None:
         """Initialize MCP service"""
@@ -113,6 +161,8 @@ class MCPServiceImplementation(MCPService):
         """Shutdown MCP service"""
         await self.server_manager.close()
         self.tool_handlers.clear()
+        self._server_tools = []
+        self._catalog_stale = True
     
     async def _connect_to_server(self) -> None:
         """Connect to MCP server based on configuration"""
@@ -172,22 +222,59 @@ class MCPServiceImplementation(MCPService):
                 LOG_WARNING("MCP server not available, skipping tool registration")
                 return
             
-            # Get available tools from MCP server
-            tools = await self.server_manager.list_tools()
-            
-            # Register tool handlers
-            for tool in tools:
-                self.register_tool(tool.name, tool)
+            # One list_tools round trip; the catalog is built from it
+            await self.reload_catalog()
             
-            LOG_INFO(f"Registered {len(tools)} MCP tools")
+            LOG_INFO(f"Registered {len(self._server_tools)} MCP tools")
         except Exception as e:
             LOG_ERROR(f"Failed to register MCP tools: {e}")
     
     def register_tool_handler(self, tool_name: str, handler: Callable) -> None:
         """Register a tool handler function"""
         self.tool_handlers[tool_name] = handler
+        self._catalog_stale = True
         LOG_DEBUG(f"Registered tool handler: {tool_name}")
     
+    async def reload_catalog(self) -> ToolCatalog:
+        """Re-fetch the MCP server's tool list and publish a new catalog if it changed"""
+        async with self._catalog_lock:
+            # A failed fetch raises here, keeping the current tools and catalog version
+            server_tools = await self.server_manager.list_tools() if self.server_manager.available else []
+            self.tools.clear()
+            for tool in server_tools:
+                self.register_tool(tool.name, tool)
+            self._server_tools = server_tools
+            return self._publish_catalog()
+    
+    def get_catalog(self) -> ToolCatalog:
+        """Current tool catalog, rebuilt without a server round trip after handler changes"""
+        if self._catalog_stale:
+            self._publish_catalog()
+        return self._catalog
+    
+    def _publish_catalog(self) -> ToolCatalog:
+        """Build the catalog from the cached server tools and the local handlers"""
+        tools: Dict[str, ToolSpec] = {}
+        for tool in self._server_tools:
+            tools[tool.name] = ToolSpec(
+                name=tool.name,
+                description=tool.description or f"MCP tool: {tool.name}",
+                input_schema=tool.inputSchema
+            )
+        # Local handlers win, as in execute_tool
+        for tool_name, handler in self.tool_handlers.items():
+            tools[tool_name] = ToolSpec(
+                name=tool_name,
+                description=getattr(handler, '_mcp_tool_description', '') or f"MCP tool: {tool_name}",
+                source="local"
+            )
+        
+        self._catalog_stale = False
+        if tools != self._catalog.tools:
+            self._catalog = ToolCatalog(version=self._catalog.version + 1, tools=tools, loaded_at=datetime.now())
+            LOG_INFO(f"Tool catalog v{self._catalog.version}: {len(tools)} tools")
+        return self._catalog
+    
     async def execute_tool(
         self,
         tool_name: str,
@@ -196,58 +283,70 @@ class MCPServiceImplementation(MCPService):
         """Execute a tool by name"""
         # Check if we have a local handler
         if tool_name in self.tool_handlers:
-            try:
-                result = await self.tool_handlers[tool_name](**params)
-                return self.create_success_result(data=result)
-            except Exception as e:
-                LOG_ERROR(f"Local tool handler failed: {e}")
-                return self.create_error_result(f"Tool execution failed: {str(e)}")
-        
-        # Otherwise, try to call MCP server
-        if self.server_manager.available:
-            try:
-                result = await self.server_manager.call_tool(tool_name, params)
-                return self.create_success_result(data=result)
-            except Exception as e:
-                LOG_ERROR(f"MCP tool call failed: {e}")
-                return self.create_error_result(f"Tool execution failed: {str(e)}")
+            call = lambda: self._call_local_handler(tool_name, params)
+            failure = "Local tool handler failed"
+        # Otherwise, try to call MCP server; remote results are not cached, their
+        # data may change without this process seeing a write
+        elif self.server_manager.available:
+            call = lambda: self.server_manager.call_tool(tool_name, params)
+            failure = "MCP tool call failed"
+        else:
+            return self.create_error_result(f"Tool not found: {tool_name}")
         
-        return self.create_error_result(f"Tool not found: {tool_name}")
+        try:
+            if self.should_coalesce(tool_name):
+                result = await self.in_flight.do(canonical_key(tool_name, params), call, group=tool_name)
+            else:
+                result = await call()
+            return self.create_success_result(data=result)
+        except Exception as e:
+            LOG_ERROR(f"{failure}: {e}")
+            return self.create_error_result(f"Tool execution failed: {str(e)}")
+    
+    async def _call_local_handler(self, tool_name: str, params: Dict[str, Any]) -> Any:
+        """Run a local handler through the result cache"""
+        handler = self.tool_handlers[tool_name]
+        # Per-tool TTL from @mcp_tool; 0 disables caching for the tool
+        ttl = getattr(handler, '_mcp_tool_cache_ttl', None)
+        if self.cache and ttl != 0:
+            return await self.cache.get_or_compute(
+                tool_name, params, lambda: handler(**params), ttl=ttl
+            )
+        return await handler(**params)
+    
+    def should_coalesce(self, tool_name: str) -> bool:
+        """Check if identical concurrent calls of a tool are de-duplicated"""
+        handler = self.tool_handlers.get(tool_name)
+        if handler is not None:
+            return getattr(handler, '_mcp_tool_coalesce', False)
+        return tool_name in self.coalesce_tools
+    
+    def get_coalescing_metrics(self) -> Dict[str, Any]:
+        """In-flight de-duplication counters"""
+        return self.in_flight.to_dict()
     
     async def list_available_tools(self) -> List[str]:
         """List all available tools"""
-        if self.server_manager.available:
-            tools = await self.server_manager.list_tools()
-            return [tool.name for tool in tools]
-        return list(self.tools.keys())
+        return self.get_catalog().names()
     
     async def get_tool_info(self, tool_name: str) -> Optional[Dict[str, Any]]:
         """Get information about a specific tool"""
-        if self.server_manager.available:
-            try:
-                tools = await self.server_manager.list_tools()
-                for tool in tools:
-                    if tool.name == tool_name:
-                        return {
-                            "name": tool.name,
-                            "description": tool.description,
-                            "inputSchema": tool.inputSchema
-                        }
-            except Exception as e:
-                LOG_ERROR(f"Failed to get tool info: {e}")
-        
-        return None
+        spec = self.get_catalog().get(tool_name)
+        return spec.to_dict() if spec else None
 
 
 # Tool decorator for registering MCP tools
-def mcp_tool(name: str, description: str = ""):
-    """Decorator to register a function as an MCP tool"""
+def mcp_tool(name: str, description: str = "", cache_ttl: Optional[int] = None, coalesce: bool = False):
+    """Decorator to register a function as an MCP tool (cache_ttl: seconds, 0 = never cache;
+    coalesce: identical concurrent calls share one execution)"""
     def decorator(func):
         async def wrapper(*args, **kwargs):
             return await func(*args, **kwargs)
         
         wrapper._mcp_tool_name = name
         wrapper._mcp_tool_description = description
+        wrapper._mcp_tool_cache_ttl = cache_ttl
+        wrapper._mcp_tool_coalesce = coalesce
         wrapper.__name__ = func.__name__
         return wrapper
     return decorator
@@ -267,6 +366,10 @@ async def register_mcp_tools():
         from .modules.zxyc_tools import register_zxyc_tools
         await register_zxyc_tools(mcp_service)
         
+        # Schema catalog lookups
+        from .modules.schema_tools import register_schema_tools
+        await register_schema_tools(mcp_service)
+        
         # Example: Register BCP tools
         from .modules.bcp_tools import register_bcp_tools
         await register_bcp_tools(mcp_service)
@@ -12,7 +12,13 @@ from .zxyc_tools import (
     query_security_vehicle_info,
     query_security_subway_ride_info,
     query_security_ticket_info,
-    query_security_internet_access_info
+    query_security_internet_access_info,
+    query_security_person_profile
+)
+from .schema_tools import (
+    register_schema_tools,
+    list_security_tables,
+    describe_security_table
 )
 
 __all__ = [
@@ -24,5 +30,9 @@ __all__ = [
     'query_security_vehicle_info',
     'query_security_subway_ride_info',
     'query_security_ticket_info',
-    'query_security_internet_access_info'
+    'query_security_internet_access_info',
+    'query_security_person_profile',
+    'register_schema_tools',
+    'list_security_tables',
+    'describe_security_table'
 ]
\ No newline at end of file
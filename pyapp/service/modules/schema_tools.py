@@ -0,0 +1,66 @@
+"""
+Service Layer - Schema MCP Tools
+Answers table and column lookups from the in-memory schema catalog
+"""
+
+from typing import Dict, List, Any, Optional
+
+from ..mcp_service import mcp_tool
+from ..schema_catalog import schema_catalog
+from ...logger import LOG_INFO, LOG_ERROR
+
+
+@mcp_tool("list_security_tables", "List security tables (ES indices) with their Chinese names, optionally filtered by a keyword", cache_ttl=0)
+async def list_security_tables(
+    keyword: Optional[str] = None,
+    app_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """List security tables from the schema catalog"""
+    try:
+        if keyword:
+            tables = schema_catalog.find_tables(keyword)
+        else:
+            tables = schema_catalog.list_tables(app_id)
+        
+        return [table.to_dict(include_columns=False) for table in tables]
+    except Exception as e:
+        LOG_ERROR(f"Failed to list security tables: {e}")
+        raise
+
+
+@mcp_tool("describe_security_table", "Get the columns (name, Chinese name, type) of a security table by table ID, index name or Chinese name", cache_ttl=0)
+async def describe_security_table(table: str) -> Dict[str, Any]:
+    """Describe a security table from the schema catalog"""
+    try:
+        definition = schema_catalog.get_table(table)
+        if not definition:
+            raise ValueError(f"Unknown table: {table}")
+        
+        return definition.to_dict()
+    except Exception as e:
+        LOG_ERROR(f"Failed to describe security table: {e}")
+        raise
+
+
+async def register_schema_tools(mcp_service):
+    """Register all schema tools with MCP service"""
+    try:
+        # Register all decorated tools
+        import inspect
+        
+        # Get all functions with _mcp_tool_name attribute
+        for name, obj in globals().items():
+            if inspect.isfunction(obj) and hasattr(obj, '_mcp_tool_name'):
+                tool_name = getattr(obj, '_mcp_tool_name')
+                
+                # Register tool handler
+                mcp_service.register_tool_handler(tool_name, obj)
+                LOG_INFO(f"Registered schema tool: {tool_name}")
+        
+        # Also register the catalog service
+        from ..base import service_registry
+        service_registry.register_service(schema_catalog)
+        
+    except Exception as e:
+        LOG_ERROR(f"Failed to register schema tools: {e}")
+        raise
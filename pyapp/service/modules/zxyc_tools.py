@@ -7,10 +7,11 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 import json
 
-from .base import DataService, ServiceResult, ServiceConfig, QueryFilter
-from .mcp_service import mcp_tool
-from ..dao import get_dao, search_by_keywords
-from ..logger import LOG_INFO, LOG_ERROR, LOG_DEBUG
+from ..base import DataService, ServiceResult, ServiceConfig, QueryFilter, PaginationOptions, MultiSearchItem
+from ..mcp_service import mcp_tool
+from ...dao import get_dao, search_by_keywords
+from ...logger import LOG_INFO, LOG_ERROR, LOG_DEBUG
+from ...conf import settings
 
 
 class ZXYCDataService(DataService):
@@ -20,7 +21,9 @@ class ZXYCDataService(DataService):
         config = ServiceConfig(
             service_name="zxyc_data_service",
             version="1.0.0",
-            enabled=True
+            enabled=True,
+            cache_enabled=settings.cache.enable,
+            cache_ttl=settings.cache.search_ttl
         )
         super().__init__(config, "elasticsearch")
 
@@ -29,7 +32,7 @@ class ZXYCDataService(DataService):
 zxyc_service = ZXYCDataService()
 
 
-@mcp_tool("query_security_hotel_info", "Query hotel stay information")
+@mcp_tool("query_security_hotel_info", "Query hotel stay information", coalesce=True)
 async def query_security_hotel_info(
     name: Optional[str] = None,
     id_card: Optional[str] = None,
@@ -37,7 +40,8 @@ async def query_security_hotel_info(
     check_in_time: Optional[str] = None,
     check_out_time: Optional[str] = None,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    fields: Optional[List[str]] = None
 ) -> List[Dict[str, Any]]:
     """Query hotel stay information"""
     try:
@@ -59,7 +63,8 @@ async def query_security_hotel_info(
         result = await zxyc_service.search_data(
             "security_hotel_info",
             filters,
-            pagination={"offset": offset, "limit": limit}
+            pagination=PaginationOptions(offset=offset, limit=limit),
+            fields=fields
         )
         
         return result.items
@@ -68,7 +73,7 @@ async def query_security_hotel_info(
         raise
 
 
-@mcp_tool("query_security_person_info", "Query person basic information")
+@mcp_tool("query_security_person_info", "Query person basic information", coalesce=True)
 async def query_security_person_info(
     name: Optional[str] = None,
     id_card: Optional[str] = None,
@@ -76,7 +81,8 @@ async def query_security_person_info(
     age_min: Optional[int] = None,
     age_max: Optional[int] = None,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    fields: Optional[List[str]] = None
 ) -> List[Dict[str, Any]]:
     """Query person basic information"""
     try:
@@ -98,7 +104,8 @@ async def query_security_person_info(
         result = await zxyc_service.search_data(
             "security_person_info",
             filters,
-            pagination={"offset": offset, "limit": limit}
+            pagination=PaginationOptions(offset=offset, limit=limit),
+            fields=fields
         )
         
         return result.items
@@ -107,14 +114,15 @@ async def query_security_person_info(
         raise
 
 
-@mcp_tool("query_security_vehicle_info", "Query vehicle basic information")
+@mcp_tool("query_security_vehicle_info", "Query vehicle basic information", coalesce=True)
 async def query_security_vehicle_info(
     plate_number: Optional[str] = None,
     vehicle_type: Optional[str] = None,
     vehicle_color: Optional[str] = None,
     owner_name: Optional[str] = None,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    fields: Optional[List[str]] = None
 ) -> List[Dict[str, Any]]:
     """Query vehicle basic information"""
     try:
@@ -134,7 +142,8 @@ async def query_security_vehicle_info(
         result = await zxyc_service.search_data(
             "security_vehicle_info",
             filters,
-            pagination={"offset": offset, "limit": limit}
+            pagination=PaginationOptions(offset=offset, limit=limit),
+            fields=fields
         )
         
         return result.items
@@ -143,14 +152,15 @@ async def query_security_vehicle_info(
         raise
 
 
-@mcp_tool("query_security_subway_ride_info", "Query subway ride information")
+@mcp_tool("query_security_subway_ride_info", "Query subway ride information", coalesce=True)
 async def query_security_subway_ride_info(
     person_name: Optional[str] = None,
     id_card: Optional[str] = None,
     ride_time: Optional[str] = None,
     station_name: Optional[str] = None,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    fields: Optional[List[str]] = None
 ) -> List[Dict[str, Any]]:
     """Query subway ride information"""
     try:
@@ -170,7 +180,8 @@ async def query_security_subway_ride_info(
         result = await zxyc_service.search_data(
             "security_subway_ride_info",
             filters,
-            pagination={"offset": offset, "limit": limit}
+            pagination=PaginationOptions(offset=offset, limit=limit),
+            fields=fields
         )
         
         return result.items
@@ -179,14 +190,15 @@ async def query_security_subway_ride_info(
         raise
 
 
-@mcp_tool("query_security_ticket_info", "Query scenic area ticket information")
+@mcp_tool("query_security_ticket_info", "Query scenic area ticket information", coalesce=True)
 async def query_security_ticket_info(
     person_name: Optional[str] = None,
     id_card: Optional[str] = None,
     scenic_area: Optional[str] = None,
     visit_time: Optional[str] = None,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    fields: Optional[List[str]] = None
 ) -> List[Dict[str, Any]]:
     """Query scenic area ticket information"""
     try:
@@ -206,7 +218,8 @@ async def query_security_ticket_info(
         result = await zxyc_service.search_data(
             "security_ticket_info",
             filters,
-            pagination={"offset": offset, "limit": limit}
+            pagination=PaginationOptions(offset=offset, limit=limit),
+            fields=fields
         )
         
         return result.items
@@ -215,14 +228,15 @@ async def query_security_ticket_info(
         raise
 
 
-@mcp_tool("query_security_internet_access_info", "Query internet access information")
+@mcp_tool("query_security_internet_access_info", "Query internet access information", coalesce=True)
 async def query_security_internet_access_info(
     person_name: Optional[str] = None,
     id_card: Optional[str] = None,
     internet_bar: Optional[str] = None,
     access_time: Optional[str] = None,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    fields: Optional[List[str]] = None
 ) -> List[Dict[str, Any]]:
     """Query internet access information"""
     try:
@@ -242,7 +256,8 @@ async def query_security_internet_access_info(
         result = await zxyc_service.search_data(
             "security_internet_access_info",
             filters,
-            pagination={"offset": offset, "limit": limit}
+            pagination=PaginationOptions(offset=offset, limit=limit),
+            fields=fields
         )
         
         return result.items
@@ -251,6 +266,62 @@ async def query_security_internet_access_info(
         raise
 
 
+# Identity fields per security index, used by the profile tool
+PROFILE_SOURCES = {
+    "security_person_info": {"id_card": "id_card", "name": "name"},
+    "security_hotel_info": {"id_card": "id_card", "name": "name"},
+    "security_subway_ride_info": {"id_card": "id_card", "name": "person_name"},
+    "security_ticket_info": {"id_card": "id_card", "name": "person_name"},
+    "security_internet_access_info": {"id_card": "id_card", "name": "person_name"},
+    "security_vehicle_info": {"name": "owner_name"},
+}
+
+
+@mcp_tool("query_security_person_profile", "Query all security records of a person (person, hotel, subway, ticket, internet access, vehicle) in one call", coalesce=True)
+async def query_security_person_profile(
+    id_card: Optional[str] = None,
+    name: Optional[str] = None,
+    limit: int = 20,
+    fields: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Query all security records of a person, grouped by index"""
+    try:
+        if not id_card and not name:
+            raise ValueError("id_card or name is required")
+        
+        # Fan the identity filter out to every index that has the field
+        items = []
+        for index, identity_fields in PROFILE_SOURCES.items():
+            filters = []
+            if id_card and "id_card" in identity_fields:
+                filters.append(QueryFilter(identity_fields["id_card"], "eq", id_card))
+            elif name and "name" in identity_fields:
+                filters.append(QueryFilter(identity_fields["name"], "like", name))
+            
+            if filters:
+                items.append(MultiSearchItem(
+                    index=index,
+                    filters=filters,
+                    pagination=PaginationOptions(offset=0, limit=limit),
+                    fields=fields
+                ))
+        
+        # One _msearch round trip for all indices
+        results = await zxyc_service.multi_search_data(items)
+        
+        profile = {}
+        for item, result in zip(items, results):
+            if result.error:
+                profile[item.index] = {"error": result.error}
+            else:
+                profile[item.index] = {"total": result.total, "items": result.items}
+        
+        return profile
+    except Exception as e:
+        LOG_ERROR(f"Failed to query person profile: {e}")
+        raise
+
+
 async def register_zxyc_tools(mcp_service):
     """Register all ZXYC tools with MCP service"""
     try:
@@ -268,7 +339,7 @@ async def register_zxyc_tools(mcp_service):
                 LOG_INFO(f"Registered ZXYC tool: {tool_name}")
         
         # Also register the service
-        from .base import service_registry
+        from ..base import service_registry
         service_registry.register_service(zxyc_service)
         
     except Exception as e:
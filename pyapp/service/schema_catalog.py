@@ -0,0 +1,285 @@
+"""
+Service Layer - Schema Catalog
+Keeps security table/column definitions and ES mappings in memory
+"""
+
+import asyncio
+from typing import Dict, List, Any, Optional, Union
+from dataclasses import dataclass, field
+
+from .base import BaseService, ServiceConfig
+from ..conf import settings
+from ..logger import LOG_INFO, LOG_ERROR, LOG_WARNING
+
+
+@dataclass
+class ColumnDefinition:
+    """Column of a security table"""
+    name: str
+    cn_name: str = ""
+
+
+@dataclass
+class TableDefinition:
+    """Security table (ES index) definition"""
+    id: int
+    name: str
+    cn_name: str = ""
+    app_id: str = ""
+    columns: List[ColumnDefinition] = field(default_factory=list)
+    mapping: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # flattened ES field mapping
+    
+    def to_dict(self, include_columns: bool = True) -> Dict[str, Any]:
+        """Convert definition to a plain dict"""
+        data = {
+            'id': self.id,
+            'name': self.name,
+            'cn_name': self.cn_name,
+            'app_id': self.app_id
+        }
+        if include_columns:
+            data['columns'] = [
+                {
+                    'name': column.name,
+                    'cn_name': column.cn_name,
+                    'type': self.mapping.get(column.name, {}).get('type')
+                }
+                for column in self.columns
+            ]
+        return data
+
+
+class SchemaCatalogService(BaseService):
+    """In-memory catalog of security tables, their columns and ES mappings"""
+    
+    TABLE_DEFINE = "security_table_define"
+    COLUMN_DEFINE = "security_tablecolumn_define"
+    
+    def __init__(self):
+        config = ServiceConfig(
+            service_name="schema_catalog",
+            version="1.0.0",
+            enabled=True
+        )
+        super().__init__(config)
+        self.refresh_interval = settings.schema_catalog.refresh_interval
+        self.mapping_ttl = settings.schema_catalog.mapping_ttl
+        self._mysql_dao = None
+        self._es_dao = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        
+        # Raw sources, reloaded independently
+        self._checksums: Dict[str, Any] = {}
+        self._table_rows: List[Dict[str, Any]] = []
+        self._columns: Dict[int, List[ColumnDefinition]] = {}
+        self._mappings: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._mappings_loaded_at: Optional[float] = None
+        
+        # Lookup indexes, swapped in whole on every rebuild
+        self._by_id: Dict[int, TableDefinition] = {}
+        self._by_name: Dict[str, TableDefinition] = {}
+        self._by_cn_name: Dict[str, TableDefinition] = {}
+    
+    async def _on_initialize(self) -> None:
+        """Load the catalog and start the refresh loop"""
+        from ..dao import get_dao
+        try:
+            self._mysql_dao = await get_dao('mysql')
+        except RuntimeError:
+            LOG_WARNING("MySQL not available, schema catalog is built from Elasticsearch mappings only")
+        try:
+            self._es_dao = await get_dao('elasticsearch')
+        except RuntimeError:
+            LOG_WARNING("Elasticsearch not available, schema catalog loads without mappings")
+        if not self._mysql_dao and not self._es_dao:
+            LOG_WARNING("No database available, schema catalog stays empty")
+            return
+        
+        await self.refresh(force=True)
+        if self.refresh_interval > 0:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+    
+    async def _on_shutdown(self) -> None:
+        """Stop the refresh loop"""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+    
+    async def _refresh_loop(self) -> None:
+        """Periodically pick up definition and mapping changes"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                LOG_ERROR(f"Schema catalog refresh failed: {e}")
+    
+    async def refresh(self, force: bool = False) -> bool:
+        """Reload the sources that changed and return whether anything was reloaded"""
+        async with self._lock:
+            if not self._mysql_dao:
+                return await self._refresh_from_mappings(force)
+            
+            checksums = await self._load_checksums()
+            # Tables without a checksum (NULL) are reloaded every time
+            tables_changed = force or self._changed(checksums, self.TABLE_DEFINE)
+            columns_changed = force or self._changed(checksums, self.COLUMN_DEFINE)
+            
+            loop = asyncio.get_running_loop()
+            mappings_due = self._es_dao is not None and (
+                force or tables_changed or self._mappings_loaded_at is None
+                or loop.time() - self._mappings_loaded_at >= self.mapping_ttl
+            )
+            
+            if not (tables_changed or columns_changed or mappings_due):
+                return False
+            
+            if tables_changed:
+                self._table_rows = await self._load_tables()
+            if columns_changed:
+                self._columns = await self._load_columns()
+            if mappings_due:
+                names = [str(row.get('TableName')) for row in self._table_rows if row.get('TableName')]
+                self._mappings = await self._es_dao.load_field_mappings(names)
+                self._mappings_loaded_at = loop.time()
+            
+            self._checksums = checksums
+            self._rebuild_index()
+            LOG_INFO(
+                f"Schema catalog refreshed: {len(self._by_id)} tables "
+                f"(tables={tables_changed}, columns={columns_changed}, mappings={mappings_due})"
+            )
+            return True
+    
+    async def _refresh_from_mappings(self, force: bool) -> bool:
+        """Without the definition tables, catalog every index with its mapped fields as columns"""
+        loop = asyncio.get_running_loop()
+        if not force and self._mappings_loaded_at is not None and (
+            loop.time() - self._mappings_loaded_at < self.mapping_ttl
+        ):
+            return False
+        
+        mappings = await self._es_dao.load_field_mappings(['*'])
+        self._mappings = {index: mapping for index, mapping in mappings.items() if not index.startswith('.')}
+        self._mappings_loaded_at = loop.time()
+        
+        # IDs follow the index names in sorted order
+        self._table_rows = [{'id': table_id, 'TableName': index} for table_id, index in enumerate(sorted(self._mappings), 1)]
+        self._columns = {
+            row['id']: [
+                ColumnDefinition(name=path)
+                for path, props in self._mappings[row['TableName']].items()
+                if 'properties' not in props
+            ]
+            for row in self._table_rows
+        }
+        self._rebuild_index()
+        LOG_INFO(f"Schema catalog refreshed from mappings: {len(self._by_id)} indices")
+        return True
+    
+    def _changed(self, checksums: Dict[str, Any], table: str) -> bool:
+        """Check whether a definition table changed since the last load"""
+        checksum = checksums.get(table)
+        return checksum is None or checksum != self._checksums.get(table)
+    
+    async def _load_checksums(self) -> Dict[str, Any]:
+        """Checksum both definition tables in one round trip"""
+        rows = await self._mysql_dao.execute_query(
+            f"CHECKSUM TABLE {self.TABLE_DEFINE}, {self.COLUMN_DEFINE}"
+        )
+        # Table is reported as "<db>.<table>"
+        return {str(row['Table']).split('.')[-1]: row['Checksum'] for row in rows}
+    
+    async def _load_tables(self) -> List[Dict[str, Any]]:
+        """Load all table definitions"""
+        query = f"""
+            SELECT id, TableName, TableCnName, APPID
+            FROM {self.TABLE_DEFINE}
+            ORDER BY id
+        """
+        return await self._mysql_dao.execute_query(query)
+    
+    async def _load_columns(self) -> Dict[int, List[ColumnDefinition]]:
+        """Load all column definitions grouped by table ID"""
+        query = f"""
+            SELECT tableid, ColName, ColCnName
+            FROM {self.COLUMN_DEFINE}
+            ORDER BY tableid
+        """
+        
+        columns: Dict[int, List[ColumnDefinition]] = {}
+        async for batch in self._mysql_dao.iter_query_tuples(query):
+            for table_id, col_name, col_cn_name in batch.rows:
+                if col_name:
+                    columns.setdefault(int(table_id), []).append(
+                        ColumnDefinition(name=str(col_name), cn_name=str(col_cn_name or ""))
+                    )
+        return columns
+    
+    def _rebuild_index(self) -> None:
+        """Build fresh lookup indexes from the loaded sources"""
+        by_id, by_name, by_cn_name = {}, {}, {}
+        for row in self._table_rows:
+            if row.get('id') is None or not row.get('TableName'):
+                continue
+            
+            table = TableDefinition(
+                id=int(row['id']),
+                name=str(row['TableName']),
+                cn_name=str(row.get('TableCnName') or ""),
+                app_id=str(row.get('APPID') or ""),
+                columns=self._columns.get(int(row['id']), []),
+                mapping=self._mappings.get(str(row['TableName']), {})
+            )
+            by_id[table.id] = table
+            by_name[table.name.lower()] = table
+            if table.cn_name:
+                by_cn_name[table.cn_name] = table
+        
+        self._by_id, self._by_name, self._by_cn_name = by_id, by_name, by_cn_name
+    
+    def is_loaded(self) -> bool:
+        """Check if the catalog holds any tables"""
+        return bool(self._by_id)
+    
+    def get_table(self, key: Union[int, str]) -> Optional[TableDefinition]:
+        """Look up a table by ID, index name (case-insensitive) or Chinese name"""
+        if isinstance(key, int) or (isinstance(key, str) and key.isdigit()):
+            table = self._by_id.get(int(key))
+            if table:
+                return table
+        
+        key = str(key).strip()
+        return self._by_name.get(key.lower()) or self._by_cn_name.get(key)
+    
+    def list_tables(self, app_id: Optional[str] = None) -> List[TableDefinition]:
+        """List tables, optionally of one application"""
+        tables = list(self._by_id.values())
+        if app_id:
+            tables = [table for table in tables if table.app_id == app_id]
+        return tables
+    
+    def find_tables(self, keyword: str) -> List[TableDefinition]:
+        """Find tables whose index name or Chinese name contains keyword"""
+        keyword = keyword.strip().lower()
+        return [
+            table for table in self._by_id.values()
+            if keyword in table.name.lower() or keyword in table.cn_name.lower()
+        ]
+    
+    def get_columns(self, key: Union[int, str]) -> List[ColumnDefinition]:
+        """Get the column definitions of a table"""
+        table = self.get_table(key)
+        return table.columns if table else []
+    
+    def describe_tables(self, app_id: Optional[str] = None) -> str:
+        """One line per table (index name and Chinese name) for prompts"""
+        return "\n".join(
+            f"{table.name}：{table.cn_name}" for table in self.list_tables(app_id)
+        )
+
+
+# Global schema catalog instance
+schema_catalog = SchemaCatalogService()
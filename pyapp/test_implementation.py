@@ -12,8 +12,8 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from main import app
 from conf import settings
-from logger import LOG_INFO, LOG_ERROR
-from dao import db_manager
+from logger import LOG_INFO, LOG_ERROR, LOG_WARNING
+from dao import db_manager, es_client_registry
 from service import service_registry
 from agent import agent_registry
 
@@ -23,25 +23,25 @@ async def test_database_connections():
     LOG_INFO("Testing database connections...")
     
     try:
+        # Shared DAOs are owned by db_manager, so they are not disconnected here
+        await db_manager.initialize_all()
+        
         # Test MySQL connection
         mysql_dao = db_manager.get_mysql_dao()
         if mysql_dao:
-            await mysql_dao.connect()
             tables = await mysql_dao.get_table_list()
             LOG_INFO(f"MySQL connected successfully, found {len(tables)} tables")
-            await mysql_dao.disconnect()
+            LOG_INFO(f"MySQL pool metrics: {mysql_dao.get_pool_metrics().to_dict()}")
         else:
             LOG_ERROR("MySQL DAO not available")
         
         # Test Elasticsearch connection
         es_dao = db_manager.get_elasticsearch_dao()
         if es_dao:
-            await es_dao.connect()
-            LOG_INFO("Elasticsearch connected successfully")
-            await es_dao.disconnect()
+            LOG_INFO(f"Elasticsearch connected successfully ({len(es_client_registry)} cluster client)")
         else:
             LOG_ERROR("Elasticsearch DAO not available")
-            
+        
         return True
     except Exception as e:
         LOG_ERROR(f"Database connection test failed: {e}")
@@ -61,7 +61,7 @@ async def test_service_initialization():
             LOG_INFO(f"Available services: {service_registry.list_services()}")
         else:
             LOG_ERROR("Service initialization failed")
-            
+        
         return success
     except Exception as e:
         LOG_ERROR(f"Service initialization test failed: {e}")
@@ -81,7 +81,7 @@ async def test_agent_initialization():
             LOG_INFO(f"Available agents: {agent_registry.list_agents()}")
         else:
             LOG_ERROR("Agent initialization failed")
-            
+        
         return success
     except Exception as e:
         LOG_ERROR(f"Agent initialization test failed: {e}")
@@ -125,13 +125,526 @@ async def test_tool_execution():
             LOG_INFO(f"Tool result: {result.data}")
         else:
             LOG_WARNING(f"Tool execution failed: {result.message}")
-            
+        
         return True
     except Exception as e:
         LOG_ERROR(f"Tool execution test failed: {e}")
         return False
 
 
+async def test_parallel_tool_execution():
+    """Test that one step's tool calls run concurrently and come back in order"""
+    LOG_INFO("Testing parallel tool execution...")
+    
+    try:
+        from agent import ToolAgent, AgentConfig, ToolCall
+        
+        class EchoAgent(ToolAgent):
+            async def process_message(self, message, context=None, session_id=None):
+                pass
+            
+            async def process_message_stream(self, message, context=None, session_id=None):
+                yield
+        
+        async def echo(delay: float, value: int):
+            await asyncio.sleep(delay)
+            return value
+        
+        agent = EchoAgent(AgentConfig(
+            agent_name="echo_agent",
+            model_name="none",
+            max_parallel_tools=4,
+            tool_timeouts={"slow_echo": 0.05}
+        ))
+        agent.register_tool("echo", echo)
+        agent.register_tool("slow_echo", echo)
+        
+        start = asyncio.get_running_loop().time()
+        results = await agent.execute_tools(
+            [ToolCall("echo", {"delay": 0.1, "value": i}) for i in range(4)]
+            + [ToolCall("slow_echo", {"delay": 1, "value": 4})]
+        )
+        elapsed = asyncio.get_running_loop().time() - start
+        
+        assert [result.data for result in results[:4]] == [0, 1, 2, 3]
+        assert not results[4].success and "timed out" in results[4].message
+        assert elapsed < 0.3
+        
+        LOG_INFO(f"5 tool calls finished in {elapsed:.2f}s")
+        return True
+    except Exception as e:
+        LOG_ERROR(f"Parallel tool execution test failed: {e}")
+        return False
+
+
+async def test_agent_stream_events():
+    """Test the event order of a streamed agent run and its failed tool results"""
+    LOG_INFO("Testing agent stream events...")
+    
+    try:
+        from types import SimpleNamespace
+        from langchain_core.messages import AIMessageChunk, HumanMessage
+        from agent import ToolAgent, AgentConfig, ParallelAgentExecutor, LangchainTool
+        from service import ServiceResult
+        
+        class EchoAgent(ToolAgent):
+            async def process_message(self, message, context=None, session_id=None):
+                pass
+            
+            async def process_message_stream(self, message, context=None, session_id=None):
+                yield
+        
+        class FakeMCPService:
+            async def execute_tool(self, tool_name, parameters):
+                if tool_name == "broken":
+                    return ServiceResult(success=False, message="index missing")
+                return ServiceResult(success=True, data=parameters)
+        
+        class FakePrompt:
+            async def ainvoke(self, inputs):
+                messages = [HumanMessage(content=inputs["input"]), *inputs["agent_scratchpad"]]
+                return SimpleNamespace(to_messages=lambda: messages)
+        
+        class FakeLLM:
+            """Asks for two tools, then streams the answer; reports no usage"""
+            calls = 0
+            
+            def bind(self, **kwargs):
+                return self
+            
+            async def astream(self, messages):
+                self.calls += 1
+                if self.calls == 1:
+                    for index, name in enumerate(["echo", "broken"]):
+                        yield AIMessageChunk(content="", additional_kwargs={"tool_calls": [{
+                            "index": index,
+                            "id": f"call_{index}",
+                            "type": "function",
+                            "function": {"name": name, "arguments": '{"value": 1}'}
+                        }]})
+                    return
+                for token in ["张三", "住过", "如家酒店"]:
+                    yield AIMessageChunk(content=token)
+        
+        mcp = FakeMCPService()
+        tools = [LangchainTool(tool_name=name, description=f"{name} tool", mcp_service=mcp) for name in ["echo", "broken"]]
+        # The executor dispatches through its own tools, not the agent's registry
+        agent = EchoAgent(AgentConfig(agent_name="stream_agent", model_name="none"))
+        executor = ParallelAgentExecutor(llm=FakeLLM(), tools=tools, prompt=FakePrompt(), tool_agent=agent)
+        
+        events = [event async for event in executor.astream({"input": "张三住过哪些酒店"})]
+        
+        assert [event.event for event in events] == ["tool_start", "tool_start", "tool_end", "tool_end", "token", "token", "token", "final"]
+        tool_ends = {event.data["tool_name"]: event.data for event in events if event.event == "tool_end"}
+        assert tool_ends["echo"]["success"] and not tool_ends["broken"]["success"]
+        assert "index missing" in tool_ends["broken"]["message"]
+        
+        final = events[-1].data
+        assert final["output"] == "张三住过如家酒店"
+        assert final["intermediate_steps"][1][1].startswith("Error:")
+        assert final["estimated_usage"]["prompt_tokens"] > 0 and final["estimated_usage"]["completion_tokens"] > 0
+        assert final["finished"] and final["tool_failures"] == 1
+        
+        # A run cut off by the iteration limit is reported as unfinished
+        executor = ParallelAgentExecutor(llm=FakeLLM(), tools=tools, prompt=FakePrompt(), tool_agent=agent, max_iterations=1)
+        stopped = [event async for event in executor.astream({"input": "张三住过哪些酒店"})][-1].data
+        assert stopped["output"] == ParallelAgentExecutor.STOPPED_OUTPUT and not stopped["finished"]
+        
+        LOG_INFO(f"Streamed {len(events)} events, estimated usage {final['estimated_usage']}")
+        return True
+    except Exception as e:
+        LOG_ERROR(f"Agent stream events test failed: {e}")
+        return False
+
+
+async def test_session_memory():
+    """Test that conversation history is kept per session and bounded"""
+    LOG_INFO("Testing session memory...")
+    
+    try:
+        from agent import SessionMemoryStore, AgentMessage
+        
+        store = SessionMemoryStore("test", max_messages=3, max_sessions=2, session_ttl=60)
+        for i in range(5):
+            await store.append("alice", AgentMessage(role="user", content=f"alice {i}"))
+        await store.append("bob", AgentMessage(role="user", content="bob 0"))
+        
+        # Sessions do not see each other and keep only the last messages
+        alice = await store.get_messages("alice")
+        assert [m.content for m in alice] == ["alice 2", "alice 3", "alice 4"]
+        assert [m.seq for m in alice] == [3, 4, 5]
+        assert [m.content for m in await store.get_messages("bob")] == ["bob 0"]
+        
+        # A third session evicts the least recently used one
+        await store.append("carol", AgentMessage(role="user", content="carol 0"))
+        assert await store.get_messages("alice") == []
+        assert store.active_sessions() == 2
+        
+        return True
+    except Exception as e:
+        LOG_ERROR(f"Session memory test failed: {e}")
+        return False
+
+
+async def test_context_window():
+    """Test that chat history is cut to the token budget with a cached rolling summary"""
+    LOG_INFO("Testing context window...")
+    
+    try:
+        from datetime import datetime
+        from agent import ContextWindowBuilder, TokenCounter, AgentMessage
+        
+        summarized = []
+        
+        async def summarize(messages, previous_summary):
+            summarized.append(len(messages))
+            return f"{previous_summary} {len(messages)} messages".strip()
+        
+        counter = TokenCounter()
+        builder = ContextWindowBuilder(summarize, token_budget=200, summary_budget=40, counter=counter)
+        history = []
+        # Equal timestamps must not blur which messages the summary covers
+        now = datetime.now()
+        
+        for turn in range(10):
+            for role in ("user", "assistant"):
+                history.append(AgentMessage(role=role, content="查询记录" * 10, timestamp=now, seq=len(history) + 1))
+            context = await builder.build("session", history)
+            assert sum(counter.count_message(message) for message in context) <= 200
+            assert context[-1] is history[-1]
+        
+        # Summaries are extended in batches, not rebuilt every turn
+        assert 0 < len(summarized) < 10
+        assert context[0].role == "system"
+        # Every message is either summarized or kept, exactly once
+        assert sum(summarized) + len(context) - 1 == len(history)
+        
+        LOG_INFO(f"Summarized {sum(summarized)} messages in {len(summarized)} calls")
+        return True
+    except Exception as e:
+        LOG_ERROR(f"Context window test failed: {e}")
+        return False
+
+
+async def test_tool_output_shaping():
+    """Test that tool results are compacted before reaching the LLM"""
+    LOG_INFO("Testing tool output shaping...")
+    
+    try:
+        from agent import ToolOutputShaper, ToolOutputPolicy
+        
+        hits = [
+            {"_id": str(i), "_score": 1.0, "name": "张三", "hotel_name": "如家酒店", "room": None}
+            for i in range(100)
+        ]
+        shaper = ToolOutputShaper()
+        shaper.set_policy("hotel", ToolOutputPolicy(columns=["name", "hotel_name"], max_rows=10))
+        text = shaper.shape("hotel", hits)
+        
+        lines = text.splitlines()
+        assert lines[0] == "name,hotel_name"
+        assert lines[-1] == "... 90 more rows"
+        assert "_score" not in text and "room" not in text
+        
+        metrics = shaper.get_metrics()["hotel"]
+        assert metrics["saved_tokens"] > 0
+        
+        LOG_INFO(f"Tool output metrics: {metrics}")
+        return True
+    except Exception as e:
+        LOG_ERROR(f"Tool output shaping test failed: {e}")
+        return False
+
+
+async def test_response_cache():
+    """Test that repeated and paraphrased questions are answered from the cache"""
+    LOG_INFO("Testing response cache...")
+    
+    try:
+        from agent import ResponseCache, AgentResponse, AgentMessage
+        from service import service_registry, DataService, ServiceConfig
+        
+        data_service = DataService(ServiceConfig(service_name="response_cache_test"), "elasticsearch")
+        service_registry.register_service(data_service)
+        
+        cache = ResponseCache(context_markers=["他"])
+        answer = AgentResponse(message=AgentMessage(role="assistant", content="张三住过如家酒店"), tool_calls=[])
+        cache.store("张三住过哪些酒店？", answer)
+        
+        assert cache.lookup("张三住过哪些酒店").usage_stats["cache"] == "exact"
+        assert cache.lookup("请问张三住过什么酒店").usage_stats["cache"] == "semantic"
+        assert cache.lookup("请问张三住过什么酒店").usage_stats["total_tokens"] == 0
+        assert cache.lookup("张三入住过哪些酒店").usage_stats["cache"] == "semantic"
+        
+        # Another person, another index or a follow-up question must not hit
+        assert cache.lookup("李四住过哪些酒店") is None
+        assert cache.lookup("张四住过哪些酒店") is None
+        assert cache.lookup("张三去过哪些酒店") is None
+        assert cache.lookup("张三坐过哪些地铁") is None
+        assert cache.lookup("他住过哪些酒店") is None
+        
+        # A data write makes cached answers stale
+        await data_service._clear_cache()
+        assert cache.lookup("张三住过哪些酒店") is None
+        service_registry.unregister_service("response_cache_test")
+        
+        LOG_INFO(f"Response cache metrics: {cache.metrics.to_dict()}")
+        return True
+    except Exception as e:
+        LOG_ERROR(f"Response cache test failed: {e}")
+        return False
+
+
+async def test_tool_catalog():
+    """Test that the tool list is fetched once and reloaded as a new catalog version"""
+    LOG_INFO("Testing tool catalog...")
+    
+    try:
+        from types import SimpleNamespace
+        from service import MCPServiceImplementation, mcp_tool
+        
+        class FakeServer:
+            available = True
+            calls = 0
+            failing = False
+            tools = [SimpleNamespace(name=f"remote_{i}", description=f"Remote tool {i}", inputSchema={}) for i in range(20)]
+            
+            async def list_tools(self):
+                self.calls += 1
+                if self.failing:
+                    raise ConnectionError("MCP server went away")
+                return self.tools
+        
+        @mcp_tool("local_tool", "Local tool")
+        async def local_tool():
+            return []
+        
+        service = MCPServiceImplementation()
+        service.server_manager = FakeServer()
+        service.register_tool_handler("local_tool", local_tool)
+        
+        catalog = await service.reload_catalog()
+        for tool_name in await service.list_available_tools():
+            assert (await service.get_tool_info(tool_name))["name"] == tool_name
+        assert service.server_manager.calls == 1
+        assert len(catalog.tools) == 21 and catalog.get("local_tool").source == "local"
+        
+        # Unchanged tools keep the version, changed tools publish a new one
+        assert (await service.reload_catalog()).version == catalog.version
+        service.server_manager.tools = service.server_manager.tools[:10]
+        reloaded = await service.reload_catalog()
+        assert reloaded.version == catalog.version + 1 and len(reloaded.tools) == 11
+        
+        # A failed fetch keeps the current tools and version
+        service.server_manager.failing = True
+        try:
+            await service.reload_catalog()
+            assert False, "reload should fail"
+        except ConnectionError:
+            pass
+        assert service.get_catalog() is reloaded and len(service.tools) == 10
+        
+        LOG_INFO(f"Tool catalog v{reloaded.version}: {len(reloaded.tools)} tools")
+        return True
+    except Exception as e:
+        LOG_ERROR(f"Tool catalog test failed: {e}")
+        return False
+
+
+async def test_schema_catalog_without_mysql():
+    """Test that the schema catalog is built from ES mappings when MySQL is disabled"""
+    LOG_INFO("Testing schema catalog without MySQL...")
+    
+    try:
+        from service import SchemaCatalogService
+        
+        class FakeElasticsearchDAO:
+            async def load_field_mappings(self, indices):
+                return {
+                    "hotel_checkin": {"name": {"type": "keyword"}, "room": {"properties": {}}, "room.no": {"type": "keyword"}},
+                    ".kibana": {"title": {"type": "text"}}
+                }
+        
+        saved = dict(db_manager.connections)
+        db_manager.connections.clear()
+        db_manager.connections["elasticsearch"] = FakeElasticsearchDAO()
+        catalog = SchemaCatalogService()
+        catalog.refresh_interval = 0
+        try:
+            await catalog._on_initialize()
+        finally:
+            db_manager.connections.clear()
+            db_manager.connections.update(saved)
+        
+        assert [table.name for table in catalog.list_tables()] == ["hotel_checkin"]
+        assert [column.name for column in catalog.get_columns("hotel_checkin")] == ["name", "room.no"]
+        
+        LOG_INFO(f"Catalog from mappings: {catalog.describe_tables()}")
+        return True
+    except Exception as e:
+        LOG_ERROR(f"Schema catalog without MySQL test failed: {e}")
+        return False
+
+
+async def test_pagination_cursor():
+    """Test that malformed or foreign cursors are rejected as invalid input"""
+    LOG_INFO("Testing pagination cursors...")
+    
+    try:
+        from dao import encode_cursor, decode_cursor
+        
+        mysql_cursor = encode_cursor({'s': ["id:asc"], 'v': [42]})
+        assert decode_cursor(mysql_cursor, ["id:asc"])['v'] == [42]
+        
+        # A MySQL cursor has no point-in-time, so Elasticsearch must refuse it
+        for cursor, required in ((mysql_cursor, ('pit',)), ("not-a-cursor", ()), (encode_cursor({'v': 1}), ())):
+            try:
+                decode_cursor(cursor, required=required)
+            except ValueError:
+                continue
+            raise AssertionError(f"Cursor accepted: {cursor}")
+        
+        return True
+    except Exception as e:
+        LOG_ERROR(f"Pagination cursor test failed: {e}")
+        return False
+
+
+async def test_result_cache():
+    """Test the two-tier result cache against a local fake Redis"""
+    LOG_INFO("Testing result cache...")
+    
+    try:
+        import fakeredis.aioredis
+        from service.cache import ResultCache
+        
+        redis_client = fakeredis.aioredis.FakeRedis()
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"items": [1, 2, 3]}
+        
+        cache = ResultCache("test", ttl=60, redis_client=redis_client)
+        
+        # Concurrent identical misses compute once
+        results = await asyncio.gather(*(
+            cache.get_or_compute("tool", {"a": 1, "b": [1, 2]}, compute) for _ in range(5)
+        ))
+        assert len(calls) == 1 and all(result == results[0] for result in results)
+        assert cache.metrics.misses == 1 and cache.metrics.coalesced == 4
+        
+        # Key order does not matter; the repeat is served locally
+        await cache.get_or_compute("tool", {"b": [1, 2], "a": 1}, compute)
+        assert cache.metrics.local_hits == 1 and len(calls) == 1
+        
+        # A fresh local tier (another worker) is filled from Redis
+        other = ResultCache("test", ttl=60, redis_client=redis_client)
+        assert await other.get_or_compute("tool", {"a": 1, "b": [1, 2]}, compute) == {"items": [1, 2, 3]}
+        assert other.metrics.remote_hits == 1 and len(calls) == 1
+        
+        # A write invalidates both tiers, so no worker reads the pre-write value back from Redis
+        async def recompute():
+            calls.append(1)
+            return {"items": [4]}
+        
+        await cache.invalidate()
+        assert await cache.get_or_compute("tool", {"a": 1, "b": [1, 2]}, recompute) == {"items": [4]}
+        other._generation_checked_at = None  # as if the check interval had passed
+        assert await other.get_or_compute("tool", {"a": 1, "b": [1, 2]}, compute) == {"items": [4]}
+        assert len(calls) == 2
+        
+        # Without INCR the namespace keys are deleted; without Redis at all invalidate() raises
+        async def broken(*args, **kwargs):
+            raise ConnectionError("redis unavailable")
+        
+        redis_client.incr = broken
+        await cache.invalidate()
+        other.clear_local()
+        assert await other.get_or_compute("tool", {"a": 1, "b": [1, 2]}, compute) == {"items": [1, 2, 3]}
+        assert len(calls) == 3
+        
+        redis_client.delete = broken
+        try:
+            await cache.invalidate()
+            assert False, "invalidate should fail"
+        except ConnectionError:
+            pass
+        
+        LOG_INFO(f"Result cache metrics: {cache.metrics.to_dict()}")
+        return True
+    except Exception as e:
+        LOG_ERROR(f"Result cache test failed: {e}")
+        return False
+
+
+async def test_tool_coalescing():
+    """Test that identical concurrent tool calls share one execution"""
+    LOG_INFO("Testing tool call coalescing...")
+    
+    try:
+        from service import mcp_service
+        from service.mcp_service import mcp_tool
+        calls = []
+        
+        @mcp_tool("test_coalesced_tool", "Slow test tool", cache_ttl=0, coalesce=True)
+        async def slow_tool(keyword: str, limit: int = 10):
+            calls.append(keyword)
+            await asyncio.sleep(0.05)
+            return {"keyword": keyword, "limit": limit}
+        
+        mcp_service.register_tool_handler("test_coalesced_tool", slow_tool)
+        try:
+            before = mcp_service.in_flight.coalesced
+            results = await asyncio.gather(
+                mcp_service.execute_tool("test_coalesced_tool", {"keyword": "a", "limit": 5}),
+                mcp_service.execute_tool("test_coalesced_tool", {"limit": 5, "keyword": "a"}),
+                mcp_service.execute_tool("test_coalesced_tool", {"keyword": "a", "limit": 5}),
+                mcp_service.execute_tool("test_coalesced_tool", {"keyword": "b", "limit": 5})
+            )
+            assert all(result.success for result in results)
+            assert sorted(calls) == ["a", "b"]
+            assert mcp_service.in_flight.coalesced - before == 2
+        finally:
+            mcp_service.tool_handlers.pop("test_coalesced_tool", None)
+        
+        LOG_INFO(f"Coalescing metrics: {mcp_service.get_coalescing_metrics()}")
+        return True
+    except Exception as e:
+        LOG_ERROR(f"Tool coalescing test failed: {e}")
+        return False
+
+
+async def test_bulk_insert_failure():
+    """Test that a bulk ingest whose consumer dies fails instead of hanging"""
+    LOG_INFO("Testing bulk insert failure...")
+    
+    try:
+        from dao import ElasticsearchDAO
+        
+        class UnreachableClient:
+            """Fails the first bulk request like a dropped connection"""
+            def options(self, **kwargs):
+                raise ConnectionError("connection reset by peer")
+        
+        dao = ElasticsearchDAO({"hosts": ["http://localhost:9200"]})
+        dao.client = UnreachableClient()
+        documents = ({"seq": i} for i in range(1000))
+        
+        try:
+            await asyncio.wait_for(dao.bulk_insert("bulk_test", documents, chunk_size=2, concurrency=2), 5)
+            assert False, "bulk insert should fail"
+        except ConnectionError:
+            pass
+        
+        LOG_INFO("Bulk insert failed fast after its consumers died")
+        return True
+    except Exception as e:
+        LOG_ERROR(f"Bulk insert failure test failed: {e}")
+        return False
+
+
 async def test_configuration():
     """Test configuration loading"""
     LOG_INFO("Testing configuration...")
@@ -160,11 +673,23 @@ async def run_all_tests():
     
     tests = [
         ("Configuration", test_configuration),
+        ("Pagination Cursor", test_pagination_cursor),
+        ("Schema Catalog Without MySQL", test_schema_catalog_without_mysql),
+        ("Result Cache", test_result_cache),
+        ("Tool Coalescing", test_tool_coalescing),
+        ("Bulk Insert Failure", test_bulk_insert_failure),
+        ("Tool Catalog", test_tool_catalog),
+        ("Session Memory", test_session_memory),
+        ("Context Window", test_context_window),
+        ("Tool Output Shaping", test_tool_output_shaping),
+        ("Response Cache", test_response_cache),
         ("Database Connections", test_database_connections),
         ("Service Initialization", test_service_initialization),
         ("Agent Initialization", test_agent_initialization),
         ("Basic Chat", test_basic_chat),
         ("Tool Execution", test_tool_execution),
+        ("Parallel Tool Execution", test_parallel_tool_execution),
+        ("Agent Stream Events", test_agent_stream_events),
     ]
     
     results = {}
@@ -213,9 +738,9 @@ async def main():
             LOG_INFO("All tests passed! Python implementation is working correctly.")
         else:
             LOG_ERROR("Some tests failed. Please check the logs for details.")
-            
-        return success
         
+        return success
+    
     except Exception as e:
         LOG_ERROR(f"Test execution failed: {e}")
         return False